@@ -0,0 +1,209 @@
+# agenda.py
+from datetime import datetime, timedelta
+
+from rangos_fecha import FORMATO_FECHA, rango_periodo, filtro_rango
+
+# Las reservas son consultas con fecha_consulta (inicio) y duracion_minutos.
+# Para saber si un intervalo [inicio, fin) choca con otro basta leer, en el
+# índice (doctor_id, fecha_consulta), las consultas que empiezan entre
+# inicio - MAX_DURACION_MINUTOS y fin: una búsqueda O(log n) más las pocas
+# filas de esa ventana, sin importar cuántas reservas tenga el doctor.
+
+DURACION_POR_DEFECTO = 30     # minutos; también para consultas sin duración registrada
+MAX_DURACION_MINUTOS = 240    # cota de la ventana de búsqueda de solapamientos
+MAX_DIAS_CONSULTA = 31
+
+# Horario para doctores sin bloques cargados: lunes a viernes de 9 a 17
+HORARIO_POR_DEFECTO = [(dia, '09:00', '17:00', DURACION_POR_DEFECTO) for dia in range(5)]
+
+
+class ConflictoAgenda(Exception):
+    """El intervalo pedido se solapa con una consulta existente"""
+
+    def __init__(self, consulta):
+        super().__init__(f"Se solapa con la consulta {consulta['id']} ({consulta['inicio']} - {consulta['fin']})")
+        self.consulta = consulta
+
+
+def leer_fecha_hora(texto):
+    """Convierte 'YYYY-MM-DD HH:MM[:SS]' (o con 'T') en datetime; lanza ValueError si es inválida.
+
+    La agenda guarda la hora local de la clínica sin zona: un valor con
+    desplazamiento ('Z', '-03:00') se rechaza en vez de descartar la zona.
+    """
+    try:
+        fecha_hora = datetime.fromisoformat(str(texto).strip())
+    except ValueError:
+        raise ValueError('Fecha y hora inválidas (usar YYYY-MM-DD HH:MM)')
+    if fecha_hora.tzinfo is not None:
+        raise ValueError('Fecha y hora con zona horaria no soportadas (usar la hora local, YYYY-MM-DD HH:MM)')
+    return fecha_hora.replace(second=0, microsecond=0)
+
+def _hora(texto):
+    return datetime.strptime(texto, '%H:%M').time()
+
+# ==================== HORARIOS ====================
+
+def horario_doctor(conn, doctor_id):
+    """Bloques de atención del doctor: lista de (día, hora_inicio, hora_fin, duración del turno)"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT dia_semana, hora_inicio, hora_fin, duracion_turno
+        FROM horarios_doctor
+        WHERE doctor_id = ?
+        ORDER BY dia_semana, hora_inicio
+    ''', (doctor_id,))
+    bloques = [tuple(fila) for fila in cursor.fetchall()]
+    return bloques or list(HORARIO_POR_DEFECTO)
+
+def guardar_horario(conn, doctor_id, bloques):
+    """Reemplaza el horario del doctor; lanza ValueError si un bloque es inválido o se solapa"""
+    normalizados = []
+    for bloque in bloques:
+        try:
+            dia = int(bloque['dia_semana'])
+            inicio, fin = _hora(bloque['hora_inicio']), _hora(bloque['hora_fin'])
+            duracion = int(bloque.get('duracion_turno') or DURACION_POR_DEFECTO)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Bloque inválido: se requieren dia_semana, hora_inicio y hora_fin (HH:MM)')
+        if not 0 <= dia <= 6 or inicio >= fin or not 5 <= duracion <= MAX_DURACION_MINUTOS:
+            raise ValueError(f'Bloque inválido para el día {dia}')
+        normalizados.append((dia, inicio, fin, duracion))
+
+    normalizados.sort()
+    for anterior, siguiente in zip(normalizados, normalizados[1:]):
+        if anterior[0] == siguiente[0] and siguiente[1] < anterior[2]:
+            raise ValueError(f'Bloques solapados el día {anterior[0]}')
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('DELETE FROM horarios_doctor WHERE doctor_id = ?', (doctor_id,))
+        conn.executemany('''
+            INSERT INTO horarios_doctor (doctor_id, dia_semana, hora_inicio, hora_fin, duracion_turno)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(doctor_id, dia, inicio.strftime('%H:%M'), fin.strftime('%H:%M'), duracion)
+              for dia, inicio, fin, duracion in normalizados])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+# ==================== OCUPACIÓN ====================
+
+def conflicto(conn, doctor_id, inicio, fin):
+    """Primera consulta no cancelada del doctor que se solapa con [inicio, fin), o None"""
+    ventana, params = filtro_rango(
+        'fecha_consulta', rango_periodo(inicio - timedelta(minutes=MAX_DURACION_MINUTOS), fin))
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT id,
+               fecha_consulta AS inicio,
+               datetime(fecha_consulta, '+' || COALESCE(duracion_minutos, ?) || ' minutes') AS fin
+        FROM consultas
+        WHERE doctor_id = ?
+          AND {ventana}
+          AND estado != 'cancelada'
+          AND datetime(fecha_consulta, '+' || COALESCE(duracion_minutos, ?) || ' minutes') > ?
+        LIMIT 1
+    ''', (DURACION_POR_DEFECTO, doctor_id, *params, DURACION_POR_DEFECTO, inicio.strftime(FORMATO_FECHA)))
+    fila = cursor.fetchone()
+    return dict(fila) if fila else None
+
+def intervalos_ocupados(conn, doctor_id, desde, hasta):
+    """Intervalos ocupados del doctor que tocan [desde, hasta), ordenados y fusionados"""
+    ventana, params = filtro_rango(
+        'fecha_consulta', rango_periodo(desde - timedelta(minutes=MAX_DURACION_MINUTOS), hasta))
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT fecha_consulta,
+               datetime(fecha_consulta, '+' || COALESCE(duracion_minutos, ?) || ' minutes')
+        FROM consultas
+        WHERE doctor_id = ?
+          AND {ventana}
+          AND estado != 'cancelada'
+        ORDER BY fecha_consulta
+    ''', (DURACION_POR_DEFECTO, doctor_id, *params))
+
+    fusionados = []
+    for texto_inicio, texto_fin in cursor.fetchall():
+        inicio, fin = datetime.fromisoformat(texto_inicio), datetime.fromisoformat(texto_fin)
+        if fin <= desde:
+            continue
+        if fusionados and inicio <= fusionados[-1][1]:
+            fusionados[-1][1] = max(fusionados[-1][1], fin)
+        else:
+            fusionados.append([inicio, fin])
+    return fusionados
+
+def turnos_libres(conn, doctor_id, fecha, dias=1, ahora=None):
+    """Turnos libres del doctor desde 'fecha' (date) durante 'dias' días.
+
+    Los turnos salen del horario del doctor y se descartan los que chocan con
+    una consulta o ya pasaron. Retorna una lista de dicts con inicio y fin.
+    """
+    if not 1 <= dias <= MAX_DIAS_CONSULTA:
+        raise ValueError(f'dias debe estar entre 1 y {MAX_DIAS_CONSULTA}')
+    ahora = ahora or datetime.now()
+    bloques = horario_doctor(conn, doctor_id)
+    desde = datetime.combine(fecha, datetime.min.time())
+    ocupados = intervalos_ocupados(conn, doctor_id, desde, desde + timedelta(days=dias))
+
+    libres = []
+    j = 0
+    for d in range(dias):
+        dia = desde + timedelta(days=d)
+        for dia_semana, hora_inicio, hora_fin, duracion in bloques:
+            if dia_semana != dia.weekday():
+                continue
+            turno = datetime.combine(dia.date(), _hora(hora_inicio))
+            limite = datetime.combine(dia.date(), _hora(hora_fin))
+            paso = timedelta(minutes=duracion)
+            # Barrido: turnos y ocupados avanzan juntos en orden cronológico
+            while turno + paso <= limite:
+                fin = turno + paso
+                while j < len(ocupados) and ocupados[j][1] <= turno:
+                    j += 1
+                libre = j == len(ocupados) or ocupados[j][0] >= fin
+                if libre and turno >= ahora:
+                    libres.append({'inicio': turno.strftime('%Y-%m-%d %H:%M'),
+                                   'fin': fin.strftime('%Y-%m-%d %H:%M')})
+                turno = fin
+    return libres
+
+# ==================== RESERVAS ====================
+
+def reservar(conn, doctor_id, paciente_id, inicio, duracion=None, motivo='Cita programada'):
+    """Reserva una consulta pendiente; lanza ConflictoAgenda si el intervalo está ocupado.
+
+    La verificación y el INSERT van en una transacción BEGIN IMMEDIATE, así dos
+    reservas simultáneas del mismo turno no pueden pasar las dos. Lanza
+    ValueError si la duración es inválida o el turno está fuera del horario.
+    """
+    duracion = int(duracion or DURACION_POR_DEFECTO)
+    if not 5 <= duracion <= MAX_DURACION_MINUTOS:
+        raise ValueError(f'La duración debe estar entre 5 y {MAX_DURACION_MINUTOS} minutos')
+    fin = inicio + timedelta(minutes=duracion)
+
+    dentro = any(dia == inicio.weekday()
+                 and _hora(hora_inicio) <= inicio.time() and fin.time() <= _hora(hora_fin)
+                 and fin.date() == inicio.date()
+                 for dia, hora_inicio, hora_fin, _ in horario_doctor(conn, doctor_id))
+    if not dentro:
+        raise ValueError('El turno está fuera del horario del doctor')
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        ocupado = conflicto(conn, doctor_id, inicio, fin)
+        if ocupado:
+            raise ConflictoAgenda(ocupado)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO consultas (paciente_id, doctor_id, fecha_consulta, duracion_minutos, motivo, estado)
+            VALUES (?, ?, ?, ?, ?, 'pendiente')
+        ''', (paciente_id, doctor_id, inicio.strftime(FORMATO_FECHA), duracion, motivo))
+        consulta_id = cursor.lastrowid
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return consulta_id
@@ -0,0 +1,76 @@
+# archivo.py
+
+# Tablas que se mueven juntas al archivar, con la columna que las une al
+# paciente. Se insertan en este orden y se borran en el inverso (claves foráneas).
+TABLAS_ARCHIVO = [
+    ('pacientes', 'id'),
+    ('consultas', 'paciente_id'),
+    ('historial_medico', 'paciente_id'),
+]
+
+_columnas = {}   # (tabla, tabla_archivo) -> lista de columnas comunes
+
+def _columnas_comunes(conn, tabla, destino):
+    """Columnas presentes en ambas tablas (el archivo agrega fecha_archivado)"""
+    clave = (tabla, destino)
+    if clave not in _columnas:
+        origen = [fila[1] for fila in conn.execute(f'PRAGMA table_info({tabla})')]
+        archivo = {fila[1] for fila in conn.execute(f'PRAGMA table_info({destino})')}
+        _columnas[clave] = [c for c in origen if c in archivo]
+    return _columnas[clave]
+
+def _cargar_seleccion(conn, ids):
+    # Tabla temporal de ids: una sola sentencia por tabla sin importar cuántos pacientes sean
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS ids_seleccion (id INTEGER PRIMARY KEY)')
+    conn.execute('DELETE FROM temp.ids_seleccion')
+    conn.executemany('INSERT OR IGNORE INTO temp.ids_seleccion (id) VALUES (?)', [(i,) for i in ids])
+
+def _mover(conn, ids, hacia_archivo):
+    """Copia las filas de los pacientes al otro lado y las borra del origen, en una transacción"""
+    ids = [int(i) for i in ids]
+    movidos = {}
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        _cargar_seleccion(conn, ids)
+        for tabla, columna in TABLAS_ARCHIVO:
+            origen, destino = (tabla, f'{tabla}_archivo') if hacia_archivo else (f'{tabla}_archivo', tabla)
+            lista = ', '.join(_columnas_comunes(conn, tabla, f'{tabla}_archivo'))
+            cursor = conn.execute(f'''
+                INSERT INTO {destino} ({lista})
+                SELECT {lista} FROM {origen}
+                WHERE {columna} IN (SELECT id FROM temp.ids_seleccion)
+            ''')
+            movidos[tabla] = cursor.rowcount
+        for tabla, columna in reversed(TABLAS_ARCHIVO):
+            origen = tabla if hacia_archivo else f'{tabla}_archivo'
+            conn.execute(f'DELETE FROM {origen} WHERE {columna} IN (SELECT id FROM temp.ids_seleccion)')
+        conn.execute('DELETE FROM temp.ids_seleccion')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return movidos
+
+def archivar_pacientes(conn, ids):
+    """Mueve los pacientes con sus consultas e historial a las tablas *_archivo.
+
+    Todo ocurre en una transacción: o se archiva el paciente completo o nada.
+    Los triggers de contadores, búsqueda y versiones ven un DELETE normal.
+    Retorna las filas movidas por tabla.
+    """
+    return _mover(conn, ids, hacia_archivo=True)
+
+def restaurar_pacientes(conn, ids):
+    """Devuelve pacientes archivados (con sus ids originales) a las tablas activas"""
+    return _mover(conn, ids, hacia_archivo=False)
+
+def resumen_archivo(conn):
+    """Cantidad de filas en cada tabla de archivo"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT (SELECT COUNT(*) FROM pacientes_archivo),
+               (SELECT COUNT(*) FROM consultas_archivo),
+               (SELECT COUNT(*) FROM historial_medico_archivo)
+    ''')
+    pacientes, consultas, historial = cursor.fetchone()
+    return {'pacientes': pacientes, 'consultas': consultas, 'historial_medico': historial}
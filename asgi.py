@@ -0,0 +1,202 @@
+# asgi.py
+#
+# Punto de entrada ASGI de la aplicación: uvicorn asgi:app --host 0.0.0.0 --port 5000
+#
+# Las vistas siguen siendo las de Flask (calc_app); cambia cómo se atienden
+# las conexiones. Con el servidor con hilos cada petición ocupa un hilo
+# durante toda su llamada a SQLite, y con cientos de clientes hay cientos de
+# hilos esperando una de las pocas conexiones del pool. Aquí las conexiones
+# esperan en el event loop y al ejecutor de la API pasan solo tantas
+# peticiones como conexiones tiene el pool.
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from calc_app import app as aplicacion_flask
+from database import obtener_pool
+from tareas import cola_tareas
+
+PREFIJO_API = '/api/'
+TRABAJADORES_GENERALES = 4   # páginas HTML y estáticos
+MAX_EN_ESPERA = 1000         # peticiones encoladas; más allá se responde 503
+LIMITE_BUFFER = 256 * 1024   # bytes; respuestas más grandes se envían por partes
+MAX_CUERPO = 32 * 1024 * 1024  # bytes; cuerpos de petición más grandes se rechazan con 413
+
+
+class AdaptadorASGI:
+    """Sirve una aplicación WSGI desde ASGI con ejecutores acotados.
+
+    /api/* corre en un ejecutor con un hilo por conexión del pool de SQLite
+    (el cuello de botella real); el resto en un ejecutor general más chico.
+    Las respuestas grandes (exportaciones) se envían a medida que la vista
+    las genera. Una petición cuenta como en curso desde que llega, también
+    mientras se recibe su cuerpo, que no puede superar max_cuerpo bytes.
+    """
+
+    def __init__(self, aplicacion, trabajadores_api=None, trabajadores_generales=TRABAJADORES_GENERALES,
+                 max_en_espera=MAX_EN_ESPERA, max_cuerpo=MAX_CUERPO):
+        self.aplicacion = aplicacion
+        self.trabajadores_api = trabajadores_api or obtener_pool().max_conexiones
+        self.max_en_espera = max_en_espera
+        self.max_cuerpo = max_cuerpo
+        self._ejecutor_api = ThreadPoolExecutor(self.trabajadores_api, thread_name_prefix='asgi-api')
+        self._ejecutor_general = ThreadPoolExecutor(trabajadores_generales, thread_name_prefix='asgi')
+        self._en_curso = 0
+        self._rechazadas = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Tipo de conexión no soportado: {scope['type']}")
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                # Este proceso atiende las tareas: retoma las pendientes y abandonadas
+                cola_tareas.reanudar()
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                self._ejecutor_api.shutdown(wait=True)
+                self._ejecutor_general.shutdown(wait=True)
+                obtener_pool().cerrar_todas()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        if self._en_curso >= self.max_en_espera:
+            self._rechazadas += 1
+            await self._error(send, 503, b'Servidor ocupado', [(b'retry-after', b'1')])
+            return
+
+        self._en_curso += 1
+        try:
+            if self._declara_exceso(scope):
+                await self._error(send, 413, b'Cuerpo de la peticion demasiado grande')
+                return
+            cuerpo = await self._leer_cuerpo(receive)
+            if cuerpo is None:
+                return
+            if len(cuerpo) > self.max_cuerpo:
+                await self._error(send, 413, b'Cuerpo de la peticion demasiado grande')
+                return
+
+            ejecutor = self._ejecutor_api if scope['path'].startswith(PREFIJO_API) else self._ejecutor_general
+            loop = asyncio.get_running_loop()
+            respuesta = await loop.run_in_executor(ejecutor, self._ejecutar_wsgi, loop,
+                                                   self._entorno(scope, bytes(cuerpo)), send)
+        finally:
+            self._en_curso -= 1
+        if respuesta is not None:
+            inicio, contenido = respuesta
+            await send({'type': 'http.response.start', **inicio})
+            await send({'type': 'http.response.body', 'body': contenido})
+
+    def _declara_exceso(self, scope):
+        """True si el Content-Length ya anuncia un cuerpo mayor a max_cuerpo"""
+        for nombre, valor in scope.get('headers', []):
+            if nombre.lower() == b'content-length' and valor.isdigit():
+                return int(valor) > self.max_cuerpo
+        return False
+
+    async def _leer_cuerpo(self, receive):
+        """Lee el cuerpo, cortando apenas pasa max_cuerpo; None si el cliente se desconectó"""
+        cuerpo = bytearray()
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'http.disconnect':
+                return None
+            cuerpo += mensaje.get('body', b'')
+            if len(cuerpo) > self.max_cuerpo or not mensaje.get('more_body'):
+                return cuerpo
+
+    async def _error(self, send, status, mensaje, headers=()):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'), *headers]})
+        await send({'type': 'http.response.body', 'body': b'{"error": "' + mensaje + b'"}'})
+
+    def _entorno(self, scope, cuerpo):
+        """Traduce el scope ASGI al environ de WSGI (PEP 3333)"""
+        servidor = scope.get('server') or ('localhost', 80)
+        cliente = scope.get('client') or ('', 0)
+        entorno = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': servidor[0],
+            'SERVER_PORT': str(servidor[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': cliente[0],
+            'REMOTE_PORT': str(cliente[1]),
+            'CONTENT_LENGTH': str(len(cuerpo)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(cuerpo),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for nombre, valor in scope.get('headers', []):
+            nombre = nombre.decode('latin-1').upper().replace('-', '_')
+            valor = valor.decode('latin-1')
+            if nombre == 'CONTENT_TYPE':
+                entorno['CONTENT_TYPE'] = valor
+            elif nombre != 'CONTENT_LENGTH':
+                clave = f'HTTP_{nombre}'
+                entorno[clave] = f'{entorno[clave]},{valor}' if clave in entorno else valor
+        return entorno
+
+    def _ejecutar_wsgi(self, loop, entorno, send):
+        """Corre la vista en el hilo del ejecutor.
+
+        Retorna (inicio, cuerpo) para que el event loop envíe la respuesta.
+        Si el cuerpo supera LIMITE_BUFFER (exportaciones por partes) se pasa
+        a enviarlo desde aquí a medida que se genera, y se retorna None.
+        """
+        def enviar(mensaje):
+            asyncio.run_coroutine_threadsafe(send(mensaje), loop).result()
+
+        inicio = {}
+
+        def start_response(status, headers, exc_info=None):
+            inicio['status'] = int(status.split(' ', 1)[0])
+            inicio['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        resultado = self.aplicacion(entorno, start_response)
+        try:
+            partes, tamano = [], 0
+            iterador = iter(resultado)
+            for parte in iterador:
+                partes.append(parte)
+                tamano += len(parte)
+                if tamano > LIMITE_BUFFER:
+                    break
+            else:
+                return inicio, b''.join(partes)
+
+            # Cada envío espera al event loop: solo vale la pena para cuerpos grandes
+            enviar({'type': 'http.response.start', **inicio})
+            enviar({'type': 'http.response.body', 'body': b''.join(partes), 'more_body': True})
+            for parte in iterador:
+                if parte:
+                    enviar({'type': 'http.response.body', 'body': parte, 'more_body': True})
+            enviar({'type': 'http.response.body', 'body': b''})
+            return None
+        finally:
+            # close() dispara el teardown de Flask, que devuelve la conexión al pool
+            if hasattr(resultado, 'close'):
+                resultado.close()
+
+    def estadisticas(self):
+        return {'trabajadores_api': self.trabajadores_api, 'en_curso': self._en_curso,
+                'max_en_espera': self.max_en_espera, 'max_cuerpo': self.max_cuerpo,
+                'rechazadas': self._rechazadas}
+
+
+app = AdaptadorASGI(aplicacion_flask)
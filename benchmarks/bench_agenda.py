@@ -0,0 +1,117 @@
+# benchmarks/bench_agenda.py
+"""Detección de solapamientos y turnos libres con agendas de hasta un año.
+
+Llena la agenda de 50 doctores (70% de los turnos de 30 minutos ocupados,
+lunes a viernes) y compara la verificación por ventana en el índice
+(doctor_id, fecha_consulta) con un barrido de la tabla sin índice.
+
+Uso: python -m benchmarks.bench_agenda [--doctores 50] [--meses 1 6 12]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from agenda import conflicto, turnos_libres, reservar, ConflictoAgenda, FORMATO_FECHA
+from migraciones import aplicar_migraciones
+from benchmarks.generador import crear_base_sintetica
+
+# Solapamiento sin ventana: lo que haría una consulta que no aprovecha el índice
+SQL_BARRIDO = '''
+    SELECT id FROM consultas NOT INDEXED
+    WHERE doctor_id = ?
+      AND fecha_consulta < ?
+      AND datetime(fecha_consulta, '+' || COALESCE(duracion_minutos, 30) || ' minutes') > ?
+      AND estado != 'cancelada'
+    LIMIT 1
+'''
+
+def llenar_agenda(conn, doctores, inicio, dias, rng):
+    """Reservas de 30 minutos de 9 a 17 en días hábiles; retorna la cantidad"""
+    filas = []
+    for d in range(dias):
+        dia = inicio + timedelta(days=d)
+        if dia.weekday() >= 5:
+            continue
+        for doctor_id in range(1, doctores + 1):
+            for turno in range(16):
+                if rng.random() < 0.7:
+                    hora = datetime.combine(dia, datetime.min.time()) + timedelta(hours=9, minutes=30 * turno)
+                    filas.append((rng.randint(1, 500), doctor_id, hora.strftime(FORMATO_FECHA), 30,
+                                  'Cita programada', 'pendiente'))
+    conn.execute('BEGIN')
+    conn.executemany('''
+        INSERT INTO consultas (paciente_id, doctor_id, fecha_consulta, duracion_minutos, motivo, estado)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', filas)
+    conn.commit()
+    return len(filas)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--doctores', type=int, default=50)
+    parser.add_argument('--meses', type=int, nargs='+', default=[1, 6, 12])
+    parser.add_argument('--verificaciones', type=int, default=5000)
+    args = parser.parse_args()
+
+    # La agenda empieza el lunes siguiente para que turnos_libres no descarte turnos pasados
+    inicio = date.today() + timedelta(days=7 - date.today().weekday())
+
+    print(f"{'meses':>5} {'reservas':>9} {'ventana':>10} {'barrido':>10} {'libres 7d':>10} {'reservas/s':>11}")
+    for meses in args.meses:
+        rng = random.Random(42)
+        dias = meses * 30
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, 'bench.db')
+            with contextlib.redirect_stdout(io.StringIO()):
+                crear_base_sintetica(ruta, pacientes=500, consultas=0, historial=0,
+                                     doctores=args.doctores).close()
+                conn = sqlite3.connect(ruta)
+                conn.row_factory = sqlite3.Row
+                aplicar_migraciones(conn)
+            total = llenar_agenda(conn, args.doctores, inicio, dias, rng)
+
+            def intervalo_aleatorio():
+                dia = inicio + timedelta(days=rng.randrange(dias))
+                desde = datetime.combine(dia, datetime.min.time()) + timedelta(hours=9, minutes=15 * rng.randrange(32))
+                return rng.randint(1, args.doctores), desde, desde + timedelta(minutes=30)
+
+            muestras = [intervalo_aleatorio() for _ in range(args.verificaciones)]
+            t0 = time.perf_counter()
+            for doctor_id, desde, hasta in muestras:
+                conflicto(conn, doctor_id, desde, hasta)
+            ventana_us = (time.perf_counter() - t0) * 1e6 / len(muestras)
+
+            # El barrido es lento: una muestra chica alcanza
+            pocas = muestras[:max(len(muestras) // 50, 20)]
+            t0 = time.perf_counter()
+            for doctor_id, desde, hasta in pocas:
+                conn.execute(SQL_BARRIDO, (doctor_id, hasta.strftime(FORMATO_FECHA),
+                                           desde.strftime(FORMATO_FECHA))).fetchone()
+            barrido_us = (time.perf_counter() - t0) * 1e6 / len(pocas)
+
+            t0 = time.perf_counter()
+            for doctor_id in range(1, args.doctores + 1):
+                turnos_libres(conn, doctor_id, inicio + timedelta(days=rng.randrange(dias)), dias=7)
+            libres_ms = (time.perf_counter() - t0) * 1000 / args.doctores
+
+            t0 = time.perf_counter()
+            intentos = muestras[:1000]
+            for doctor_id, desde, _ in intentos:
+                try:
+                    reservar(conn, doctor_id, rng.randint(1, 500), desde)
+                except (ConflictoAgenda, ValueError):
+                    pass
+            reservas_s = len(intentos) / (time.perf_counter() - t0)
+            conn.close()
+
+        print(f"{meses:>5} {total:>9} {ventana_us:>8.1f}µs {barrido_us:>8.0f}µs "
+              f"{libres_ms:>8.2f}ms {reservas_s:>11.0f}")
+
+if __name__ == '__main__':
+    main()
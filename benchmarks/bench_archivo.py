@@ -0,0 +1,97 @@
+# benchmarks/bench_archivo.py
+"""Paneles y listados antes y después de archivar el 80% de los pacientes.
+
+Mide las rutas que leen las tablas activas completas, archiva los pacientes
+con la actividad más antigua (con sus consultas e historial) y vuelve a
+medir. El cache de lecturas se vacía antes de cada petición para medir las
+consultas y no el cache.
+
+Uso: python -m benchmarks.bench_archivo [--pacientes 20000] [--consultas 200000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.generador import crear_base_sintetica, PASSWORD_ADMIN, PASSWORD_DOCTOR
+
+RUTAS = [
+    ('admin', '/admin/dashboard'),
+    ('admin', '/admin/stats'),
+    ('doctor', '/doctor/dashboard'),
+    ('doctor', '/doctor/stats'),
+    ('admin', '/system-maintenance'),
+    ('doctor', '/historial-pacientes'),
+    ('doctor', '/register-consultation'),
+    ('admin', '/api/pacientes?q=a'),
+]
+
+def medir(clientes, repeticiones, limpiar_cache):
+    """Retorna {ruta: ms mediana}"""
+    resultados = {}
+    for rol, ruta in RUTAS:
+        tiempos = []
+        for _ in range(repeticiones):
+            limpiar_cache()
+            inicio = time.perf_counter()
+            respuesta = clientes[rol].get(ruta)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert respuesta.status_code == 200, (ruta, respuesta.status_code)
+        resultados[ruta] = statistics.median(tiempos)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pacientes', type=int, default=20000)
+    parser.add_argument('--consultas', type=int, default=200000)
+    parser.add_argument('--fraccion', type=float, default=0.8)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # La aplicación usa 'clinic.db' relativo al directorio actual
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            crear_base_sintetica('clinic.db', args.pacientes, args.consultas).close()
+            import calc_app
+        from archivo import archivar_pacientes
+        from cache import cache_lectura
+        from database import get_db_connection
+
+        clientes = {'admin': calc_app.app.test_client(), 'doctor': calc_app.app.test_client()}
+        clientes['admin'].post('/login', json={'email': 'admin@vetclinic.com', 'password': PASSWORD_ADMIN})
+        clientes['doctor'].post('/login', json={'email': 'doctor1@vetclinic.com', 'password': PASSWORD_DOCTOR})
+
+        antes = medir(clientes, args.repeticiones, cache_lectura.limpiar)
+
+        with calc_app.app.app_context():
+            conn = get_db_connection()
+            # Los pacientes sin consultas o con la última consulta más antigua primero
+            ids = [fila[0] for fila in conn.execute('''
+                SELECT p.id FROM pacientes p
+                LEFT JOIN consultas c ON c.paciente_id = p.id
+                GROUP BY p.id
+                ORDER BY MAX(c.fecha_consulta) IS NOT NULL, MAX(c.fecha_consulta), p.id
+                LIMIT ?
+            ''', (int(args.pacientes * args.fraccion),))]
+            inicio = time.perf_counter()
+            movidos = archivar_pacientes(conn, ids)
+            segundos = time.perf_counter() - inicio
+            conn.execute('ANALYZE')
+            conn.close()
+        cache_lectura.limpiar()
+
+        print(f"Archivados {movidos['pacientes']} pacientes, {movidos['consultas']} consultas y "
+              f"{movidos['historial_medico']} registros de historial en {segundos:.2f}s\n")
+
+        despues = medir(clientes, args.repeticiones, cache_lectura.limpiar)
+
+        print(f"{'ruta':>28} {'antes':>10} {'después':>10} {'mejora':>7}")
+        for _, ruta in RUTAS:
+            print(f"{ruta:>28} {antes[ruta]:>8.2f}ms {despues[ruta]:>8.2f}ms {antes[ruta] / despues[ruta]:>6.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+# benchmarks/bench_asgi.py
+"""Prueba de carga de /api/*: servidor con un hilo por conexión frente al punto de entrada ASGI.
+
+Con 200 clientes concurrentes compara:
+  - hilos: cada cliente tiene su hilo que llama a la aplicación WSGI, como el
+    servidor con hilos de Werkzeug (un hilo por conexión abierta);
+  - asgi: cada cliente es una corrutina que llama a asgi.app; solo tantas
+    peticiones como conexiones del pool corren a la vez.
+Las llamadas son en proceso (sin red), así se compara el modelo de
+concurrencia y no la pila HTTP.
+
+Uso: python -m benchmarks.bench_asgi [--clientes 200] [--peticiones 25]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from werkzeug.test import EnvironBuilder
+
+from benchmarks.generador import crear_base_sintetica, PASSWORD_ADMIN, NOMBRES, DIAGNOSTICOS
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+def generar_urls(args, rng):
+    """Secuencia de peticiones de cada cliente: mezcla de lecturas de la API"""
+    def url():
+        paciente = rng.randint(1, args.pacientes)
+        return rng.choice([
+            f'/api/pacientes?q={rng.choice(NOMBRES)[:3]}',
+            f'/api/patient/{paciente}',
+            f'/api/patient/{paciente}/timeline',
+            f'/api/search?q={rng.choice(DIAGNOSTICOS).split()[0]}',
+        ])
+    return [[url() for _ in range(args.peticiones)] for _ in range(args.clientes)]
+
+# ==================== HILOS ====================
+
+def carga_hilos(aplicacion, urls, cookie):
+    """Un hilo por cliente; retorna (latencias ms, errores, segundos, hilos máximos)"""
+    latencias, errores = [], []
+    lock = threading.Lock()
+    largada = threading.Barrier(len(urls) + 1)
+
+    def cliente(lista):
+        largada.wait()
+        for url in lista:
+            entorno = EnvironBuilder(path=url, headers={'Cookie': cookie}).get_environ()
+            estado = {}
+
+            def start_response(status, headers, exc_info=None):
+                estado['codigo'] = int(status.split(' ', 1)[0])
+
+            inicio = time.perf_counter()
+            resultado = aplicacion(entorno, start_response)
+            try:
+                b''.join(resultado)
+            finally:
+                resultado.close()
+            ms = (time.perf_counter() - inicio) * 1000
+            with lock:
+                latencias.append(ms)
+                if estado['codigo'] >= 500:
+                    errores.append(estado['codigo'])
+
+    hilos = [threading.Thread(target=cliente, args=(lista,)) for lista in urls]
+    for hilo in hilos:
+        hilo.start()
+    maximo = threading.active_count()
+    largada.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, errores, time.perf_counter() - inicio, maximo
+
+# ==================== ASGI ====================
+
+async def _peticion(aplicacion, url, cookie):
+    partes = urlsplit(url)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': partes.path, 'raw_path': partes.path.encode(), 'root_path': '',
+        'query_string': partes.query.encode(), 'headers': [(b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    recibido = False
+
+    async def receive():
+        nonlocal recibido
+        if not recibido:
+            recibido = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()
+
+    codigo = {}
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            codigo['status'] = mensaje['status']
+
+    await aplicacion(scope, receive, send)
+    return codigo['status']
+
+async def _carga_asgi(aplicacion, urls, cookie):
+    latencias, errores = [], []
+
+    async def cliente(lista):
+        for url in lista:
+            inicio = time.perf_counter()
+            status = await _peticion(aplicacion, url, cookie)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if status >= 500:
+                errores.append(status)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(lista) for lista in urls))
+    return latencias, errores, time.perf_counter() - inicio, threading.active_count()
+
+def carga_asgi(aplicacion, urls, cookie):
+    return asyncio.run(_carga_asgi(aplicacion, urls, cookie))
+
+# ==================== EJECUCIÓN ====================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pacientes', type=int, default=20000)
+    parser.add_argument('--consultas', type=int, default=200000)
+    parser.add_argument('--clientes', type=int, default=200)
+    parser.add_argument('--peticiones', type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # La aplicación usa 'clinic.db' relativo al directorio actual
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            crear_base_sintetica('clinic.db', args.pacientes, args.consultas).close()
+            import calc_app
+            import asgi
+        from cache import cache_lectura
+
+        cliente = calc_app.app.test_client()
+        cliente.post('/login', json={'email': 'admin@vetclinic.com', 'password': PASSWORD_ADMIN})
+        cookie = f"session={cliente.get_cookie('session').value}"
+
+        print(f"{args.clientes} clientes x {args.peticiones} peticiones\n")
+        print(f"{'modo':>6} {'pet/s':>8} {'p50':>9} {'p99':>9} {'máx':>9} {'errores':>8} {'hilos':>6}")
+        for nombre, carga, aplicacion in [('hilos', carga_hilos, calc_app.app),
+                                          ('asgi', carga_asgi, asgi.app)]:
+            # Misma secuencia de peticiones y cache vacío en ambos modos
+            urls = generar_urls(args, random.Random(42))
+            cache_lectura.limpiar()
+            # Los tracebacks de los errores del servidor se cuentan, no se muestran
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                latencias, errores, segundos, hilos = carga(aplicacion, urls, cookie)
+            print(f"{nombre:>6} {len(latencias) / segundos:>8.0f} {statistics.median(latencias):>7.1f}ms "
+                  f"{percentil(latencias, 0.99):>7.1f}ms {max(latencias):>7.1f}ms {len(errores):>8} {hilos:>6}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_autorizacion.py
+"""Costo por petición de la verificación de sesión.
+
+Compara una ruta sin verificación con: confiar en la cookie, leer la fila de
+usuarios en cada petición y el decorador requiere_sesion con el cache.
+
+Uso: python -m benchmarks.bench_autorizacion [--peticiones 5000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from flask import session
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--peticiones', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # La aplicación usa 'clinic.db' relativo al directorio actual
+        os.chdir(tmp)
+        import calc_app
+        from database import get_db_connection
+        from sesiones import requiere_sesion
+
+        app = calc_app.app
+
+        @app.route('/bench/sin-verificacion')
+        def bench_sin_verificacion():
+            return ''
+
+        @app.route('/bench/cookie')
+        def bench_cookie():
+            if 'user_id' not in session:
+                return '', 401
+            return ''
+
+        @app.route('/bench/fila-usuario')
+        def bench_fila_usuario():
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT rol, activo FROM usuarios WHERE id = ?', (session.get('user_id'),))
+            usuario = cursor.fetchone()
+            conn.close()
+            if not usuario or not usuario['activo']:
+                return '', 401
+            return ''
+
+        @app.route('/bench/cache')
+        @requiere_sesion()
+        def bench_cache():
+            return ''
+
+        cliente = app.test_client()
+        cliente.post('/login', json={'email': 'admin@vetclinic.com', 'password': 'Admin123!'})
+
+        resultados = {}
+        print(f"{'verificación':>18} {'µs/petición':>12} {'sobrecosto':>11}")
+        for nombre, ruta in [('ninguna', '/bench/sin-verificacion'), ('solo cookie', '/bench/cookie'),
+                             ('fila por petición', '/bench/fila-usuario'), ('cache', '/bench/cache')]:
+            for _ in range(200):
+                cliente.get(ruta)
+            inicio = time.perf_counter()
+            for _ in range(args.peticiones):
+                assert cliente.get(ruta).status_code == 200
+            resultados[nombre] = (time.perf_counter() - inicio) * 1e6 / args.peticiones
+            print(f"{nombre:>18} {resultados[nombre]:>12.1f} "
+                  f"{resultados[nombre] - resultados['ninguna']:>+10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_busqueda.py
+"""Compara la búsqueda FTS5 con un LIKE '%...%' equivalente.
+
+Uso: python -m benchmarks.bench_busqueda [--consultas 200000]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from migraciones import aplicar_migraciones
+from busqueda import buscar
+from paginacion import escapar_like
+from benchmarks.generador import crear_base_sintetica
+
+TERMINOS = ['555-012345', 'Luna 777', 'Sanchez', 'dermatitis', 'antibioticos']
+
+def buscar_like(conn, texto):
+    """Línea base: LIKE sobre las mismas columnas.
+
+    Para ordenar por relevancia hay que obtener todas las coincidencias, así
+    que no se corta con LIMIT. LIKE no ignora acentos: 'Sanchez' no encuentra
+    'Sánchez'.
+    """
+    patron = f'%{escapar_like(texto)}%'
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT 'paciente', id FROM pacientes
+        WHERE nombre LIKE :p ESCAPE '\\' OR raza LIKE :p ESCAPE '\\'
+           OR nombre_dueno LIKE :p ESCAPE '\\' OR telefono_dueno LIKE :p ESCAPE '\\'
+           OR notas LIKE :p ESCAPE '\\'
+        UNION ALL
+        SELECT 'consulta', id FROM consultas
+        WHERE motivo LIKE :p ESCAPE '\\' OR diagnostico LIKE :p ESCAPE '\\'
+           OR tratamiento LIKE :p ESCAPE '\\' OR medicamentos LIKE :p ESCAPE '\\'
+        UNION ALL
+        SELECT 'historial', id FROM historial_medico
+        WHERE descripcion LIKE :p ESCAPE '\\'
+    ''', {'p': patron})
+    return cursor.fetchall()
+
+def cronometrar(funcion, repeticiones=5):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones, len(resultado)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pacientes', type=int, default=20000)
+    parser.add_argument('--consultas', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'bench.db')
+        conn = crear_base_sintetica(ruta, pacientes=args.pacientes, consultas=args.consultas)
+        aplicar_migraciones(conn)
+        conn.row_factory = sqlite3.Row
+
+        print(f"{'término':>14} {'LIKE (todas)':>20} {'FTS5 (top 20)':>20}")
+        for termino in TERMINOS:
+            ms_like, n_like = cronometrar(lambda: buscar_like(conn, termino))
+            ms_fts, n_fts = cronometrar(lambda: buscar(conn, termino))
+            print(f"{termino:>14} {ms_like:>9.2f} ms ({n_like:>6}) {ms_fts:>9.2f} ms ({n_fts:>6})")
+        conn.close()
+
+if __name__ == '__main__':
+    main()
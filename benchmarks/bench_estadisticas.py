@@ -0,0 +1,83 @@
+# benchmarks/bench_estadisticas.py
+"""Compara las estadísticas en varias consultas, agregadas en vivo y desde contadores.
+
+Uso: python -m benchmarks.bench_estadisticas [--tamanos 10000 100000 1000000]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from migraciones import aplicar_migraciones
+from rangos_fecha import rango_mes
+from estadisticas import (estadisticas_admin, estadisticas_doctor,
+                          estadisticas_admin_en_vivo, estadisticas_doctor_en_vivo)
+from benchmarks.generador import crear_base_sintetica
+
+def admin_anterior(conn, rango):
+    """Versión anterior: cuatro consultas separadas"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM pacientes')
+    cursor.fetchone()
+    cursor.execute('SELECT COUNT(*) FROM consultas WHERE fecha_consulta >= ? AND fecha_consulta < ?', rango)
+    cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) FROM usuarios WHERE rol = 'doctor' AND activo = 1")
+    cursor.fetchone()
+    cursor.execute('''
+        SELECT u.nombre, COUNT(c.id) as total_consultas
+        FROM usuarios u
+        LEFT JOIN consultas c ON u.id = c.doctor_id
+        WHERE u.rol = 'doctor' AND u.activo = 1
+        GROUP BY u.id, u.nombre
+        ORDER BY total_consultas DESC
+    ''')
+    cursor.fetchall()
+
+def doctor_anterior(conn, doctor_id, rango):
+    """Versión anterior: tres conteos separados"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM consultas WHERE doctor_id = ?', (doctor_id,))
+    cursor.fetchone()
+    cursor.execute('SELECT COUNT(DISTINCT paciente_id) FROM consultas WHERE doctor_id = ?', (doctor_id,))
+    cursor.fetchone()
+    cursor.execute('''SELECT COUNT(*) FROM consultas WHERE doctor_id = ?
+                      AND fecha_consulta >= ? AND fecha_consulta < ?''', (doctor_id,) + rango)
+    cursor.fetchone()
+
+def cronometrar(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    rango = rango_mes()
+    columnas = ['admin ant.', 'admin vivo', 'admin cont.', 'doctor ant.', 'doctor vivo', 'doctor cont.']
+    print(f"{'consultas':>10} " + ' '.join(f"{c:>12}" for c in columnas))
+    for tamano in args.tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, 'bench.db')
+            conn = crear_base_sintetica(ruta, pacientes=max(tamano // 20, 100), consultas=tamano)
+            aplicar_migraciones(conn)
+            conn.execute('ANALYZE')
+            conn.row_factory = sqlite3.Row
+
+            tiempos = (
+                cronometrar(lambda: admin_anterior(conn, rango), args.repeticiones),
+                cronometrar(lambda: estadisticas_admin_en_vivo(conn, rango), args.repeticiones),
+                cronometrar(lambda: estadisticas_admin(conn), args.repeticiones),
+                cronometrar(lambda: doctor_anterior(conn, 3, rango), args.repeticiones),
+                cronometrar(lambda: estadisticas_doctor_en_vivo(conn, 3, rango), args.repeticiones),
+                cronometrar(lambda: estadisticas_doctor(conn, 3), args.repeticiones),
+            )
+            conn.close()
+        print(f"{tamano:>10} " + ' '.join(f"{t:>10.3f}ms" for t in tiempos))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_exportacion.py
+"""Mide la memoria pico de la exportación en streaming frente a fetchall().
+
+Uso: python -m benchmarks.bench_exportacion [--tamanos 100000 1000000]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from exportacion import exportar
+from benchmarks.generador import crear_base_sintetica
+
+def medir(funcion):
+    """Ejecuta la función y retorna (bytes producidos, ms, pico de memoria en MB)"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    total = funcion()
+    ms = (time.perf_counter() - inicio) * 1000
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return total, ms, pico / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--sin-fetchall', action='store_true',
+                        help='omitir la línea base con fetchall() (usa mucha memoria)')
+    args = parser.parse_args()
+
+    print(f"{'filas':>9} {'modo':>16} {'MB salida':>10} {'tiempo':>10} {'pico RAM':>10}")
+    for tamano in args.tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, 'bench.db')
+            crear_base_sintetica(ruta, pacientes=max(tamano // 20, 100), consultas=tamano,
+                                 historial=0).close()
+            conn = sqlite3.connect(ruta)
+
+            modos = [
+                ('ndjson stream', lambda: sum(len(b) for b in exportar(conn, 'consultas'))),
+                ('csv stream', lambda: sum(len(b) for b in exportar(conn, 'consultas', 'csv'))),
+                ('ndjson gzip', lambda: sum(len(b) for b in exportar(conn, 'consultas', comprimir=True))),
+            ]
+            if not args.sin_fetchall:
+                def fetchall_json():
+                    conn.row_factory = sqlite3.Row
+                    filas = conn.execute('SELECT * FROM consultas ORDER BY id').fetchall()
+                    conn.row_factory = None
+                    return len(json.dumps([dict(f) for f in filas]).encode('utf-8'))
+                modos.append(('fetchall + json', fetchall_json))
+
+            for nombre, funcion in modos:
+                total, ms, pico = medir(funcion)
+                print(f"{tamano:>9} {nombre:>16} {total / 1024 / 1024:>10.1f} {ms:>8.0f}ms {pico:>8.2f}MB")
+            conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_importacion.py
+"""Compara la importación fila por fila (un commit por fila) con la importación por lotes.
+
+Uso: python -m benchmarks.bench_importacion [--filas 100000] [--lotes 100 1000 5000]
+"""
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from importacion import ESQUEMAS, importar, leer_filas, validar_fila
+from benchmarks.generador import (crear_base_sintetica, NOMBRES, APELLIDOS, ESPECIES, RAZAS)
+
+def escribir_csv(ruta, filas, semilla=42):
+    """Genera un CSV sintético de pacientes con ~1% de filas inválidas"""
+    azar = random.Random(semilla)
+    columnas = [c for c, _, _ in ESQUEMAS['pacientes'] if c != 'id']
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(columnas)
+        for i in range(filas):
+            escritor.writerow([
+                azar.choice(NOMBRES), azar.choice(ESPECIES), azar.choice(RAZAS),
+                azar.randint(0, 18) if azar.random() > 0.01 else 'x',
+                round(azar.uniform(0.5, 45), 1), 'Café', azar.choice('MF'),
+                f'{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}', f'555-{i % 10000:04d}',
+                '', '', '',
+            ])
+
+def importar_fila_por_fila(conn, archivo):
+    """Línea base: valida e inserta cada fila con su propio commit"""
+    columnas = [c for c, _, _ in ESQUEMAS['pacientes']]
+    sql = (f"INSERT INTO pacientes ({', '.join(columnas)}) "
+           f"VALUES ({', '.join('?' * len(columnas))})")
+    for _, fila in leer_filas(archivo, 'csv'):
+        valores, error = validar_fila('pacientes', fila)
+        if error:
+            continue
+        conn.execute(sql, valores)
+        conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--lotes', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_csv = os.path.join(tmp, 'pacientes.csv')
+        escribir_csv(ruta_csv, args.filas)
+
+        modos = [('fila por fila', None)] + [(f'lote {n}', n) for n in args.lotes]
+        print(f"{'modo':>15} {'filas':>9} {'tiempo':>9} {'filas/s':>10}")
+        for nombre, tamano_lote in modos:
+            ruta = os.path.join(tmp, f'bench_{tamano_lote}.db')
+            crear_base_sintetica(ruta, pacientes=0, consultas=0, historial=0).close()
+            conn = sqlite3.connect(ruta)
+            inicio = time.perf_counter()
+            with open(ruta_csv, encoding='utf-8', newline='') as archivo:
+                if tamano_lote is None:
+                    importar_fila_por_fila(conn, archivo)
+                else:
+                    importar(conn, 'pacientes', leer_filas(archivo, 'csv'), tamano_lote)
+            segundos = time.perf_counter() - inicio
+            conn.close()
+            print(f"{nombre:>15} {args.filas:>9} {segundos:>8.2f}s {args.filas / segundos:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_indices.py
+"""Compara los planes de consulta antes y después de la migración de índices.
+
+Uso: python -m benchmarks.bench_indices [--consultas 1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from migraciones import aplicar_migraciones
+from benchmarks.generador import crear_base_sintetica
+
+CONSULTAS = [
+    ('Total consultas del doctor',
+     'SELECT COUNT(*) FROM consultas WHERE doctor_id = ?', (3,)),
+    ('Pacientes únicos del doctor',
+     'SELECT COUNT(DISTINCT paciente_id) FROM consultas WHERE doctor_id = ?', (3,)),
+    ('Consultas recientes del doctor',
+     '''SELECT c.*, p.nombre FROM consultas c JOIN pacientes p ON c.paciente_id = p.id
+        WHERE c.doctor_id = ? ORDER BY c.fecha_consulta DESC LIMIT 5''', (3,)),
+    ('Historial de un paciente',
+     'SELECT * FROM historial_medico WHERE paciente_id = ? ORDER BY fecha DESC', (42,)),
+    ('Consultas pendientes',
+     '''SELECT c.id FROM consultas c WHERE c.estado = 'pendiente'
+        ORDER BY c.fecha_consulta LIMIT 50''', ()),
+    ('Login por email',
+     'SELECT * FROM usuarios WHERE email = ? AND activo = 1', ('doctor3@vetclinic.com',)),
+]
+
+def medir(conn, repeticiones):
+    resultados = {}
+    for nombre, sql, params in CONSULTAS:
+        plan = ' | '.join(r[3] for r in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            conn.execute(sql, params).fetchall()
+        ms = (time.perf_counter() - inicio) * 1000 / repeticiones
+        resultados[nombre] = (plan, ms)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--consultas', type=int, default=1000000)
+    parser.add_argument('--pacientes', type=int, default=50000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'bench.db')
+        print(f"⏳ Generando {args.consultas} consultas...")
+        conn = crear_base_sintetica(ruta, pacientes=args.pacientes, consultas=args.consultas)
+
+        antes = medir(conn, args.repeticiones)
+        aplicar_migraciones(conn)
+        conn.execute('ANALYZE')
+        despues = medir(conn, args.repeticiones)
+        conn.close()
+
+    for nombre, _, _ in CONSULTAS:
+        plan_a, ms_a = antes[nombre]
+        plan_d, ms_d = despues[nombre]
+        print(f"\n📊 {nombre}")
+        print(f"   antes:   {ms_a:9.2f} ms  {plan_a}")
+        print(f"   después: {ms_d:9.2f} ms  {plan_d}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_linea_tiempo.py
+"""Línea de tiempo de pacientes con miles de eventos frente a las lecturas anteriores.
+
+Compara /api/patient-history (todo el historial de una vez, sin el detalle de
+las consultas) con /api/patient/<id>/timeline: primera página, recorrido
+completo por cursor y revalidación con ETag (304).
+
+Uso: python -m benchmarks.bench_linea_tiempo [--consultas 200000] [--repeticiones 50]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.generador import crear_base_sintetica, PASSWORD_ADMIN
+
+def medir(cliente, peticiones, repeticiones):
+    """Ejecuta la secuencia de peticiones; retorna (ms mediana, bytes recibidos)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        total = sum(len(r.data) for r in peticiones(cliente))
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pacientes', type=int, default=2000)
+    parser.add_argument('--consultas', type=int, default=200000)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # La aplicación usa 'clinic.db' relativo al directorio actual
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            crear_base_sintetica('clinic.db', args.pacientes, args.consultas).close()
+            import calc_app
+        from database import get_db_connection
+
+        cliente = calc_app.app.test_client()
+        cliente.post('/login', json={'email': 'admin@vetclinic.com', 'password': PASSWORD_ADMIN})
+
+        # El generador concentra las visitas en los ids bajos: el paciente 1 tiene miles de eventos
+        with calc_app.app.app_context():
+            conn = get_db_connection()
+            muestras = conn.execute('''
+                SELECT paciente_id, COUNT(*) AS eventos FROM consultas
+                WHERE paciente_id IN (1, 10, ?) GROUP BY paciente_id ORDER BY eventos DESC
+            ''', (args.pacientes // 2,)).fetchall()
+            conn.close()
+
+        print(f"{'paciente':>8} {'consultas':>9} {'modo':>28} {'tiempo':>9} {'KB':>8}")
+        for paciente_id, eventos in muestras:
+            def historial(c):
+                yield c.get(f'/api/patient-history/{paciente_id}')
+
+            def primera_pagina(c):
+                yield c.get(f'/api/patient/{paciente_id}/timeline')
+
+            def recorrido_completo(c):
+                url = f'/api/patient/{paciente_id}/timeline?limit=200'
+                siguiente = ''
+                while siguiente is not None:
+                    respuesta = c.get(url + (f'&cursor={siguiente}' if siguiente else ''))
+                    siguiente = respuesta.get_json()['next_cursor']
+                    yield respuesta
+
+            etag = cliente.get(f'/api/patient/{paciente_id}/timeline').headers['ETag']
+
+            def revalidacion(c):
+                respuesta = c.get(f'/api/patient/{paciente_id}/timeline', headers={'If-None-Match': etag})
+                assert respuesta.status_code == 304
+                yield respuesta
+
+            for nombre, peticiones in [('patient-history', historial),
+                                       ('timeline 1ª página', primera_pagina),
+                                       ('timeline completo', recorrido_completo),
+                                       ('timeline 304', revalidacion)]:
+                ms, total = medir(cliente, peticiones, args.repeticiones)
+                print(f"{paciente_id:>8} {eventos:>9} {nombre:>28} {ms:>7.2f}ms {total / 1024:>8.1f}")
+
+if __name__ == '__main__':
+    main()
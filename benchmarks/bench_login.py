@@ -0,0 +1,107 @@
+# benchmarks/bench_login.py
+"""Prueba de carga: latencia del dashboard durante una tormenta de logins.
+
+Levanta la aplicación en un servidor con hilos sobre una base temporal y mide
+/admin/dashboard en reposo y mientras otros clientes envían logins con
+contraseña incorrecta, con y sin el pool acotado de verificación.
+
+Uso: python -m benchmarks.bench_login [--segundos 10] [--clientes 4] [--atacantes 32]
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else 0.0
+
+def iniciar_sesion(puerto, email, password):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+    conexion.request('POST', '/login', json.dumps({'email': email, 'password': password}),
+                     {'Content-Type': 'application/json'})
+    respuesta = conexion.getresponse()
+    respuesta.read()
+    return conexion, respuesta.getheader('Set-Cookie', '').split(';')[0]
+
+def cliente_dashboard(puerto, cookie, hasta, latencias):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+    while time.monotonic() < hasta:
+        inicio = time.perf_counter()
+        conexion.request('GET', '/admin/dashboard', headers={'Cookie': cookie})
+        conexion.getresponse().read()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+def atacante(puerto, numero, hasta, codigos):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto)
+    cuerpo = json.dumps({'email': 'admin@vetclinic.com', 'password': f'incorrecta{numero}'})
+    while time.monotonic() < hasta:
+        conexion.request('POST', '/login', cuerpo, {'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        codigos[respuesta.status] = codigos.get(respuesta.status, 0) + 1
+
+def fase(puerto, cookie, segundos, clientes, atacantes):
+    hasta = time.monotonic() + segundos
+    latencias, codigos = [], {}
+    hilos = [threading.Thread(target=cliente_dashboard, args=(puerto, cookie, hasta, latencias))
+             for _ in range(clientes)]
+    hilos += [threading.Thread(target=atacante, args=(puerto, i, hasta, codigos))
+              for i in range(atacantes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, codigos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--clientes', type=int, default=4)
+    parser.add_argument('--atacantes', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # La aplicación usa 'clinic.db' relativo al directorio actual
+        os.chdir(tmp)
+        import calc_app
+        import seguridad
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        servidor = make_server('127.0.0.1', 0, calc_app.app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        puerto = servidor.server_port
+        _, cookie = iniciar_sesion(puerto, 'admin@vetclinic.com', 'Admin123!')
+
+        # Límites altos para que la carga llegue a la verificación de contraseñas
+        sin_limite = seguridad.LimitadorTasa(capacidad=10 ** 9, por_segundo=10 ** 9)
+        limites = (calc_app.limitador_ip, calc_app.limitador_email)
+        pool = calc_app.verificador_passwords
+        # Equivalente a verificar en el hilo de cada petición: sin tope ni cola
+        sin_pool = seguridad.VerificadorPasswords(max_trabajadores=args.atacantes, max_en_cola=0)
+
+        escenarios = [
+            ('reposo', 0, limites, pool),
+            ('tormenta sin pool', args.atacantes, (sin_limite, sin_limite), sin_pool),
+            ('tormenta con pool', args.atacantes, (sin_limite, sin_limite), pool),
+            ('tormenta con límites', args.atacantes, limites, pool),
+        ]
+        print(f"{'escenario':>22} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>7}  logins")
+        for nombre, atacantes, (por_ip, por_email), verificador in escenarios:
+            calc_app.limitador_ip, calc_app.limitador_email = por_ip, por_email
+            calc_app.verificador_passwords = verificador
+            latencias, codigos = fase(puerto, cookie, args.segundos, args.clientes, atacantes)
+            print(f"{nombre:>22} {statistics.median(latencias):>6.1f}ms "
+                  f"{percentil(latencias, 0.95):>6.1f}ms {percentil(latencias, 0.99):>6.1f}ms "
+                  f"{len(latencias) / args.segundos:>7.0f}  {dict(sorted(codigos.items()))}")
+        servidor.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_mantenimiento.py
+"""Compara la página de mantenimiento N+1 anterior con la consulta única paginada.
+
+Uso: python -m benchmarks.bench_mantenimiento [--pacientes 50000]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from migraciones import aplicar_migraciones
+from mantenimiento import pacientes_inactivos
+from benchmarks.generador import crear_base_sintetica
+
+def inactivos_anterior(conn):
+    """Versión anterior: una consulta base y dos consultas más por paciente"""
+    cursor = conn.cursor()
+    consultas_sql = 1
+    cursor.execute('''
+        SELECT p.*, MAX(c.fecha_consulta) as ultima_consulta,
+               julianday('now') - julianday(MAX(c.fecha_consulta)) as dias_inactivo
+        FROM pacientes p
+        LEFT JOIN consultas c ON p.id = c.paciente_id
+        GROUP BY p.id
+        HAVING ultima_consulta IS NULL
+               OR (julianday('now') - julianday(ultima_consulta)) > 730
+        ORDER BY dias_inactivo DESC
+    ''')
+    pacientes = [dict(p) for p in cursor.fetchall()]
+    for paciente in pacientes:
+        cursor.execute('''
+            SELECT c.doctor_id, u.nombre as doctor_nombre
+            FROM consultas c
+            JOIN usuarios u ON c.doctor_id = u.id
+            WHERE c.paciente_id = ?
+            ORDER BY c.fecha_consulta DESC
+            LIMIT 1
+        ''', (paciente['id'],))
+        cursor.fetchone()
+        consultas_sql += 1
+        if paciente.get('ultima_consulta'):
+            cursor.execute("SELECT ROUND((julianday('now') - julianday(?)) / 30.44, 1)",
+                           (paciente['ultima_consulta'],))
+            cursor.fetchone()
+            consultas_sql += 1
+    return len(pacientes), consultas_sql
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pacientes', type=int, default=50000)
+    parser.add_argument('--consultas', type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'bench.db')
+        conn = crear_base_sintetica(ruta, pacientes=args.pacientes, consultas=args.consultas)
+        aplicar_migraciones(conn)
+        conn.execute('ANALYZE')
+        conn.row_factory = sqlite3.Row
+
+        inicio = time.perf_counter()
+        total, consultas_sql = inactivos_anterior(conn)
+        ms_anterior = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        _, total_nuevo = pacientes_inactivos(conn, limite=50)
+        ms_pagina = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        pacientes_inactivos(conn, orden='nombre', direccion='asc', limite=50,
+                            offset=(total_nuevo // 100) * 50)
+        ms_pagina_media = (time.perf_counter() - inicio) * 1000
+        conn.close()
+
+    print(f"📊 {args.pacientes} pacientes, {args.consultas} consultas, {total} inactivos")
+    print(f"   anterior (N+1):          {ms_anterior:10.1f} ms  ({consultas_sql} consultas SQL)")
+    print(f"   nueva, primera página:   {ms_pagina:10.1f} ms  (1 consulta SQL, {total_nuevo} inactivos)")
+    print(f"   nueva, página intermedia:{ms_pagina_media:10.1f} ms  (orden por nombre)")
+
+if __name__ == '__main__':
+    main()
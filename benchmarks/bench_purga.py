@@ -0,0 +1,94 @@
+# benchmarks/bench_purga.py
+"""Eliminación masiva de pacientes: DELETE por id frente a lotes con ON DELETE CASCADE.
+
+La versión anterior borraba historial, consultas y pacientes con un
+executemany por tabla (una sentencia por id) en una sola transacción, y sin
+índice en historial_medico.consulta_id cada consulta borrada recorría el
+historial para verificar la clave foránea. La nueva borra por lotes de
+DELETE ... WHERE id IN (...) y deja las tablas hijas a la cascada.
+Se reporta el tiempo total y el lock de escritura más largo.
+
+Uso: python -m benchmarks.bench_purga [--pacientes 5000] [--eliminar 250 1000] [--sin-anterior]
+
+La versión anterior tarda minutos con miles de pacientes: --sin-anterior mide
+solo los lotes sobre bases grandes.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from mantenimiento import eliminar_pacientes
+from migraciones import aplicar_migraciones
+from benchmarks.generador import crear_base_sintetica
+
+def conectar(ruta, hasta=None):
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA foreign_keys = ON')
+    with contextlib.redirect_stdout(io.StringIO()):
+        aplicar_migraciones(conn, hasta)
+    return conn
+
+def eliminar_anterior(conn, ids):
+    """Versión anterior del endpoint: un DELETE por id y tabla, todo en una transacción"""
+    cursor = conn.cursor()
+    cursor.executemany('DELETE FROM historial_medico WHERE paciente_id = ?', [(i,) for i in ids])
+    cursor.executemany('DELETE FROM consultas WHERE paciente_id = ?', [(i,) for i in ids])
+    cursor.executemany('DELETE FROM pacientes WHERE id = ?', [(i,) for i in ids])
+    conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pacientes', type=int, default=5000)
+    parser.add_argument('--consultas', type=int, default=50000)
+    parser.add_argument('--eliminar', type=int, nargs='+', default=[250, 1000])
+    parser.add_argument('--sin-anterior', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'base.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            crear_base_sintetica(base, args.pacientes, args.consultas).close()
+
+        print(f"{'pacientes':>9} {'modo':>10} {'total':>10} {'lock máx':>10}")
+        for cantidad in args.eliminar:
+            ids = random.Random(42).sample(range(1, args.pacientes + 1), cantidad)
+
+            if not args.sin_anterior:
+                # Antes de la migración 9 no existía el índice sobre historial_medico.consulta_id
+                ruta = os.path.join(tmp, 'anterior.db')
+                shutil.copy(base, ruta)
+                conn = conectar(ruta, hasta=8)
+                inicio = time.perf_counter()
+                eliminar_anterior(conn, ids)
+                anterior = time.perf_counter() - inicio
+                conn.close()
+                print(f"{cantidad:>9} {'anterior':>10} {anterior:>9.2f}s {anterior:>9.2f}s")
+
+            ruta = os.path.join(tmp, 'lotes.db')
+            shutil.copy(base, ruta)
+            conn = conectar(ruta)
+            lotes = []
+            ultimo = [time.perf_counter()]
+
+            def medir_lote(procesados, eliminados):
+                ahora = time.perf_counter()
+                lotes.append(ahora - ultimo[0])
+                ultimo[0] = ahora
+
+            inicio = ultimo[0] = time.perf_counter()
+            eliminar_pacientes(conn, ids, despues_de_lote=medir_lote)
+            total = time.perf_counter() - inicio
+            restantes = conn.execute('SELECT COUNT(*) FROM consultas WHERE paciente_id IN (%s)'
+                                     % ', '.join(map(str, ids))).fetchone()[0]
+            assert restantes == 0, restantes
+            conn.close()
+            print(f"{cantidad:>9} {'lotes':>10} {total:>9.2f}s {max(lotes):>9.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_respaldo.py
+"""Respaldo en caliente: duración, tamaño y latencia de las escrituras concurrentes.
+
+Un hilo inserta consultas sin parar (como el pool: WAL, busy_timeout) mientras
+se respalda la base. Compara la copia por pasos con pausa con la copia en un
+solo paso que crear_respaldo usa en modo WAL, y reporta la latencia de las
+escrituras, las veces que la copia se reinició y la compresión lograda.
+
+Uso: python -m benchmarks.bench_respaldo [--pacientes 20000] [--consultas 200000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from migraciones import aplicar_migraciones
+from respaldos import crear_respaldo, verificar_respaldo
+from benchmarks.generador import crear_base_sintetica
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+class Escritor(threading.Thread):
+    """Inserta una consulta cada 'intervalo' segundos y registra la latencia de cada commit"""
+
+    def __init__(self, ruta, intervalo=0.002):
+        super().__init__(daemon=True)
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.latencias = []
+        self.detener = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.ruta, timeout=30)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        while not self.detener.is_set():
+            inicio = time.perf_counter()
+            conn.execute('''
+                INSERT INTO consultas (paciente_id, doctor_id, fecha_consulta, motivo, estado)
+                VALUES (1, 1, datetime('now'), 'Control', 'pendiente')
+            ''')
+            conn.commit()
+            self.latencias.append((time.perf_counter() - inicio) * 1000)
+            time.sleep(self.intervalo)
+        conn.close()
+
+def medir(ruta, respaldar):
+    """Ejecuta respaldar() con el escritor activo; retorna (resultado, segundos, latencias)"""
+    escritor = Escritor(ruta)
+    escritor.start()
+    time.sleep(0.2)
+    inicio = time.perf_counter()
+    resultado = respaldar()
+    segundos = time.perf_counter() - inicio
+    escritor.detener.set()
+    escritor.join()
+    return resultado, segundos, escritor.latencias
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pacientes', type=int, default=20000)
+    parser.add_argument('--consultas', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'bench.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            conn = crear_base_sintetica(ruta, args.pacientes, args.consultas)
+            aplicar_migraciones(conn)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.close()
+        directorio = os.path.join(tmp, 'respaldos')
+        print(f"Base: {os.path.getsize(ruta) / 1024 / 1024:.1f} MB\n")
+
+        _, _, base = medir(ruta, lambda: time.sleep(2))
+
+        print(f"{'modo':>22} {'duración':>9} {'escrituras':>10} {'p50':>8} {'p99':>8} {'máx':>8} {'reinicios':>9}")
+        filas = [('sin respaldo', None, 2.0, base)]
+        for nombre, paginas in [('por pasos (256 pág.)', 256), ('un paso (WAL)', None)]:
+            respaldo, segundos, latencias = medir(
+                ruta, lambda: crear_respaldo(ruta, directorio, paginas_por_paso=paginas))
+            filas.append((nombre, respaldo['reinicios'], segundos, latencias))
+        for nombre, reinicios, segundos, latencias in filas:
+            print(f"{nombre:>22} {segundos:>8.2f}s {len(latencias):>10} {statistics.median(latencias):>6.2f}ms "
+                  f"{percentil(latencias, 0.99):>6.2f}ms {max(latencias):>6.2f}ms "
+                  f"{'' if reinicios is None else reinicios:>9}")
+
+        print(f"\nRespaldo: {respaldo['tamano_original'] / 1024 / 1024:.1f} MB -> "
+              f"{respaldo['tamano_bytes'] / 1024 / 1024:.1f} MB comprimido")
+        inicio = time.perf_counter()
+        verificacion = verificar_respaldo(respaldo['archivo'])
+        print(f"Verificación (checksum + restauración + integrity_check): "
+              f"{time.perf_counter() - inicio:.2f}s, {verificacion['filas']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# benchmarks/generador.py
+import math
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from database import crear_tablas
+from contrasenas import hash_password
+
+ESPECIES = ['Perro', 'Gato', 'Conejo', 'Ave', 'Hámster']
+PESOS_ESPECIES = [50, 35, 7, 5, 3]
+# Peso típico (kg) por especie: media y desviación
+PESO_POR_ESPECIE = {'Perro': (18, 9), 'Gato': (4.5, 1.2), 'Conejo': (2, 0.6),
+                    'Ave': (0.3, 0.15), 'Hámster': (0.12, 0.04)}
+ESTADOS = ['pendiente', 'completada', 'cancelada']
+RAZAS = ['Labrador', 'Siamés', 'Persa', 'Bulldog Francés', 'Golden Retriever', 'Mestizo', 'Beagle']
+NOMBRES = ['Max', 'Luna', 'Rocky', 'Mimi', 'Toby', 'Nala', 'Simba', 'Coco', 'Bella', 'Thor']
+APELLIDOS = ['García', 'Martínez', 'Sánchez', 'Díaz', 'Ramírez', 'López', 'Gómez', 'Pérez']
+MOTIVOS = ['Vacunación anual', 'Control rutinario', 'Pérdida de apetito', 'Dolor articular',
+           'Problemas respiratorios', 'Revisión post-operatoria', 'Alergia en la piel']
+DIAGNOSTICOS = ['Saludable', 'Gingivitis leve', 'Artritis por edad', 'Dermatitis alérgica',
+                'Otitis externa', 'Parásitos intestinales', 'Obesidad moderada']
+TRATAMIENTOS = ['Antibióticos por 7 días', 'Fisioterapia', 'Cambio de dieta',
+                'Desparasitación', 'Limpieza dental', 'Antihistamínico']
+TIPOS_HISTORIAL = ['consulta', 'vacuna', 'cirugia', 'analisis', 'otro']
+PESOS_TIPOS_HISTORIAL = [70, 15, 3, 10, 2]
+
+# Credenciales de los usuarios sintéticos (para el harness)
+PASSWORD_ADMIN = 'Admin123!'
+PASSWORD_DOCTOR = 'Doctor123!'
+
+def crear_base_sintetica(ruta, pacientes=1000, consultas=10000, historial=None,
+                         doctores=10, semilla=42, admins=1):
+    """Crea una base de datos con datos sintéticos deterministas (sin migraciones).
+
+    Los doctores tienen ids 1..doctores (doctor{i}@vetclinic.com) y los admins
+    van después (admin@vetclinic.com, admin2@...). Las distribuciones imitan
+    una clínica real: pocos doctores atienden la mayoría de las consultas, los
+    pacientes antiguos acumulan más visitas, casi no hay atención en fin de
+    semana y las consultas pendientes son las recientes.
+    """
+    rng = random.Random(semilla)
+    historial = consultas if historial is None else historial
+
+    conn = sqlite3.connect(ruta)
+    cursor = conn.cursor()
+    crear_tablas(cursor)
+
+    # Un solo hash por rol: calcular PBKDF2 por usuario no aporta nada al benchmark
+    hash_doctor = hash_password(PASSWORD_DOCTOR)
+    hash_admin = hash_password(PASSWORD_ADMIN)
+    cursor.executemany(
+        '''INSERT INTO usuarios (username, password, nombre, email, rol)
+        VALUES (?, ?, ?, ?, ?)''',
+        [(f'doctor{i}', hash_doctor, f'Doctor {i}', f'doctor{i}@vetclinic.com', 'doctor')
+         for i in range(1, doctores + 1)]
+        + [(f'admin{i}' if i > 1 else 'admin', hash_admin, f'Admin {i}',
+            f'admin{i}@vetclinic.com' if i > 1 else 'admin@vetclinic.com', 'admin')
+           for i in range(1, admins + 1)]
+    )
+
+    inicio = datetime(2020, 1, 1)
+    ahora = datetime.now()
+    dias = (ahora - inicio).days
+
+    def fecha_desde(desde_dia):
+        # Días hábiles; 1 de cada 10 fechas de fin de semana se conserva (urgencias)
+        while True:
+            fecha = inicio + timedelta(days=rng.randrange(desde_dia, dias))
+            if fecha.weekday() < 5 or rng.random() < 0.1:
+                break
+        fecha += timedelta(minutes=rng.randrange(8 * 60, 18 * 60))
+        return fecha.strftime('%Y-%m-%d %H:%M:%S')
+
+    # Registro de cada paciente: se guarda para que sus consultas sean posteriores
+    registro = [0] * (pacientes + 1)
+
+    def paciente(i):
+        especie = rng.choices(ESPECIES, PESOS_ESPECIES)[0]
+        media, desviacion = PESO_POR_ESPECIE[especie]
+        registro[i] = int(dias * (i - 1) / max(pacientes, 1))
+        return (f'{rng.choice(NOMBRES)} {i}', especie, rng.choice(RAZAS),
+                min(int(rng.expovariate(1 / 5)), 20), round(max(rng.gauss(media, desviacion), 0.05), 2),
+                rng.choice('MF'), f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}', f'555-{i:06d}',
+                f'dueno{i}@email.com', rng.choice(DIAGNOSTICOS),
+                (inicio + timedelta(days=registro[i])).strftime('%Y-%m-%d %H:%M:%S'))
+
+    cursor.executemany(
+        '''INSERT INTO pacientes (nombre, especie, raza, edad, peso, sexo, nombre_dueno,
+                                telefono_dueno, email_dueno, notas, fecha_registro)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        (paciente(i) for i in range(1, pacientes + 1))
+    )
+
+    # Carga por doctor con forma de Zipf: el doctor 1 atiende más que el doctor 10
+    pesos_doctores = [1 / math.pow(i, 0.8) for i in range(1, doctores + 1)]
+    ids_doctores = list(range(1, doctores + 1))
+
+    def elegir_paciente():
+        # Sesgo hacia ids bajos: los pacientes más antiguos tienen más visitas
+        return int(pacientes * rng.random() ** 1.6) + 1
+
+    def estado(fecha):
+        if fecha >= (ahora - timedelta(days=30)).strftime('%Y-%m-%d'):
+            return rng.choices(ESTADOS, [70, 25, 5])[0]
+        return rng.choices(ESTADOS, [2, 90, 8])[0]
+
+    def consulta():
+        paciente_id = elegir_paciente()
+        fecha = fecha_desde(registro[paciente_id])
+        return (paciente_id, rng.choices(ids_doctores, pesos_doctores)[0], fecha,
+                rng.choice(MOTIVOS), rng.choice(DIAGNOSTICOS), rng.choice(TRATAMIENTOS),
+                estado(fecha), round(rng.lognormvariate(6, 0.6), 2))
+
+    if pacientes:
+        cursor.executemany(
+            '''INSERT INTO consultas (paciente_id, doctor_id, fecha_consulta, motivo,
+                                    diagnostico, tratamiento, estado, costo)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            (consulta() for _ in range(consultas))
+        )
+
+    def entrada_historial():
+        # La mayoría de las entradas corresponde a una consulta existente
+        if consultas and rng.random() < 0.8:
+            consulta_id = rng.randint(1, consultas)
+            paciente_id, doctor_id, fecha = conn.execute(
+                'SELECT paciente_id, doctor_id, fecha_consulta FROM consultas WHERE id = ?',
+                (consulta_id,)).fetchone()
+            return (paciente_id, consulta_id, fecha, 'consulta',
+                    f'{rng.choice(MOTIVOS)}: {rng.choice(DIAGNOSTICOS)}', doctor_id)
+        paciente_id = elegir_paciente()
+        tipo = rng.choices(TIPOS_HISTORIAL, PESOS_TIPOS_HISTORIAL)[0]
+        return (paciente_id, None, fecha_desde(registro[paciente_id]), tipo,
+                f'{tipo.capitalize()}: {rng.choice(TRATAMIENTOS)}',
+                rng.choices(ids_doctores, pesos_doctores)[0])
+
+    if pacientes:
+        cursor.executemany(
+            '''INSERT INTO historial_medico (paciente_id, consulta_id, fecha, tipo, descripcion, doctor_id)
+            VALUES (?, ?, ?, ?, ?, ?)''',
+            [entrada_historial() for _ in range(historial)]
+        )
+
+    conn.commit()
+    return conn
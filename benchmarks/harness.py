@@ -0,0 +1,286 @@
+# benchmarks/harness.py
+"""Recorre todas las rutas de calc_app con el test client de Flask sobre datos sintéticos.
+
+Por ruta registra latencia p50/p95/p99, consultas SQL por petición (las que
+metricas atribuye a cada petición, incluido el streaming), bytes transferidos y RSS pico, y guarda todo en JSON para
+comparar entre commits. Los clientes aceptan gzip/br como un navegador; con
+--condicional además reenvían el último ETag de cada URL (If-None-Match).
+
+Uso:
+    python -m benchmarks.harness [--pacientes 20000] [--consultas 200000] [--salida r.json]
+    python -m benchmarks.harness --comparar base.json nuevo.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.generador import (crear_base_sintetica, PASSWORD_ADMIN, PASSWORD_DOCTOR,
+                                  NOMBRES, MOTIVOS, DIAGNOSTICOS)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else 0.0
+
+def rss_pico_kb():
+    # En Linux ru_maxrss está en KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ==================== ESCENARIOS ====================
+
+def escenarios(args, rng):
+    """Lista de (nombre, cliente, método, url(i), cuerpo(i)) que cubre cada ruta de la aplicación"""
+    def paciente(_):
+        return rng.randint(1, args.pacientes)
+
+    hace_un_mes = (date.today() - timedelta(days=30)).isoformat()
+    csv_importacion = ('nombre,especie,nombre_dueno,telefono_dueno\n'
+                       + ''.join(f'Importado {i},Perro,Dueño {i},555-{i:04d}\n' for i in range(20)))
+    manana = date.today() + timedelta(days=1)
+
+    def turno_aleatorio():
+        # Turnos de 30 minutos en días hábiles del próximo mes: algunos chocan (409)
+        dia = manana + timedelta(days=rng.randrange(30))
+        while dia.weekday() >= 5:
+            dia += timedelta(days=1)
+        return f'{dia} {9 + rng.randrange(8):02d}:{rng.choice((0, 30)):02d}'
+
+    # Se eliminan pacientes desde el final para no interferir con los ids que usan las lecturas
+    por_eliminar = iter(range(args.pacientes, 0, -1))
+    # Los archivados se restauran después, así las lecturas vuelven a encontrarlos
+    por_archivar = iter(range(args.pacientes // 2, 0, -1))
+    archivados = []
+
+    def archivar(_):
+        archivados.append(next(por_archivar))
+        return archivados[-1]
+
+    def restaurar(_):
+        return archivados.pop() if archivados else 0
+
+    return [
+        ('index', 'anonimo', 'GET', lambda i: '/', None),
+        ('login', 'anonimo', 'GET', lambda i: '/login', None),
+        ('login_post', 'anonimo', 'POST', lambda i: '/login',
+         lambda i: {'json': {'email': 'doctor1@vetclinic.com', 'password': PASSWORD_DOCTOR}}),
+        ('logout', 'anonimo', 'GET', lambda i: '/logout', None),
+        ('admin_dashboard', 'admin', 'GET', lambda i: '/admin/dashboard', None),
+        ('admin_stats', 'admin', 'GET', lambda i: '/admin/stats', None),
+        ('admin_db_pool', 'admin', 'GET', lambda i: '/admin/db-pool', None),
+        ('admin_cache', 'admin', 'GET', lambda i: '/admin/cache', None),
+        ('admin_login_limits', 'admin', 'GET', lambda i: '/admin/login-limits', None),
+        ('admin_metrics', 'admin', 'GET', lambda i: '/admin/metrics', None),
+        ('admin_slow_queries', 'admin', 'GET', lambda i: '/admin/slow-queries', None),
+        ('admin_backups', 'admin', 'GET', lambda i: '/admin/backups', None),
+        ('doctor_dashboard', 'doctor', 'GET', lambda i: '/doctor/dashboard', None),
+        ('doctor_stats', 'doctor', 'GET', lambda i: '/doctor/stats', None),
+        ('register_patient', 'doctor', 'GET', lambda i: '/register-patient', None),
+        ('register_patient', 'doctor', 'POST', lambda i: '/register-patient',
+         lambda i: {'json': {'ownerName': f'Dueño {i}', 'patientName': f'Nuevo {i}',
+                             'species': 'Gato', 'breed': 'Mestizo', 'age': 2}}),
+        ('register_consultation', 'doctor', 'GET', lambda i: '/register-consultation', None),
+        ('register_consultation', 'doctor', 'POST', lambda i: '/register-consultation',
+         lambda i: {'json': {'patientId': paciente(i), 'date': date.today().isoformat(),
+                             'diagnosis': rng.choice(DIAGNOSTICOS), 'details': rng.choice(MOTIVOS)}}),
+        ('historial_pacientes', 'doctor', 'GET', lambda i: f'/historial-pacientes?paciente_id={paciente(i)}', None),
+        ('system_maintenance', 'admin', 'GET', lambda i: '/system-maintenance', None),
+        ('get_pacientes', 'admin', 'GET', lambda i: f'/api/pacientes?q={rng.choice(NOMBRES)[:3]}', None),
+        ('api_search', 'admin', 'GET', lambda i: f'/api/search?q={rng.choice(DIAGNOSTICOS).split()[0]}', None),
+        ('get_session', 'admin', 'GET', lambda i: '/api/session', None),
+        ('export_data', 'admin', 'GET', lambda i: f'/api/export/consultas?desde={hace_un_mes}', None),
+        ('import_data', 'admin', 'POST', lambda i: '/api/import/pacientes?format=csv',
+         lambda i: {'data': csv_importacion.encode('utf-8')}),
+        ('archive_patients', 'admin', 'POST', lambda i: '/api/archive-patients',
+         lambda i: {'json': {'patient_ids': [archivar(i)]}}),
+        ('restore_patients', 'admin', 'POST', lambda i: '/api/restore-patients',
+         lambda i: {'json': {'patient_ids': [restaurar(i)]}}),
+        ('delete_patients', 'admin', 'POST', lambda i: '/api/delete-patients',
+         lambda i: {'json': {'patient_ids': [next(por_eliminar)]}}),
+        ('create_job', 'admin', 'POST', lambda i: '/api/jobs',
+         lambda i: {'json': {'tipo': 'reconstruir_contadores'}}),
+        ('get_job', 'admin', 'GET', lambda i: '/api/jobs/1', None),
+        ('get_patient', 'admin', 'GET', lambda i: f'/api/patient/{paciente(i)}', None),
+        ('get_patient_timeline', 'admin', 'GET', lambda i: f'/api/patient/{paciente(i)}/timeline', None),
+        ('get_patient_history', 'admin', 'GET', lambda i: f'/api/patient-history/{paciente(i)}', None),
+        ('get_patient_history', 'admin', 'POST', lambda i: f'/api/patient-history/{paciente(i)}', None),
+        ('static', 'anonimo', 'GET', lambda i: '/static/css/historial-pacientes.css', None),
+        ('agenda_free_slots', 'doctor', 'GET', lambda i: f'/api/agenda/free-slots?fecha={manana}&dias=7', None),
+        ('agenda_book', 'doctor', 'POST', lambda i: '/api/agenda/book',
+         lambda i: {'json': {'paciente_id': paciente(i), 'inicio': turno_aleatorio()}}),
+        ('agenda_working_hours', 'doctor', 'GET', lambda i: '/api/agenda/working-hours', None),
+        ('agenda_working_hours', 'doctor', 'POST', lambda i: '/api/agenda/working-hours',
+         lambda i: {'json': {'bloques': [{'dia_semana': dia, 'hora_inicio': '09:00', 'hora_fin': '17:00'}
+                                         for dia in range(5)]}}),
+    ]
+
+def rutas_sin_escenario(app, lista):
+    """Rutas (endpoint, método) registradas en la aplicación que ningún escenario cubre"""
+    cubiertas = {(nombre, metodo) for nombre, _, metodo, _, _ in lista}
+    faltantes = []
+    for regla in app.url_map.iter_rules():
+        for metodo in sorted(regla.methods - {'HEAD', 'OPTIONS'}):
+            if (regla.endpoint, metodo) not in cubiertas:
+                faltantes.append(f'{metodo} {regla.rule}')
+    return faltantes
+
+# ==================== EJECUCIÓN ====================
+
+def ejecutar(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        # La aplicación usa 'clinic.db' relativo al directorio actual
+        os.chdir(tmp)
+        inicio = time.perf_counter()
+        crear_base_sintetica('clinic.db', args.pacientes, args.consultas, args.historial,
+                             args.doctores, args.semilla).close()
+        import calc_app
+        import seguridad
+        from metricas import registro_metricas
+        segundos_datos = time.perf_counter() - inicio
+
+        # El harness hace muchos logins desde 127.0.0.1: sin límite de intentos
+        calc_app.limitador_ip = calc_app.limitador_email = seguridad.LimitadorTasa(
+            capacidad=10 ** 9, por_segundo=10 ** 9)
+
+        app = calc_app.app
+        clientes = {'anonimo': app.test_client(), 'admin': app.test_client(), 'doctor': app.test_client()}
+        for cliente in clientes.values():
+            if not args.sin_compresion:
+                cliente.environ_base['HTTP_ACCEPT_ENCODING'] = 'gzip, deflate, br'
+        etags = {nombre: {} for nombre in clientes}   # cliente -> url -> último ETag
+        clientes['admin'].post('/login', json={'email': 'admin@vetclinic.com', 'password': PASSWORD_ADMIN})
+        clientes['doctor'].post('/login', json={'email': 'doctor1@vetclinic.com', 'password': PASSWORD_DOCTOR})
+
+        rng = random.Random(args.semilla)
+        lista = escenarios(args, rng)
+        faltantes = rutas_sin_escenario(app, lista)
+        if faltantes:
+            print(f"⚠️  Rutas sin escenario: {', '.join(faltantes)}")
+
+        resultados = {}
+        print(f"{'ruta':>34} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL/pet':>8} {'KB/pet':>8} {'RSS MB':>7}")
+        for nombre, cliente, metodo, url, cuerpo in lista:
+            latencias, consultas, estados, transferidos = [], [], {}, []
+            # Los print() y tracebacks de la aplicación van al JSON en vez de a la consola
+            salida_app = io.StringIO()
+            with contextlib.redirect_stdout(salida_app), contextlib.redirect_stderr(salida_app):
+                for i in range(args.calentamiento + args.repeticiones):
+                    opciones = cuerpo(i) if cuerpo else {}
+                    ruta = url(i)
+                    if args.condicional and ruta in etags[cliente]:
+                        opciones['headers'] = {'If-None-Match': etags[cliente][ruta]}
+                    consultas_antes = registro_metricas.consultas_en_peticiones()
+                    t0 = time.perf_counter()
+                    respuesta = clientes[cliente].open(ruta, method=metodo, **opciones)
+                    datos = respuesta.get_data()
+                    # close() registra las respuestas en streaming (exportaciones)
+                    respuesta.close()
+                    ms = (time.perf_counter() - t0) * 1000
+                    if respuesta.headers.get('ETag'):
+                        etags[cliente][ruta] = respuesta.headers['ETag']
+                    if i < args.calentamiento:
+                        continue
+                    latencias.append(ms)
+                    consultas.append(registro_metricas.consultas_en_peticiones() - consultas_antes)
+                    estados[respuesta.status_code] = estados.get(respuesta.status_code, 0) + 1
+                    transferidos.append(len(datos))
+
+            clave = f'{metodo} {nombre}'
+            resultados[clave] = {
+                'peticiones': len(latencias),
+                'estados': {str(k): v for k, v in sorted(estados.items())},
+                'p50_ms': round(statistics.median(latencias), 3),
+                'p95_ms': round(percentil(latencias, 0.95), 3),
+                'p99_ms': round(percentil(latencias, 0.99), 3),
+                'media_ms': round(statistics.fmean(latencias), 3),
+                'consultas_por_peticion': round(statistics.fmean(consultas), 2),
+                'bytes_por_peticion': round(statistics.fmean(transferidos)),
+                'rss_pico_kb': rss_pico_kb(),
+                'mensajes_error': salida_app.getvalue().splitlines()[:5],
+            }
+            r = resultados[clave]
+            print(f"{clave:>34} {r['p50_ms']:>6.1f}ms {r['p95_ms']:>6.1f}ms {r['p99_ms']:>6.1f}ms "
+                  f"{r['consultas_por_peticion']:>8.1f} {r['bytes_por_peticion'] / 1024:>8.1f} "
+                  f"{r['rss_pico_kb'] / 1024:>7.1f}")
+
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'parametros': {'pacientes': args.pacientes, 'consultas': args.consultas,
+                       'historial': args.historial, 'doctores': args.doctores,
+                       'semilla': args.semilla, 'repeticiones': args.repeticiones,
+                       'calentamiento': args.calentamiento, 'compresion': not args.sin_compresion,
+                       'condicional': args.condicional},
+        'segundos_generacion': round(segundos_datos, 2),
+        'rss_pico_kb': rss_pico_kb(),
+        'sin_escenario': faltantes,
+        'rutas': resultados,
+    }
+
+def comparar(ruta_base, ruta_nueva):
+    """Muestra la variación de p50/p95, consultas y bytes por ruta entre dos ejecuciones"""
+    with open(ruta_base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(ruta_nueva, encoding='utf-8') as f:
+        nueva = json.load(f)
+    print(f"base: {base['commit']} ({base['fecha']})  nueva: {nueva['commit']} ({nueva['fecha']})")
+    print(f"{'ruta':>34} {'p50 base':>9} {'p50':>9} {'Δ%':>7} {'p95 base':>9} {'p95':>9} {'Δ%':>7} {'SQL':>9} {'KB':>13}")
+    for clave, r in nueva['rutas'].items():
+        b = base['rutas'].get(clave)
+        if b is None:
+            print(f"{clave:>34}  (ruta nueva)")
+            continue
+        delta50 = (r['p50_ms'] / b['p50_ms'] - 1) * 100 if b['p50_ms'] else 0.0
+        delta95 = (r['p95_ms'] / b['p95_ms'] - 1) * 100 if b['p95_ms'] else 0.0
+        print(f"{clave:>34} {b['p50_ms']:>7.1f}ms {r['p50_ms']:>7.1f}ms {delta50:>+6.0f}% "
+              f"{b['p95_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {delta95:>+6.0f}% "
+              f"{b['consultas_por_peticion']:>4.0f}→{r['consultas_por_peticion']:<4.0f} "
+              f"{b.get('bytes_por_peticion', 0) / 1024:>6.1f}→{r.get('bytes_por_peticion', 0) / 1024:<6.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pacientes', type=int, default=20000)
+    parser.add_argument('--consultas', type=int, default=200000)
+    parser.add_argument('--historial', type=int, help='por defecto, igual a --consultas')
+    parser.add_argument('--doctores', type=int, default=10)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--calentamiento', type=int, default=3)
+    parser.add_argument('--sin-compresion', action='store_true', help='no enviar Accept-Encoding')
+    parser.add_argument('--condicional', action='store_true', help='reenviar el ETag de cada URL')
+    parser.add_argument('--salida', default='resultados_benchmark.json')
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NUEVA'))
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    salida = os.path.abspath(args.salida)
+    resultado = ejecutar(args)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados guardados en {salida} (RSS pico {resultado['rss_pico_kb'] / 1024:.1f} MB)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# busqueda.py
+import html
+import re
+
+# Pesos BM25 por columna (mismo orden que en la tabla FTS)
+PESOS_PACIENTES = '10.0, 2.0, 5.0, 5.0, 1.0'
+PESOS_CONSULTAS = '3.0, 5.0, 2.0, 2.0'
+PESOS_HISTORIAL = '1.0'
+
+def construir_consulta_fts(texto):
+    """Convierte el texto del usuario en una consulta FTS5 segura.
+
+    Cada palabra se busca como frase entre comillas (así '555-1234' o 'c/12h'
+    no se interpretan como operadores) y con prefijo, y todas deben aparecer.
+    """
+    palabras = re.findall(r'\S+', texto or '')
+    terminos = []
+    for palabra in palabras:
+        palabra = palabra.replace('"', '')
+        if palabra.strip('*'):
+            terminos.append(f'"{palabra.strip("*")}"*')
+    return ' AND '.join(terminos)
+
+# Cada fuente: (tipo, SQL). snippet() marca con caracteres de control que
+# no pueden venir del texto escapado; el resaltado HTML se agrega después
+FUENTES = [
+    ('paciente', f'''
+        SELECT pacientes_fts.rowid AS id, pacientes_fts.rowid AS paciente_id,
+               p.nombre AS paciente_nombre,
+               snippet(pacientes_fts, -1, char(2), char(3), '…', 12) AS fragmento,
+               bm25(pacientes_fts, {PESOS_PACIENTES}) AS puntaje
+        FROM pacientes_fts
+        JOIN pacientes p ON p.id = pacientes_fts.rowid
+        WHERE pacientes_fts MATCH ?
+        ORDER BY puntaje
+        LIMIT ?
+    '''),
+    ('consulta', f'''
+        SELECT consultas_fts.rowid AS id, c.paciente_id, p.nombre AS paciente_nombre,
+               snippet(consultas_fts, -1, char(2), char(3), '…', 12) AS fragmento,
+               bm25(consultas_fts, {PESOS_CONSULTAS}) AS puntaje
+        FROM consultas_fts
+        JOIN consultas c ON c.id = consultas_fts.rowid
+        JOIN pacientes p ON p.id = c.paciente_id
+        WHERE consultas_fts MATCH ?
+        ORDER BY puntaje
+        LIMIT ?
+    '''),
+    ('historial', f'''
+        SELECT historial_fts.rowid AS id, h.paciente_id, p.nombre AS paciente_nombre,
+               snippet(historial_fts, -1, char(2), char(3), '…', 12) AS fragmento,
+               bm25(historial_fts, {PESOS_HISTORIAL}) AS puntaje
+        FROM historial_fts
+        JOIN historial_medico h ON h.id = historial_fts.rowid
+        JOIN pacientes p ON p.id = h.paciente_id
+        WHERE historial_fts MATCH ?
+        ORDER BY puntaje
+        LIMIT ?
+    '''),
+]
+
+def resaltar(fragmento):
+    """Escapa el texto guardado y convierte las marcas de snippet() en <mark>"""
+    if fragmento is None:
+        return None
+    return html.escape(fragmento).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+def buscar(conn, texto, limite=20):
+    """Busca en pacientes, consultas e historial, ordenado por relevancia.
+
+    Los puntajes BM25 de tablas FTS distintas no están en la misma escala:
+    cada fuente se ordena por separado y su puntaje se normaliza respecto
+    de su mejor resultado (relevancia 1.0) antes de mezclarlas.
+    """
+    consulta = construir_consulta_fts(texto)
+    if not consulta:
+        return []
+
+    cursor = conn.cursor()
+    resultados = []
+    for orden, (tipo, sql) in enumerate(FUENTES):
+        cursor.execute(sql, (consulta, limite))
+        filas = [dict(r) for r in cursor.fetchall()]
+        if not filas:
+            continue
+        # BM25 de SQLite: más negativo es más relevante
+        mejor = filas[0]['puntaje']
+        for fila in filas:
+            fila['tipo'] = tipo
+            fila['fragmento'] = resaltar(fila['fragmento'])
+            fila['relevancia'] = round(fila['puntaje'] / mejor, 4) if mejor < 0 else 1.0
+            resultados.append((-fila['relevancia'], orden, fila))
+
+    resultados.sort(key=lambda r: r[:2])
+    return [fila for _, _, fila in resultados[:limite]]
@@ -0,0 +1,141 @@
+# cache.py
+import threading
+import time
+from collections import OrderedDict
+
+class CacheLRU:
+    """Cache en memoria con expiración (TTL), desalojo LRU e invalidación por etiquetas.
+
+    Cada etiqueta (y cada prefijo invalidado) lleva un contador de
+    invalidaciones, igual que sesiones.CacheUsuarios: obtener_o_calcular toma
+    los contadores antes de calcular y no guarda el valor si una invalidación
+    se cruzó con el cálculo, así nunca queda en cache un dato anterior al cambio.
+    """
+
+    def __init__(self, max_entradas=1024, ttl=60.0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()   # clave -> (expira, valor, etiquetas)
+        self._etiquetas = {}          # etiqueta -> set(claves)
+        self._versiones = {}          # etiqueta -> contador de invalidaciones
+        self._versiones_prefijo = {}  # prefijo -> contador de invalidar_prefijo
+        self._generacion = 0          # sube con limpiar()
+        self._lock = threading.Lock()
+        self._aciertos = 0
+        self._fallos = 0
+        self._desalojos = 0
+        self._expiraciones = 0
+        self._invalidaciones = 0
+
+    def _quitar(self, clave):
+        _, _, etiquetas = self._datos.pop(clave)
+        for etiqueta in etiquetas:
+            claves = self._etiquetas.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._etiquetas[etiqueta]
+
+    def obtener(self, clave, defecto=None):
+        """Retorna el valor guardado o 'defecto' si no existe o expiró"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self._fallos += 1
+                return defecto
+            if entrada[0] < time.monotonic():
+                self._quitar(clave)
+                self._expiraciones += 1
+                self._fallos += 1
+                return defecto
+            self._datos.move_to_end(clave)
+            self._aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor, etiquetas=(), ttl=None):
+        """Guarda un valor asociado a etiquetas de invalidación"""
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        etiquetas = frozenset(etiquetas)
+        with self._lock:
+            if clave in self._datos:
+                self._quitar(clave)
+            self._datos[clave] = (expira, valor, etiquetas)
+            for etiqueta in etiquetas:
+                self._etiquetas.setdefault(etiqueta, set()).add(clave)
+            while len(self._datos) > self.max_entradas:
+                self._quitar(next(iter(self._datos)))
+                self._desalojos += 1
+
+    def _version(self, etiquetas):
+        # Para 'consultas:doctor:2' cuentan también los prefijos 'consultas' y 'consultas:doctor'
+        partes = [self._generacion]
+        for etiqueta in sorted(etiquetas):
+            partes.append(self._versiones.get(etiqueta, 0))
+            segmentos = etiqueta.split(':')
+            for i in range(1, len(segmentos) + 1):
+                partes.append(self._versiones_prefijo.get(':'.join(segmentos[:i]), 0))
+        return partes
+
+    def obtener_o_calcular(self, clave, calcular, etiquetas=(), ttl=None):
+        """Retorna el valor en cache o lo calcula con 'calcular()' y lo guarda.
+
+        Si las etiquetas se invalidan mientras se calcula, el valor se
+        retorna pero no se guarda.
+        """
+        faltante = object()
+        valor = self.obtener(clave, faltante)
+        if valor is faltante:
+            with self._lock:
+                version = self._version(etiquetas)
+            valor = calcular()
+            with self._lock:
+                vigente = version == self._version(etiquetas)
+            if vigente:
+                self.guardar(clave, valor, etiquetas, ttl)
+        return valor
+
+    def invalidar(self, *etiquetas):
+        """Elimina todas las entradas asociadas a las etiquetas indicadas"""
+        with self._lock:
+            total = 0
+            for etiqueta in etiquetas:
+                self._versiones[etiqueta] = self._versiones.get(etiqueta, 0) + 1
+                for clave in list(self._etiquetas.get(etiqueta, ())):
+                    self._quitar(clave)
+                    total += 1
+            self._invalidaciones += total
+            return total
+
+    def invalidar_prefijo(self, prefijo):
+        """Invalida la etiqueta 'prefijo' y las que empiezan con 'prefijo:' (p. ej. consultas:doctor:N)"""
+        with self._lock:
+            self._versiones_prefijo[prefijo] = self._versiones_prefijo.get(prefijo, 0) + 1
+            etiquetas = [e for e in self._etiquetas if e == prefijo or e.startswith(f'{prefijo}:')]
+        return self.invalidar(*etiquetas)
+
+    def limpiar(self):
+        """Vacía el cache completo"""
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
+            self._etiquetas.clear()
+
+    def estadisticas(self):
+        """Retorna contadores de uso del cache"""
+        with self._lock:
+            consultas = self._aciertos + self._fallos
+            return {
+                'entradas': len(self._datos),
+                'max_entradas': self.max_entradas,
+                'ttl_segundos': self.ttl,
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'tasa_aciertos': round(self._aciertos / consultas, 4) if consultas else 0.0,
+                'desalojos': self._desalojos,
+                'expiraciones': self._expiraciones,
+                'invalidaciones': self._invalidaciones,
+            }
+
+
+# Cache compartido para los endpoints de solo lectura
+cache_lectura = CacheLRU()
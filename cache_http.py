@@ -0,0 +1,180 @@
+# cache_http.py
+import gzip
+import hashlib
+import os
+import threading
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+from cache import cache_lectura
+from database import get_db_connection
+from rangos_fecha import rango_mes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None   # opcional: sin el paquete brotli solo se ofrece gzip
+
+UMBRAL_COMPRESION = 1024      # bytes: por debajo, la compresión no compensa
+NIVEL_GZIP = 6
+TIPOS_COMPRIMIBLES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+MAX_AGE_INMUTABLE = 31536000  # un año, para estáticos con huella
+
+# ==================== RESPUESTAS CONDICIONALES ====================
+
+_ultimas_versiones = {}
+_lock_versiones = threading.Lock()
+
+def versiones_tablas():
+    """Retorna {tabla: versión} de pacientes, consultas, historial_medico y usuarios"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT tabla, version FROM tablas_version
+        UNION ALL
+        SELECT 'usuarios', version FROM usuarios_version WHERE id = 1
+    ''')
+    versiones = dict(cursor.fetchall())
+    conn.close()
+
+    # Un cambio hecho fuera de este proceso (importación, script) no pasa por
+    # cache_lectura.invalidar: se invalidan las etiquetas de las tablas cuya
+    # versión cambió, para que el cuerpo nunca sea más viejo que su ETag
+    with _lock_versiones:
+        if _ultimas_versiones:
+            for tabla, version in versiones.items():
+                if _ultimas_versiones.get(tabla) != version:
+                    cache_lectura.invalidar_prefijo(tabla)
+        _ultimas_versiones.clear()
+        _ultimas_versiones.update(versiones)
+    return versiones
+
+def calcular_etag(tablas):
+    """ETag de la petición actual: ruta, usuario, mes en curso y versión de cada tabla leída"""
+    versiones = versiones_tablas()
+    # Las estadísticas dependen del mes en curso: se usa el mismo rango_mes()
+    # (UTC) que ellas, no la fecha local, para que el ETag cambie con sus datos
+    partes = [request.endpoint, request.full_path, str(session.get('user_id')), rango_mes()[0]]
+    partes += [f'{tabla}={versiones.get(tabla, 0)}' for tabla in tablas]
+    return hashlib.blake2b('|'.join(partes).encode('utf-8'), digest_size=8).hexdigest()
+
+def condicional(*tablas):
+    """Decorador de GET que responde 304 sin ejecutar la vista si los datos no cambiaron.
+
+    El ETag (débil) se deriva de las versiones de las tablas indicadas, que
+    mantienen triggers en la base; no hace falta generar la respuesta para
+    saber si cambió. Ubicar después de requiere_sesion.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if request.method != 'GET':
+                return vista(*args, **kwargs)
+
+            etag = calcular_etag(tablas)
+            if request.if_none_match.contains_weak(etag):
+                respuesta = current_app.response_class(status=304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag, weak=True)
+            respuesta.headers['Cache-Control'] = 'private, no-cache'
+            return respuesta
+        return envoltura
+    return decorador
+
+# ==================== ESTÁTICOS CON HUELLA ====================
+
+_huellas = {}   # ruta -> (mtime, huella)
+
+def huella_estatico(filename):
+    """Hash corto del contenido de un archivo de static/ (None si no existe)"""
+    ruta = os.path.join(current_app.static_folder, filename)
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+    guardada = _huellas.get(ruta)
+    if guardada is None or guardada[0] != mtime:
+        with open(ruta, 'rb') as f:
+            guardada = (mtime, hashlib.blake2b(f.read(), digest_size=5).hexdigest())
+        _huellas[ruta] = guardada
+    return guardada[1]
+
+def _agregar_huella(endpoint, values):
+    # url_for('static', filename=...) genera /static/...?v=<huella>
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        huella = huella_estatico(values['filename'])
+        if huella:
+            values['v'] = huella
+
+def _cache_estaticos(respuesta):
+    # Solo la URL con la huella vigente es inmutable; sin ella se revalida
+    if (request.endpoint == 'static' and respuesta.status_code == 200
+            and request.args.get('v')
+            and request.args.get('v') == huella_estatico(request.view_args['filename'])):
+        respuesta.headers['Cache-Control'] = f'public, max-age={MAX_AGE_INMUTABLE}, immutable'
+    return respuesta
+
+# ==================== COMPRESIÓN ====================
+
+_comprimidos = {}   # (ruta, etag, codificación) -> bytes, para estáticos
+
+def _codificar(datos, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(datos)
+    return gzip.compress(datos, compresslevel=NIVEL_GZIP, mtime=0)
+
+def _comprimir(respuesta):
+    if (respuesta.status_code != 200 or 'Content-Encoding' in respuesta.headers
+            or not (respuesta.mimetype or '').startswith(TIPOS_COMPRIMIBLES)):
+        return respuesta
+    estatico = request.endpoint == 'static'
+    if respuesta.is_streamed and not estatico:
+        return respuesta    # exportaciones: se envían por partes y comprimen por su cuenta
+
+    aceptadas = request.accept_encodings
+    if brotli is not None and aceptadas['br']:
+        codificacion = 'br'
+    elif aceptadas['gzip']:
+        codificacion = 'gzip'
+    else:
+        return respuesta
+
+    etag, debil = respuesta.get_etag()
+    if estatico:
+        # send_file entrega el archivo sin leerlo; se comprime una vez por versión
+        clave = (request.path, etag, codificacion)
+        comprimido = _comprimidos.get(clave)
+        if comprimido is None:
+            respuesta.direct_passthrough = False
+            datos = respuesta.get_data()
+            comprimido = _comprimidos[clave] = (
+                _codificar(datos, codificacion) if len(datos) >= UMBRAL_COMPRESION else b'')
+        if not comprimido:
+            return respuesta
+        if hasattr(respuesta.response, 'close'):
+            respuesta.response.close()   # el archivo abierto por send_file ya no se lee
+    else:
+        datos = respuesta.get_data()
+        if len(datos) < UMBRAL_COMPRESION:
+            return respuesta
+        comprimido = _codificar(datos, codificacion)
+
+    respuesta.direct_passthrough = False
+    respuesta.set_data(comprimido)
+    respuesta.headers['Content-Encoding'] = codificacion
+    respuesta.vary.add('Accept-Encoding')
+    # El cuerpo cambió de bytes: un ETag fuerte pasa a débil
+    if etag and not debil:
+        respuesta.set_etag(etag, weak=True)
+    return respuesta
+
+def optimizar_respuestas(app):
+    """Registra huellas de estáticos, caché de estáticos y compresión de respuestas"""
+    app.url_defaults(_agregar_huella)
+    # after_request se ejecuta en orden inverso: la compresión va al final
+    app.after_request(_comprimir)
+    app.after_request(_cache_estaticos)
@@ -1,15 +1,53 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
-from database import get_db_connection, verify_password, init_db, obtener_usuario_por_username 
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, Response, g, stream_with_context
+from database import (get_db_connection, init_db, obtener_usuario_por_username, log_evento_seguridad,
+                      liberar_conexion_contexto, estadisticas_pool, actualizar_esquema, obtener_pool,
+                      DB_PATH)
+from estadisticas import estadisticas_admin, estadisticas_doctor, consultas_recientes_doctor
+from cache import cache_lectura
+from mantenimiento import (pacientes_inactivos as obtener_pacientes_inactivos, eliminar_pacientes,
+                           UMBRAL_PURGA_EN_SEGUNDO_PLANO)
+from contadores import reconstruir_contadores
+from tareas import cola_tareas
+from respaldos import crear_respaldo, listar_respaldos, verificar_respaldo
+from pacientes import buscar_pacientes
+from historial import linea_tiempo, version_linea_tiempo
+from archivo import archivar_pacientes, restaurar_pacientes
+from agenda import (ConflictoAgenda, leer_fecha_hora, horario_doctor, guardar_horario,
+                    turnos_libres, reservar)
+from paginacion import normalizar_limite
+from busqueda import buscar as buscar_texto
+from exportacion import EXPORTABLES, construir_consulta as construir_exportacion, exportar
+from importacion import ESQUEMAS as IMPORTABLES, leer_filas, importar
+from seguridad import limitador_ip, limitador_email, verificador_passwords, ColaLlena, VerificacionDemorada
+from sesiones import cache_usuarios, requiere_sesion, usuario_actual
+from metricas import instrumentar, registro_metricas, exportar_valores
+from cache_http import condicional, optimizar_respuestas
+import hashlib
+import io
 import os
+import sqlite3
+from datetime import date
 
 app = Flask(__name__)
 app.secret_key = 'clave_secreta_veterinaria_2024'  # Clave secreta para sesiones
 
 # Inicializar base de datos si no existe
-if not os.path.exists('clinic.db'):
+if not os.path.exists(DB_PATH):
     print("Inicializando base de datos...")
     init_db()
 
+# Aplicar migraciones pendientes del esquema
+actualizar_esquema()
+
+# Devolver la conexión de cada petición al pool
+app.teardown_appcontext(liberar_conexion_contexto)
+
+# Latencia por endpoint y conteo de sentencias SQL de cada petición
+instrumentar(app)
+
+# ETag por versión de datos, compresión y estáticos con huella
+optimizar_respuestas(app)
+
 # ==================== RUTAS DE AUTENTICACIÓN ====================
 
 @app.route('/')
@@ -33,21 +71,51 @@ def login_post():
         if not email or not password:
             return jsonify({'success': False, 'message': 'Email y contraseña son requeridos'}), 400
         
+        # Límite de intentos por IP y por email (token bucket)
+        ip = request.remote_addr
+        for limitador, clave, evento in ((limitador_ip, ip, 'limite_login_ip'),
+                                         (limitador_email, email.lower(), 'limite_login_email')):
+            permitido, reintentar, primer_rechazo = limitador.consumir(clave)
+            if not permitido:
+                # Solo se registra el primer rechazo de cada racha para no inundar la tabla
+                if primer_rechazo:
+                    log_evento_seguridad(evento, email, ip, f'Reintentar en {reintentar:.0f} s')
+                respuesta = jsonify({'success': False,
+                                     'message': 'Demasiados intentos, intenta más tarde'})
+                respuesta.headers['Retry-After'] = str(int(reintentar) + 1)
+                return respuesta, 429
+        
         # Buscar usuario por email
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT * FROM usuarios WHERE email = ? AND activo = 1', (email,))
         usuario = cursor.fetchone()
-        conn.close()
+        # Devolver la conexión al pool ya: no debe quedar retenida mientras se verifica
+        liberar_conexion_contexto()
         
         if not usuario:
             return jsonify({'success': False, 'message': 'Credenciales inválidas'}), 401
         
-        # Verificar contraseña
-        if not verify_password(password, usuario['password']):
+        # Verificar contraseña en un pool acotado; la petición espera como máximo verificador.timeout
+        try:
+            valida, nuevo_hash = verificador_passwords.verificar_con_rehash(password, usuario['password'])
+        except (ColaLlena, VerificacionDemorada):
+            respuesta = jsonify({'success': False, 'message': 'Servidor ocupado, intenta de nuevo'})
+            respuesta.headers['Retry-After'] = '1'
+            return respuesta, 503
+        if not valida:
             return jsonify({'success': False, 'message': 'Credenciales inválidas'}), 401
         
-        # Guardar sesión
+        # Actualizar el hash a los parámetros vigentes (solo si nadie lo cambió mientras tanto)
+        if nuevo_hash:
+            conn = get_db_connection()
+            conn.execute('UPDATE usuarios SET password = ? WHERE id = ? AND password = ?',
+                         (nuevo_hash, usuario['id'], usuario['password']))
+            conn.commit()
+            conn.close()
+        
+        # Guardar sesión (los datos de autorización se recargan del usuario recién validado)
+        cache_usuarios.invalidar(usuario['id'])
         session['user_id'] = usuario['id']
         session['username'] = usuario['username']
         session['nombre'] = usuario['nombre']
@@ -79,55 +147,20 @@ def logout():
 # ==================== RUTAS DEL ADMIN ====================
 
 @app.route('/admin/dashboard')
+@requiere_sesion('admin')
 def admin_dashboard():
     """Dashboard del administrador"""
-    if 'user_id' not in session or session.get('rol') != 'admin':
-        return redirect(url_for('login'))
-    
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Obtener estadísticas
-        cursor.execute('SELECT COUNT(*) as total FROM pacientes')
-        total_pacientes = cursor.fetchone()['total']
-        
-        cursor.execute('''
-            SELECT COUNT(*) as total FROM consultas 
-            WHERE strftime('%Y-%m', fecha_consulta) = strftime('%Y-%m', 'now')
-        ''')
-        consultas_mes = cursor.fetchone()['total']
-        
-        cursor.execute("SELECT COUNT(*) as total FROM usuarios WHERE rol = 'doctor' AND activo = 1")
-        doctores = cursor.fetchone()['total']
-        
-        # Rendimiento de médicos
-        cursor.execute('''
-            SELECT u.nombre, COUNT(c.id) as total_consultas
-            FROM usuarios u
-            LEFT JOIN consultas c ON u.id = c.doctor_id
-            WHERE u.rol = 'doctor' AND u.activo = 1
-            GROUP BY u.id, u.nombre
-            ORDER BY total_consultas DESC
-        ''')
-        medicos_data = cursor.fetchall()
-        
+        stats = estadisticas_admin(conn)
         conn.close()
-        
-        # Convertir a lista de diccionarios
-        medicos = []
-        for m in medicos_data:
-            medicos.append({
-                'nombre': m['nombre'],
-                'consultas': m['total_consultas'] or 0
-            })
 
         return render_template('admin-dashboard.html',
                              adminName=session['nombre'],
-                             total_pacientes=total_pacientes,
-                             consultas_mes=consultas_mes,
-                             doctores=doctores,
-                             medicos=medicos)
+                             total_pacientes=stats['pacientes'],
+                             consultas_mes=stats['consultas_mes'],
+                             doctores=stats['doctores'],
+                             medicos=stats['medicos'])
     
     except Exception as e:
         print(f"Error en admin_dashboard: {e}")
@@ -135,121 +168,109 @@ def admin_dashboard():
         return redirect(url_for('login'))
 
 @app.route('/admin/stats')
+@requiere_sesion('admin', api=True)
+@condicional('pacientes', 'consultas', 'usuarios')
 def admin_stats():
     """Obtiene estadísticas para el dashboard admin"""
-    if 'user_id' not in session or session.get('rol') != 'admin':
-        return jsonify({'error': 'No autorizado'}), 401
-    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        def calcular():
+            conn = get_db_connection()
+            stats = estadisticas_admin(conn)
+            conn.close()
+            return stats
         
-        # Total pacientes
-        cursor.execute('SELECT COUNT(*) as total FROM pacientes')
-        total_pacientes = cursor.fetchone()['total']
+        stats = cache_lectura.obtener_o_calcular(
+            'admin_stats', calcular, etiquetas=('pacientes', 'consultas', 'usuarios'))
         
-        # Consultas este mes
-        cursor.execute('''
-            SELECT COUNT(*) as total FROM consultas 
-            WHERE strftime('%Y-%m', fecha_consulta) = strftime('%Y-%m', 'now')
-        ''')
-        consultas_mes = cursor.fetchone()['total']
+        return jsonify(stats)
         
-        # Doctores activos
-        cursor.execute("SELECT COUNT(*) as total FROM usuarios WHERE rol = 'doctor' AND activo = 1")
-        doctores = cursor.fetchone()['total']
-        
-        # Rendimiento de médicos
+    except Exception as e:
+        print(f"Error obteniendo stats: {e}")
+        return jsonify({'error': 'Error del servidor'}), 500
+
+@app.route('/admin/db-pool')
+@requiere_sesion('admin', api=True)
+def admin_db_pool():
+    """Obtiene métricas del pool de conexiones"""
+    return jsonify(estadisticas_pool())
+
+@app.route('/admin/cache')
+@requiere_sesion('admin', api=True)
+def admin_cache():
+    """Obtiene métricas del cache de lectura"""
+    return jsonify(cache_lectura.estadisticas())
+
+@app.route('/admin/login-limits')
+@requiere_sesion('admin', api=True)
+def admin_login_limits():
+    """Obtiene métricas del limitador de intentos y del pool de verificación"""
+    return jsonify({
+        'por_ip': limitador_ip.estadisticas(),
+        'por_email': limitador_email.estadisticas(),
+        'verificacion': verificador_passwords.estadisticas()
+    })
+
+@app.route('/admin/metrics')
+@requiere_sesion('admin', api=True)
+def admin_metrics():
+    """Métricas de peticiones, SQL, pool y cache en formato de texto de Prometheus"""
+    texto = (registro_metricas.exportar_prometheus()
+             + exportar_valores('clinica_db_pool_', estadisticas_pool())
+             + exportar_valores('clinica_cache_', cache_lectura.estadisticas()))
+    return Response(texto, mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/slow-queries')
+@requiere_sesion('admin', api=True)
+def admin_slow_queries():
+    """Log de sentencias SQL lentas con su plan de ejecución"""
+    return jsonify({
+        'umbral_ms': registro_metricas.umbral_lento * 1000,
+        'consultas': registro_metricas.consultas_lentas()
+    })
+
+@app.route('/admin/backups')
+@requiere_sesion('admin', api=True)
+def admin_backups():
+    """Respaldos disponibles y los últimos registrados en mantenimiento_sistema"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
         cursor.execute('''
-            SELECT u.nombre, COUNT(c.id) as total_consultas
-            FROM usuarios u
-            LEFT JOIN consultas c ON u.id = c.doctor_id
-            WHERE u.rol = 'doctor' AND u.activo = 1
-            GROUP BY u.id, u.nombre
-            ORDER BY total_consultas DESC
+            SELECT id, descripcion, fecha, estado, duracion_ms, tamano_bytes
+            FROM mantenimiento_sistema
+            WHERE tipo = 'backup'
+            ORDER BY id DESC
+            LIMIT 20
         ''')
-        medicos = cursor.fetchall()
-        
+        registros = [dict(fila) for fila in cursor.fetchall()]
         conn.close()
         
-        return jsonify({
-            'pacientes': total_pacientes,
-            'consultas_mes': consultas_mes,
-            'doctores': doctores,
-            'medicos': [{'nombre': m['nombre'], 'consultas': m['total_consultas']} for m in medicos]
-        })
-        
+        return jsonify({'respaldos': listar_respaldos(), 'registros': registros})
     except Exception as e:
-        print(f"Error obteniendo stats: {e}")
+        print(f"Error listando respaldos: {e}")
         return jsonify({'error': 'Error del servidor'}), 500
 
 # ==================== RUTAS DEL DOCTOR ====================
 
 @app.route('/doctor/dashboard')
+@requiere_sesion('doctor')
 def doctor_dashboard():
     """Dashboard del doctor"""
-    if 'user_id' not in session or session['rol'] != 'doctor':
-        flash('Acceso denegado', 'error')
-        return redirect(url_for('login'))
-        
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Obtener información del doctor actual
-        cursor.execute('SELECT * FROM usuarios WHERE id = ?', (session['user_id'],))
-        doctor = cursor.fetchone()
-        
-        # Mis consultas totales
-        cursor.execute('SELECT COUNT(*) as count FROM consultas WHERE doctor_id = ?', 
-                       (session['user_id'],))
-        mis_consultas_result = cursor.fetchone()
-        mis_consultas = mis_consultas_result['count'] if mis_consultas_result else 0
+        # Información del doctor actual: ya la cargó el decorador desde el cache de usuarios
+        doctor = g.usuario
         
-        # Mis pacientes
-        cursor.execute('''
-            SELECT COUNT(DISTINCT paciente_id) as count 
-            FROM consultas 
-            WHERE doctor_id = ?
-        ''', (session['user_id'],))
-        mis_pacientes_result = cursor.fetchone()
-        mis_pacientes = mis_pacientes_result['count'] if mis_pacientes_result else 0
-        
-        # Consultas este mes
-        cursor.execute('''
-            SELECT COUNT(*) as count FROM consultas 
-            WHERE doctor_id = ? 
-            AND strftime('%Y-%m', fecha_consulta) = strftime('%Y-%m', 'now')
-        ''', (session['user_id'],))
-        consultas_mes_result = cursor.fetchone()
-        consultas_mes = consultas_mes_result['count'] if consultas_mes_result else 0
-        
-        # Consultas recientes
-        cursor.execute('''
-            SELECT c.*, p.nombre as paciente_nombre
-            FROM consultas c
-            JOIN pacientes p ON c.paciente_id = p.id
-            WHERE c.doctor_id = ?
-            ORDER BY c.fecha_consulta DESC
-            LIMIT 5
-        ''', (session['user_id'],))
-        consultas_recientes_data = cursor.fetchall()
+        conn = get_db_connection()
+        stats = estadisticas_doctor(conn, session['user_id'])
+        consultas_recientes = consultas_recientes_doctor(conn, session['user_id'])
         
         conn.close()
         
-        # Convertir a lista de diccionarios
-        consultas_recientes = []
-        for c in consultas_recientes_data:
-            consultas_recientes.append(dict(c))
-        
         return render_template('ddoctor-dashboard.html',
                              doctor=doctor,
-                             mis_consultas=mis_consultas,
-                             mis_pacientes=mis_pacientes,
-                             consultas_mes=consultas_mes,
+                             mis_consultas=stats['total_consultas'],
+                             mis_pacientes=stats['pacientes'],
+                             consultas_mes=stats['consultas_mes'],
                              consultas_recientes=consultas_recientes)
         
     except Exception as e:
@@ -258,55 +279,25 @@ def doctor_dashboard():
         return redirect(url_for('login'))
 
 @app.route('/doctor/stats')
+@requiere_sesion('doctor', api=True)
+@condicional('pacientes', 'consultas')
 def doctor_stats():
     """Obtiene estadísticas del doctor"""
-    if 'user_id' not in session or session.get('rol') != 'doctor':
-        return jsonify({'error': 'No autorizado'}), 401
-    
     try:
         doctor_id = session['user_id']
-        conn = get_db_connection()
-        cursor = conn.cursor()
         
-        # Total consultas del doctor
-        cursor.execute('SELECT COUNT(*) as total FROM consultas WHERE doctor_id = ?', (doctor_id,))
-        total_consultas = cursor.fetchone()['total']
+        def calcular():
+            conn = get_db_connection()
+            stats = estadisticas_doctor(conn, doctor_id)
+            stats['consultas_recientes'] = consultas_recientes_doctor(conn, doctor_id)
+            conn.close()
+            return stats
         
-        # Pacientes únicos del doctor
-        cursor.execute('''
-            SELECT COUNT(DISTINCT paciente_id) as total 
-            FROM consultas 
-            WHERE doctor_id = ?
-        ''', (doctor_id,))
-        pacientes_unicos = cursor.fetchone()['total']
+        stats = cache_lectura.obtener_o_calcular(
+            f'doctor_stats:{doctor_id}', calcular,
+            etiquetas=('pacientes', f'consultas:doctor:{doctor_id}'))
         
-        # Consultas este mes
-        cursor.execute('''
-            SELECT COUNT(*) as total FROM consultas 
-            WHERE doctor_id = ? 
-            AND strftime('%Y-%m', fecha_consulta) = strftime('%Y-%m', 'now')
-        ''', (doctor_id,))
-        consultas_mes = cursor.fetchone()['total']
-        
-        # Consultas recientes
-        cursor.execute('''
-            SELECT c.*, p.nombre as paciente_nombre, p.especie
-            FROM consultas c
-            JOIN pacientes p ON c.paciente_id = p.id
-            WHERE c.doctor_id = ?
-            ORDER BY c.fecha_consulta DESC
-            LIMIT 5
-        ''', (doctor_id,))
-        consultas_recientes = cursor.fetchall()
-        
-        conn.close()
-        
-        return jsonify({
-            'total_consultas': total_consultas,
-            'pacientes': pacientes_unicos,
-            'consultas_mes': consultas_mes,
-            'consultas_recientes': [dict(c) for c in consultas_recientes]
-        })
+        return jsonify(stats)
         
     except Exception as e:
         print(f"Error obteniendo stats doctor: {e}")
@@ -315,13 +306,10 @@ def doctor_stats():
 # ==================== RUTAS COMPARTIDAS ====================
 
 @app.route('/register-patient', methods=['GET', 'POST'])
+@requiere_sesion()
 def register_patient():
 
     if request.method == 'GET':
-        if 'user_id' not in session:
-            flash('Debe iniciar sesión', 'error')
-            return redirect(url_for('login'))
-
         dashboard_url = url_for('admin_dashboard') if session.get('rol') == 'admin' else url_for('doctor_dashboard')
 
         return render_template('register-patient.html',
@@ -351,6 +339,7 @@ def register_patient():
 
         conn.commit()
         conn.close()
+        cache_lectura.invalidar('pacientes')
 
     except Exception as e:
         print("Error BD:", e)
@@ -359,18 +348,20 @@ def register_patient():
     return jsonify({"success": True})
 
 @app.route('/register-consultation', methods=['GET', 'POST'])
+@requiere_sesion()
 def register_consultation():
 
     if request.method == 'GET':
-        if 'user_id' not in session:
-            flash('Debe iniciar sesión', 'error')
-            return redirect(url_for('login'))
+        def calcular():
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, nombre, especie, raza, edad FROM pacientes ORDER BY nombre")
+            pacientes = [dict(p) for p in cursor.fetchall()]
+            conn.close()
+            return pacientes
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, nombre, especie, raza, edad FROM pacientes ORDER BY nombre")
-        pacientes = cursor.fetchall()
-        conn.close()
+        pacientes = cache_lectura.obtener_o_calcular(
+            'pacientes_formulario', calcular, etiquetas=('pacientes',))
 
         dashboard_url = url_for('admin_dashboard') if session.get('rol') == 'admin' else url_for('doctor_dashboard')
 
@@ -404,12 +395,13 @@ def register_consultation():
             "pendiente"
         ))
 
-        # 2️⃣ Guardar también en historial médico
+        # 2️⃣ Guardar también en historial médico, vinculado a la consulta
         cursor.execute("""
-            INSERT INTO historial_medico (paciente_id, fecha, diagnostico, doctor_id, tipo, descripcion)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO historial_medico (paciente_id, consulta_id, fecha, diagnostico, doctor_id, tipo, descripcion)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
             data["patientId"],
+            cursor.lastrowid,
             data["date"],
             data["diagnosis"],        # Diagnóstico
             session.get("user_id"),   # Doctor
@@ -419,6 +411,7 @@ def register_consultation():
 
         conn.commit()
         conn.close()
+        cache_lectura.invalidar('consultas', f'consultas:doctor:{session.get("user_id")}')
 
         return jsonify({"success": True})  # <--- SIEMPRE retornamos
 
@@ -427,12 +420,9 @@ def register_consultation():
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/historial-pacientes')
+@requiere_sesion()
 def historial_pacientes():
     """Página de historial de pacientes"""
-    if 'user_id' not in session:
-        flash('Debe iniciar sesión', 'error')
-        return redirect(url_for('login'))
-    
     rol = session.get('rol')
     
     # Determinar a qué dashboard regresar
@@ -515,12 +505,9 @@ def obtener_datos_historial(rol, user_id):
 
 
 @app.route('/system-maintenance')
+@requiere_sesion('admin')
 def system_maintenance():
     """Página de mantenimiento del sistema"""
-    if 'user_id' not in session or session.get('rol') != 'admin':
-        flash('Acceso denegado. Solo administradores', 'error')
-        return redirect(url_for('login'))
-    
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -529,57 +516,14 @@ def system_maintenance():
         cursor.execute('SELECT COUNT(*) as total FROM pacientes')
         total_pacientes = cursor.fetchone()['total']
         
-        # 2. Pacientes inactivos (24+ meses sin consultas)
-        cursor.execute('''
-            SELECT p.*, MAX(c.fecha_consulta) as ultima_consulta,
-                   julianday('now') - julianday(MAX(c.fecha_consulta)) as dias_inactivo
-            FROM pacientes p
-            LEFT JOIN consultas c ON p.id = c.paciente_id
-            GROUP BY p.id
-            HAVING ultima_consulta IS NULL 
-                   OR (julianday('now') - julianday(ultima_consulta)) > 730
-            ORDER BY dias_inactivo DESC
-        ''')
-        pacientes_inactivos_data = cursor.fetchall()
-        
-        # 3. Contar inactivos
-        pacientes_inactivos = [dict(p) for p in pacientes_inactivos_data]
-        inactivos_count = len(pacientes_inactivos)
+        # 2. Página de pacientes inactivos (24+ meses sin consultas) con su último médico
+        pagina = max(request.args.get('pagina', 1, type=int), 1)
+        por_pagina = min(max(request.args.get('por_pagina', 50, type=int), 1), 500)
+        orden = request.args.get('orden', 'inactividad')
+        direccion = request.args.get('dir', 'desc')
         
-        # 4. Obtener información de médicos para los registros
-        cursor.execute("SELECT id, nombre FROM usuarios WHERE rol = 'doctor'")
-        doctores = cursor.fetchall()
-        doctores_dict = {d['id']: d['nombre'] for d in doctores}
-        
-        # 5. Para cada paciente inactivo, obtener info del médico que lo registró
-        for paciente in pacientes_inactivos:
-            # Buscar la última consulta para obtener el médico
-            cursor.execute('''
-                SELECT c.doctor_id, u.nombre as doctor_nombre
-                FROM consultas c
-                JOIN usuarios u ON c.doctor_id = u.id
-                WHERE c.paciente_id = ?
-                ORDER BY c.fecha_consulta DESC
-                LIMIT 1
-            ''', (paciente['id'],))
-            ultima_consulta = cursor.fetchone()
-            
-            if ultima_consulta:
-                paciente['doctor_id'] = ultima_consulta['doctor_id']
-                paciente['doctor_nombre'] = ultima_consulta['doctor_nombre']
-            else:
-                paciente['doctor_id'] = None
-                paciente['doctor_nombre'] = 'No registrado'
-            
-            # Calcular meses desde última consulta
-            if paciente.get('ultima_consulta'):
-                cursor.execute('''
-                    SELECT ROUND((julianday('now') - julianday(?)) / 30.44, 1) as meses
-                ''', (paciente['ultima_consulta'],))
-                meses_result = cursor.fetchone()
-                paciente['meses_inactivo'] = meses_result['meses'] if meses_result else 'N/A'
-            else:
-                paciente['meses_inactivo'] = 'N/A'
+        pacientes_inactivos, inactivos_count = obtener_pacientes_inactivos(
+            conn, orden, direccion, por_pagina, (pagina - 1) * por_pagina)
         
         conn.close()
         
@@ -587,6 +531,11 @@ def system_maintenance():
                              total_pacientes=total_pacientes,
                              pacientes_inactivos=pacientes_inactivos,
                              inactivos_count=inactivos_count,
+                             pagina=pagina,
+                             por_pagina=por_pagina,
+                             total_paginas=max((inactivos_count + por_pagina - 1) // por_pagina, 1),
+                             orden=orden,
+                             direccion=direccion,
                              adminName=session['nombre'])
         
     except Exception as e:
@@ -597,52 +546,249 @@ def system_maintenance():
 # ==================== API ENDPOINTS ====================
 
 @app.route('/api/pacientes', methods=['GET'])
+@requiere_sesion(api=True)
+@condicional('pacientes')
 def get_pacientes():
-    """Obtiene lista de pacientes"""
-    if 'user_id' not in session:
-        return jsonify({'error': 'No autorizado'}), 401
+    """Obtiene una página de pacientes (búsqueda con ?q=, paginación con ?cursor=).
+
+    Con ?archivados=1 (solo administradores) busca en el archivo.
+    """
+    texto = request.args.get('q', '').strip()
+    cursor_pagina = request.args.get('cursor') or None
+    archivados = request.args.get('archivados') == '1'
+    if archivados and session.get('rol') != 'admin':
+        return jsonify({'error': 'No autorizado'}), 403
+    try:
+        limite = normalizar_limite(request.args.get('limit', type=int))
+    except ValueError:
+        return jsonify({'error': 'Parámetro limit inválido'}), 400
+    
+    try:
+        def calcular():
+            conn = get_db_connection()
+            pacientes, siguiente = buscar_pacientes(conn, texto, cursor_pagina, limite, archivados)
+            conn.close()
+            return {'pacientes': pacientes, 'next_cursor': siguiente}
+        
+        pagina = cache_lectura.obtener_o_calcular(
+            f'api_pacientes:{int(archivados)}:{texto}:{cursor_pagina}:{limite}', calcular, etiquetas=('pacientes',))
+        
+        return jsonify(pagina)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error obteniendo pacientes: {e}")
+        return jsonify({'error': 'Error del servidor'}), 500
+
+@app.route('/api/search', methods=['GET'])
+@requiere_sesion(api=True)
+@condicional('pacientes', 'consultas', 'historial_medico')
+def api_search():
+    """Búsqueda de texto completo en pacientes, consultas e historial médico"""
+    texto = request.args.get('q', '').strip()
+    if not texto:
+        return jsonify({'error': 'El parámetro q es requerido'}), 400
     
     try:
+        limite = normalizar_limite(request.args.get('limit', type=int), defecto=20, maximo=100)
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id,
-                   nombre,
-                   especie,
-                   raza,
-                   nombre_dueno AS dueno
-            FROM pacientes
-            ORDER BY nombre
-        ''')
-        pacientes = cursor.fetchall()
+        resultados = buscar_texto(conn, texto, limite)
         conn.close()
         
-        return jsonify([dict(p) for p in pacientes])
+        return jsonify({'resultados': resultados})
     except Exception as e:
-        print(f"Error obteniendo pacientes: {e}")
+        print(f"Error en búsqueda: {e}")
         return jsonify({'error': 'Error del servidor'}), 500
 
 @app.route('/api/session')
 def get_session():
     """Obtiene información de la sesión actual"""
-    if 'user_id' not in session:
+    usuario = usuario_actual()
+    if usuario is None:
         return jsonify({'authenticated': False})
     
     return jsonify({
         'authenticated': True,
-        'nombre': session.get('nombre'),
-        'username': session.get('username'),
-        'rol': session.get('rol')
+        'nombre': usuario['nombre'],
+        'username': usuario['username'],
+        'rol': usuario['rol']
     })
 
+# ==================== API DE EXPORTACIÓN ====================
+
+@app.route('/api/export/<tabla>', methods=['GET'])
+@requiere_sesion('admin', api=True)
+def export_data(tabla):
+    """Exporta pacientes, consultas o historial en streaming (NDJSON o CSV)"""
+    if tabla not in EXPORTABLES:
+        return jsonify({'error': 'Tabla no exportable'}), 404
+    
+    formato = request.args.get('format', 'ndjson')
+    if formato not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Formato no soportado'}), 400
+    
+    filtros = {
+        'desde': request.args.get('desde'),
+        'hasta': request.args.get('hasta'),
+        'doctor_id': request.args.get('doctor_id', type=int),
+    }
+    comprimir = request.args.get('gzip') in ('1', 'true')
+    
+    # Validar filtros antes de empezar a enviar la respuesta
+    try:
+        construir_exportacion(tabla, **filtros)
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas (usar YYYY-MM-DD)'}), 400
+    
+    def generar():
+        # Conexión propia: la respuesta se sigue enviando después de la vista
+        conn = obtener_pool().obtener()
+        try:
+            yield from exportar(conn, tabla, formato, comprimir=comprimir, **filtros)
+        finally:
+            conn.close()
+    
+    extension = 'csv' if formato == 'csv' else 'ndjson'
+    headers = {'Content-Disposition': f'attachment; filename={tabla}.{extension}'}
+    if comprimir:
+        headers['Content-Encoding'] = 'gzip'
+    mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    # stream_with_context: las sentencias del streaming cuentan para las métricas de la petición
+    return Response(stream_with_context(generar()), mimetype=mimetype, headers=headers)
+
+@app.route('/api/import/<tabla>', methods=['POST'])
+@requiere_sesion('admin', api=True)
+def import_data(tabla):
+    """Importa pacientes o consultas desde un archivo CSV o NDJSON"""
+    if tabla not in IMPORTABLES:
+        return jsonify({'error': 'Tabla no importable'}), 404
+    
+    formato = request.args.get('format', 'csv')
+    if formato not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Formato no soportado'}), 400
+    
+    # Se acepta un archivo 'archivo' (multipart) o el cuerpo crudo de la petición
+    archivo = request.files.get('archivo')
+    flujo = archivo.stream if archivo else request.stream
+    desde_linea = request.args.get('desde_linea', 0, type=int)
+    
+    try:
+        texto = io.TextIOWrapper(flujo, encoding='utf-8', newline='')
+        conn = get_db_connection()
+        resumen = importar(conn, tabla, leer_filas(texto, formato), desde_linea=desde_linea)
+        conn.close()
+        cache_lectura.invalidar('pacientes', 'consultas')
+        
+        return jsonify({'success': True, **resumen})
+    except Exception as e:
+        print(f"Error importando {tabla}: {e}")
+        return jsonify({'success': False, 'message': 'Error del servidor'}), 500
+
+# ==================== API DE AGENDA ====================
+
+def _doctor_de_agenda(valor):
+    """Doctor pedido (o el de la sesión si es doctor); lanza ValueError si no es un doctor activo"""
+    doctor_id = valor if valor is not None else (session['user_id'] if g.usuario['rol'] == 'doctor' else None)
+    try:
+        doctor_id = int(doctor_id)
+    except (TypeError, ValueError):
+        raise ValueError('doctor_id es requerido')
+    doctor = cache_usuarios.obtener(doctor_id)
+    if not doctor or doctor['rol'] != 'doctor' or not doctor['activo']:
+        raise ValueError('Doctor no encontrado')
+    return doctor_id
+
+@app.route('/api/agenda/free-slots', methods=['GET'])
+@requiere_sesion(api=True)
+def agenda_free_slots():
+    """Turnos libres de un doctor (?doctor_id=&fecha=YYYY-MM-DD&dias=N)"""
+    try:
+        doctor_id = _doctor_de_agenda(request.args.get('doctor_id'))
+        try:
+            fecha = date.fromisoformat(request.args.get('fecha') or date.today().isoformat())
+        except ValueError:
+            raise ValueError('Fecha inválida (usar YYYY-MM-DD)')
+        dias = request.args.get('dias', 1, type=int)
+        
+        conn = get_db_connection()
+        libres = turnos_libres(conn, doctor_id, fecha, dias)
+        conn.close()
+        
+        return jsonify({'doctor_id': doctor_id, 'turnos': libres})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error obteniendo turnos libres: {e}")
+        return jsonify({'error': 'Error del servidor'}), 500
+
+@app.route('/api/agenda/book', methods=['POST'])
+@requiere_sesion(api=True)
+def agenda_book():
+    """Reserva un turno; 409 si se solapa con otra consulta del doctor"""
+    data = request.get_json(silent=True) or {}
+    try:
+        doctor_id = _doctor_de_agenda(data.get('doctor_id'))
+        inicio = leer_fecha_hora(data.get('inicio'))
+        paciente_id = int(data['paciente_id'])
+    except (KeyError, TypeError, ValueError) as e:
+        mensaje = str(e) if isinstance(e, ValueError) and str(e) else 'paciente_id e inicio son requeridos'
+        return jsonify({'success': False, 'message': mensaje}), 400
+    
+    try:
+        conn = get_db_connection()
+        consulta_id = reservar(conn, doctor_id, paciente_id, inicio, data.get('duracion'),
+                               data.get('motivo') or 'Cita programada')
+        conn.close()
+        cache_lectura.invalidar('consultas', f'consultas:doctor:{doctor_id}')
+        
+        return jsonify({'success': True, 'consulta_id': consulta_id}), 201
+    except ConflictoAgenda as e:
+        return jsonify({'success': False, 'message': str(e), 'conflicto': e.consulta}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except sqlite3.IntegrityError:
+        return jsonify({'success': False, 'message': 'Paciente no encontrado'}), 400
+    except Exception as e:
+        print(f"Error reservando turno: {e}")
+        return jsonify({'success': False, 'message': 'Error del servidor'}), 500
+
+@app.route('/api/agenda/working-hours', methods=['GET', 'POST'])
+@requiere_sesion(api=True)
+def agenda_working_hours():
+    """Consulta o reemplaza el horario de atención de un doctor"""
+    data = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    try:
+        doctor_id = _doctor_de_agenda(data.get('doctor_id', request.args.get('doctor_id')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        conn = get_db_connection()
+        if request.method == 'POST':
+            # Un doctor solo puede cambiar su propio horario
+            if g.usuario['rol'] != 'admin' and doctor_id != session['user_id']:
+                conn.close()
+                return jsonify({'error': 'No autorizado'}), 403
+            guardar_horario(conn, doctor_id, data.get('bloques') or [])
+        bloques = horario_doctor(conn, doctor_id)
+        conn.close()
+        
+        return jsonify({'doctor_id': doctor_id, 'bloques': [
+            {'dia_semana': dia, 'hora_inicio': inicio, 'hora_fin': fin, 'duracion_turno': duracion}
+            for dia, inicio, fin, duracion in bloques
+        ]})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error en horario de atención: {e}")
+        return jsonify({'error': 'Error del servidor'}), 500
+
 # ==================== API PARA MANTENIMIENTO ====================
 
 @app.route('/api/archive-patients', methods=['POST'])
+@requiere_sesion('admin', api=True)
 def archive_patients():
-    """Archiva pacientes seleccionados"""
-    if 'user_id' not in session or session.get('rol') != 'admin':
-        return jsonify({'success': False, 'message': 'No autorizado'}), 401
-    
+    """Mueve los pacientes seleccionados, con sus consultas e historial, al archivo"""
     try:
         data = request.get_json()
         patient_ids = data.get('patient_ids', [])
@@ -650,26 +796,29 @@ def archive_patients():
         if not patient_ids:
             return jsonify({'success': False, 'message': 'No hay pacientes seleccionados'}), 400
         
-        # Aquí implementarías la lógica para archivar
-        # Por ejemplo, mover a una tabla de pacientes_archivados
-        # o marcar como inactivo
+        conn = get_db_connection()
+        movidos = archivar_pacientes(conn, patient_ids)
+        conn.close()
+        cache_lectura.invalidar('pacientes', 'consultas')
         
         return jsonify({
             'success': True, 
-            'message': f'{len(patient_ids)} pacientes archivados',
-            'archived': patient_ids
+            'message': f"{movidos['pacientes']} pacientes archivados "
+                       f"({movidos['consultas']} consultas, {movidos['historial_medico']} registros de historial)",
+            'archived': patient_ids,
+            'rows': movidos
         })
         
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'patient_ids debe ser una lista de ids'}), 400
     except Exception as e:
         print(f"Error archivando pacientes: {e}")
         return jsonify({'success': False, 'message': 'Error del servidor'}), 500
 
-@app.route('/api/delete-patients', methods=['POST'])
-def delete_patients():
-    """Elimina pacientes seleccionados"""
-    if 'user_id' not in session or session.get('rol') != 'admin':
-        return jsonify({'success': False, 'message': 'No autorizado'}), 401
-    
+@app.route('/api/restore-patients', methods=['POST'])
+@requiere_sesion('admin', api=True)
+def restore_patients():
+    """Devuelve pacientes archivados, con sus consultas e historial, a las tablas activas"""
     try:
         data = request.get_json()
         patient_ids = data.get('patient_ids', [])
@@ -677,69 +826,234 @@ def delete_patients():
         if not patient_ids:
             return jsonify({'success': False, 'message': 'No hay pacientes seleccionados'}), 400
         
-        # Confirmación adicional para eliminación
         conn = get_db_connection()
-        cursor = conn.cursor()
+        movidos = restaurar_pacientes(conn, patient_ids)
+        conn.close()
+        cache_lectura.invalidar('pacientes', 'consultas')
         
-        # 1. Primero eliminar historial médico
-        cursor.executemany(
-            'DELETE FROM historial_medico WHERE paciente_id = ?',
-            [(pid,) for pid in patient_ids]
-        )
+        return jsonify({
+            'success': True, 
+            'message': f"{movidos['pacientes']} pacientes restaurados",
+            'restored': patient_ids,
+            'rows': movidos
+        })
         
-        # 2. Eliminar consultas
-        cursor.executemany(
-            'DELETE FROM consultas WHERE paciente_id = ?',
-            [(pid,) for pid in patient_ids]
-        )
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'patient_ids debe ser una lista de ids'}), 400
+    except Exception as e:
+        print(f"Error restaurando pacientes: {e}")
+        return jsonify({'success': False, 'message': 'Error del servidor'}), 500
+
+@app.route('/api/delete-patients', methods=['POST'])
+@requiere_sesion('admin', api=True)
+def delete_patients():
+    """Elimina pacientes seleccionados con sus consultas e historial.
+
+    Hasta UMBRAL_PURGA_EN_SEGUNDO_PLANO pacientes se eliminan en la petición;
+    más que eso se encola una tarea (202) cuyo progreso se consulta en
+    /api/jobs/<id>.
+    """
+    try:
+        data = request.get_json()
+        patient_ids = [int(pid) for pid in data.get('patient_ids', [])]
         
-        # 3. Finalmente eliminar pacientes
-        cursor.executemany(
-            'DELETE FROM pacientes WHERE id = ?',
-            [(pid,) for pid in patient_ids]
-        )
+        if not patient_ids:
+            return jsonify({'success': False, 'message': 'No hay pacientes seleccionados'}), 400
         
-        conn.commit()
+        def invalidar(procesados, eliminados):
+            cache_lectura.invalidar('pacientes', 'consultas')
+        
+        if len(patient_ids) > UMBRAL_PURGA_EN_SEGUNDO_PLANO:
+            tarea_id = cola_tareas.encolar('eliminar_pacientes', {'patient_ids': patient_ids},
+                                           session.get('user_id'))
+            return jsonify({
+                'success': True,
+                'message': f'Eliminación de {len(patient_ids)} pacientes en curso',
+                'job_id': tarea_id,
+                'status_url': url_for('get_job', job_id=tarea_id)
+            }), 202
+        
+        conn = get_db_connection()
+        eliminados = eliminar_pacientes(conn, patient_ids, despues_de_lote=invalidar)
         conn.close()
         
         return jsonify({
             'success': True, 
-            'message': f'{len(patient_ids)} pacientes eliminados permanentemente',
+            'message': f'{eliminados} pacientes eliminados permanentemente',
             'deleted': patient_ids
         })
         
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'patient_ids debe ser una lista de ids'}), 400
     except Exception as e:
         print(f"Error eliminando pacientes: {e}")
         return jsonify({'success': False, 'message': 'Error del servidor'}), 500
 
+# ==================== TAREAS EN SEGUNDO PLANO ====================
+
+def _tarea_archivar(conn, parametros, progreso):
+    ids = parametros['patient_ids']
+    progreso(0, len(ids))
+    movidos = archivar_pacientes(conn, ids)
+    cache_lectura.invalidar('pacientes', 'consultas')
+    progreso(len(ids))
+    return movidos
+
+def _tarea_eliminar(conn, parametros, progreso):
+    ids = parametros['patient_ids']
+    progreso(0, len(ids))
+    
+    def despues_de_lote(procesados, eliminados):
+        cache_lectura.invalidar('pacientes', 'consultas')
+        progreso(procesados)
+    
+    return {'eliminados': eliminar_pacientes(conn, ids, despues_de_lote=despues_de_lote)}
+
+def _tarea_contadores(conn, parametros, progreso):
+    progreso(0, 1)
+    filas = reconstruir_contadores(conn)
+    cache_lectura.invalidar('pacientes', 'consultas')
+    progreso(1)
+    return {'contadores': filas}
+
+def _tarea_respaldo(conn, parametros, progreso):
+    progreso(0, 1)
+    respaldo = crear_respaldo(obtener_pool().ruta)
+    progreso(1)
+    return respaldo
+
+def _tarea_verificar_respaldo(conn, parametros, progreso):
+    # Solo archivos del directorio de respaldos; sin archivo, el más reciente
+    disponibles = [r['archivo'] for r in listar_respaldos()]
+    archivo = parametros.get('archivo') or (disponibles[0] if disponibles else None)
+    if archivo not in disponibles:
+        raise ValueError('Respaldo no encontrado')
+    progreso(0, 1)
+    resultado = verificar_respaldo(archivo)
+    progreso(1)
+    return resultado
+
+cola_tareas.registrar('archivar_pacientes', _tarea_archivar, 'Archivo de pacientes')
+cola_tareas.registrar('eliminar_pacientes', _tarea_eliminar, 'Eliminación de pacientes')
+cola_tareas.registrar('reconstruir_contadores', _tarea_contadores, 'Reconstrucción de contadores')
+cola_tareas.registrar('respaldo', _tarea_respaldo, 'Respaldo de la base de datos', tipo_mantenimiento='backup')
+cola_tareas.registrar('verificar_respaldo', _tarea_verificar_respaldo, 'Verificación de respaldo',
+                      tipo_mantenimiento='backup')
+
+# Tareas que reciben una lista de pacientes en parametros.patient_ids
+TAREAS_CON_PACIENTES = {'archivar_pacientes', 'eliminar_pacientes'}
+
+@app.route('/api/jobs', methods=['POST'])
+@requiere_sesion('admin', api=True)
+def create_job():
+    """Encola una tarea de mantenimiento; responde 202 con la URL para consultar su estado"""
+    try:
+        data = request.get_json() or {}
+        tipo = data.get('tipo')
+        parametros = data.get('parametros') or {}
+        
+        if tipo not in cola_tareas.tipos:
+            return jsonify({'success': False, 'message': f"tipo debe ser uno de: {', '.join(cola_tareas.tipos)}"}), 400
+        if tipo in TAREAS_CON_PACIENTES:
+            parametros['patient_ids'] = [int(pid) for pid in parametros.get('patient_ids', [])]
+            if not parametros['patient_ids']:
+                return jsonify({'success': False, 'message': 'No hay pacientes seleccionados'}), 400
+        
+        tarea_id = cola_tareas.encolar(tipo, parametros, session.get('user_id'))
+        return jsonify({
+            'success': True,
+            'job_id': tarea_id,
+            'status_url': url_for('get_job', job_id=tarea_id)
+        }), 202
+        
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Parámetros inválidos'}), 400
+    except Exception as e:
+        print(f"Error encolando tarea: {e}")
+        return jsonify({'success': False, 'message': 'Error del servidor'}), 500
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+@requiere_sesion('admin', api=True)
+def get_job(job_id):
+    """Estado y progreso de una tarea en segundo plano"""
+    try:
+        tarea = cola_tareas.estado(job_id)
+        if tarea is None:
+            return jsonify({'error': 'Tarea no encontrada'}), 404
+        return jsonify(tarea)
+    except Exception as e:
+        print(f"Error obteniendo tarea: {e}")
+        return jsonify({'error': 'Error del servidor'}), 500
+
 # ==================== API ADICIONALES ÚTILES ====================
 
 @app.route('/api/patient/<int:patient_id>', methods=['GET'])
+@requiere_sesion(api=True)
+@condicional('pacientes')
 def get_patient(patient_id):
     """Obtiene información de un paciente específico"""
-    if 'user_id' not in session:
-        return jsonify({'error': 'No autorizado'}), 401
-    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM pacientes WHERE id = ?', (patient_id,))
-        paciente = cursor.fetchone()
-        conn.close()
+        def calcular():
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM pacientes WHERE id = ?', (patient_id,))
+            paciente = cursor.fetchone()
+            conn.close()
+            return dict(paciente) if paciente else None
+        
+        paciente = cache_lectura.obtener_o_calcular(
+            f'paciente:{patient_id}', calcular, etiquetas=('pacientes',))
         
         if not paciente:
             return jsonify({'error': 'Paciente no encontrado'}), 404
         
-        return jsonify(dict(paciente))
+        return jsonify(paciente)
     except Exception as e:
         print(f"Error obteniendo paciente: {e}")
         return jsonify({'error': 'Error del servidor'}), 500
 
+@app.route('/api/patient/<int:patient_id>/timeline', methods=['GET'])
+@requiere_sesion(api=True)
+def get_patient_timeline(patient_id):
+    """Consultas e historial de un paciente, paginados por cursor y con ETag"""
+    cursor_pagina = (request.args.get('cursor') or '').strip() or None
+    try:
+        limite = normalizar_limite(request.args.get('limit', type=int))
+    except ValueError:
+        return jsonify({'error': 'Parámetro limit inválido'}), 400
+    
+    try:
+        conn = get_db_connection()
+        version = version_linea_tiempo(conn, patient_id)
+        if version is None:
+            conn.close()
+            return jsonify({'error': 'Paciente no encontrado'}), 404
+        
+        # La versión cambia con cada evento del paciente: si el cliente ya la tiene, 304 sin leer eventos.
+        # Cada página (cursor y límite) tiene su propio ETag
+        clave = f'{patient_id}|{version}|{cursor_pagina or ""}|{limite}'
+        etag = 'timeline-' + hashlib.blake2b(clave.encode('utf-8'), digest_size=8).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            conn.close()
+            respuesta = Response(status=304)
+        else:
+            eventos, siguiente = linea_tiempo(conn, patient_id, cursor_pagina, limite)
+            conn.close()
+            respuesta = jsonify({'eventos': eventos, 'next_cursor': siguiente})
+        
+        respuesta.set_etag(etag, weak=True)
+        respuesta.headers['Cache-Control'] = 'private, no-cache'
+        return respuesta
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error obteniendo línea de tiempo: {e}")
+        return jsonify({'error': 'Error del servidor'}), 500
+
 @app.route('/api/patient-history/<int:patient_id>', methods=['GET', 'POST'])
+@requiere_sesion(api=True)
+@condicional('historial_medico', 'usuarios')
 def get_patient_history(patient_id):
-    if 'user_id' not in session:
-        return jsonify({'error': 'No autorizado'}), 401
-    
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -767,4 +1081,8 @@ def get_patient_history(patient_id):
 # ==================== EJECUCIÓN ====================
 
 if __name__ == '__main__':
+    # Con debug el reloader ejecuta este bloque en dos procesos: solo el hijo
+    # (WERKZEUG_RUN_MAIN) atiende peticiones y retoma las tareas pendientes
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        cola_tareas.reanudar()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
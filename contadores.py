@@ -0,0 +1,97 @@
+# contadores.py
+import sqlite3
+import sys
+
+# Contadores materializados en stats_counters (mantenidos por triggers):
+#   ('pacientes', 0, '', '')                     -> total de pacientes
+#   ('consultas', doctor_id, 'YYYY-MM', estado)  -> consultas por doctor, mes y estado
+#   ('pacientes_doctor', doctor_id, '', '')      -> pacientes distintos por doctor
+
+# Los mismos contadores calculados directamente sobre las tablas
+SQL_CONTADORES_EN_VIVO = '''
+    SELECT 'pacientes' AS tipo, 0 AS doctor_id, '' AS mes, '' AS estado, COUNT(*) AS valor
+    FROM pacientes
+    UNION ALL
+    SELECT 'consultas', doctor_id, substr(fecha_consulta, 1, 7), COALESCE(estado, ''), COUNT(*)
+    FROM consultas
+    GROUP BY doctor_id, substr(fecha_consulta, 1, 7), COALESCE(estado, '')
+    UNION ALL
+    SELECT 'pacientes_doctor', doctor_id, '', '', COUNT(DISTINCT paciente_id)
+    FROM consultas
+    GROUP BY doctor_id
+'''
+
+def poblar_contadores(cursor):
+    """Recalcula stats_counters desde cero (sin confirmar la transacción)"""
+    cursor.execute('DELETE FROM stats_counters')
+    cursor.execute(f'''
+        INSERT INTO stats_counters (tipo, doctor_id, mes, estado, valor)
+        {SQL_CONTADORES_EN_VIVO}
+    ''')
+
+def reconstruir_contadores(conn):
+    """Reconstruye todos los contadores en una transacción"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        poblar_contadores(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    cursor.execute('SELECT COUNT(*) FROM stats_counters')
+    return cursor.fetchone()[0]
+
+def verificar_contadores(conn):
+    """Compara los contadores con los agregados reales y retorna las diferencias"""
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        WITH en_vivo AS ({SQL_CONTADORES_EN_VIVO}),
+        claves AS (
+            SELECT tipo, doctor_id, mes, estado FROM en_vivo
+            UNION
+            SELECT tipo, doctor_id, mes, estado FROM stats_counters
+        )
+        SELECT k.tipo, k.doctor_id, k.mes, k.estado,
+               COALESCE(v.valor, 0) AS esperado,
+               COALESCE(s.valor, 0) AS actual
+        FROM claves k
+        LEFT JOIN en_vivo v
+               ON v.tipo = k.tipo AND v.doctor_id = k.doctor_id
+              AND v.mes = k.mes AND v.estado = k.estado
+        LEFT JOIN stats_counters s
+               ON s.tipo = k.tipo AND s.doctor_id = k.doctor_id
+              AND s.mes = k.mes AND s.estado = k.estado
+        WHERE COALESCE(v.valor, 0) <> COALESCE(s.valor, 0)
+        ORDER BY k.tipo, k.doctor_id, k.mes, k.estado
+    ''')
+    return [dict(zip(('tipo', 'doctor_id', 'mes', 'estado', 'esperado', 'actual'), fila))
+            for fila in cursor.fetchall()]
+
+# ==================== EJECUCIÓN ====================
+
+if __name__ == '__main__':
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'verificar'
+    ruta = sys.argv[2] if len(sys.argv) > 2 else 'clinic.db'
+    conn = sqlite3.connect(ruta)
+    codigo_salida = 0
+
+    if comando == 'reconstruir':
+        total = reconstruir_contadores(conn)
+        print(f"✅ Contadores reconstruidos: {total} filas")
+    elif comando == 'verificar':
+        diferencias = verificar_contadores(conn)
+        if diferencias:
+            codigo_salida = 1
+            print(f"❌ {len(diferencias)} contadores inconsistentes:")
+            for d in diferencias:
+                print(f"   • {d['tipo']} doctor={d['doctor_id']} mes={d['mes']} "
+                      f"estado={d['estado']}: esperado {d['esperado']}, actual {d['actual']}")
+        else:
+            print("✅ Contadores consistentes")
+    else:
+        codigo_salida = 2
+        print("Uso: python contadores.py [reconstruir|verificar] [ruta_db]")
+
+    conn.close()
+    sys.exit(codigo_salida)
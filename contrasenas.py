@@ -0,0 +1,157 @@
+# contrasenas.py
+import argparse
+import hashlib
+import hmac
+import secrets
+import time
+
+# Parámetros vigentes para hashes nuevos. Usar 'python contrasenas.py calibrar'
+# para elegir el costo adecuado al servidor; los hashes existentes con otros
+# parámetros se actualizan solos en el siguiente login (necesita_rehash).
+ALGORITMO = 'pbkdf2_sha256'
+ITERACIONES_PBKDF2 = 100000
+PARAMETROS_SCRYPT = {'n': 2 ** 14, 'r': 8, 'p': 1}
+
+# Formato heredado 'salt:hash' (PBKDF2-SHA256, 100000 iteraciones, salt hex usado como texto)
+ITERACIONES_LEGADO = 100000
+
+# ==================== ALGORITMOS ====================
+
+def _pbkdf2_sha256(password, salt, parametros):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, parametros['i'])
+
+def _scrypt(password, salt, parametros):
+    n, r, p = parametros['n'], parametros['r'], parametros['p']
+    # maxmem holgado: scrypt necesita 128 * n * r bytes
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=32)
+
+ALGORITMOS = {
+    'pbkdf2_sha256': _pbkdf2_sha256,
+    'scrypt': _scrypt,
+}
+
+def parametros_actuales(algoritmo=None):
+    """Parámetros vigentes del algoritmo indicado (o del actual)"""
+    algoritmo = algoritmo or ALGORITMO
+    if algoritmo == 'scrypt':
+        return dict(PARAMETROS_SCRYPT)
+    return {'i': ITERACIONES_PBKDF2}
+
+# ==================== FORMATO ====================
+
+def _codificar_parametros(parametros):
+    return ','.join(f'{clave}={valor}' for clave, valor in parametros.items())
+
+def _decodificar_parametros(texto):
+    return {clave: int(valor) for clave, valor in (par.split('=') for par in texto.split(','))}
+
+def descomponer(stored_hash):
+    """Retorna (algoritmo, parámetros, salt, hash) de un hash en cualquier formato soportado.
+
+    Lanza ValueError si el valor no es un hash reconocido.
+    """
+    if not stored_hash:
+        raise ValueError('Hash vacío')
+    partes = stored_hash.split('$')
+    if len(partes) == 4:
+        algoritmo, parametros, salt, valor = partes
+        if algoritmo not in ALGORITMOS:
+            raise ValueError(f'Algoritmo desconocido: {algoritmo}')
+        return algoritmo, _decodificar_parametros(parametros), bytes.fromhex(salt), bytes.fromhex(valor)
+
+    # Formato heredado salt:hash
+    partes = stored_hash.split(':')
+    if len(partes) == 2 and len(partes[0]) == 32 and len(partes[1]) == 64:
+        salt, valor = partes
+        return 'legado', {'i': ITERACIONES_LEGADO}, salt.encode('utf-8'), bytes.fromhex(valor)
+    raise ValueError('Formato de hash no reconocido')
+
+def es_hash(valor):
+    """Indica si el valor ya es un hash (nuevo o heredado) y no una contraseña en texto plano"""
+    try:
+        descomponer(valor)
+        return True
+    except ValueError:
+        return False
+
+# ==================== API ====================
+
+def hash_password(password, algoritmo=None):
+    """Convierte la contraseña en hash con el formato algoritmo$parametros$salt$hash"""
+    algoritmo = algoritmo or ALGORITMO
+    parametros = parametros_actuales(algoritmo)
+    salt = secrets.token_bytes(16)
+    valor = ALGORITMOS[algoritmo](password, salt, parametros)
+    return f"{algoritmo}${_codificar_parametros(parametros)}${salt.hex()}${valor.hex()}"
+
+def verify_password(password, stored_hash):
+    """Verifica la contraseña contra un hash nuevo o heredado en tiempo constante"""
+    try:
+        algoritmo, parametros, salt, esperado = descomponer(stored_hash)
+        funcion = _pbkdf2_sha256 if algoritmo == 'legado' else ALGORITMOS[algoritmo]
+        return hmac.compare_digest(funcion(password, salt, parametros), esperado)
+    except (ValueError, KeyError, TypeError):
+        return False
+
+def necesita_rehash(stored_hash):
+    """Indica si el hash usa un formato, algoritmo o costo distinto al vigente"""
+    try:
+        algoritmo, parametros, _, _ = descomponer(stored_hash)
+    except ValueError:
+        return True
+    return algoritmo != ALGORITMO or parametros != parametros_actuales()
+
+# ==================== CALIBRACIÓN ====================
+
+def _medir_ms(algoritmo, parametros, repeticiones):
+    salt = secrets.token_bytes(16)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        ALGORITMOS[algoritmo]('contraseña de prueba', salt, parametros)
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+def calibrar(objetivo_ms=250, algoritmo='pbkdf2_sha256', repeticiones=3):
+    """Busca el costo más alto cuya verificación no supera objetivo_ms en este equipo.
+
+    Retorna (parámetros, ms medidos). PBKDF2 escala linealmente con las
+    iteraciones; scrypt se ajusta en potencias de 2 de 'n'.
+    """
+    if algoritmo == 'scrypt':
+        parametros = dict(PARAMETROS_SCRYPT, n=2 ** 10)
+        ms = _medir_ms(algoritmo, parametros, repeticiones)
+        while True:
+            siguiente = dict(parametros, n=parametros['n'] * 2)
+            ms_siguiente = _medir_ms(algoritmo, siguiente, repeticiones)
+            if ms_siguiente > objetivo_ms:
+                return parametros, ms
+            parametros, ms = siguiente, ms_siguiente
+
+    # Estimación lineal a partir de una medición y luego verificación
+    base = 10000
+    ms_base = _medir_ms(algoritmo, {'i': base}, repeticiones)
+    iteraciones = max(base, int(base * objetivo_ms / ms_base) // 10000 * 10000)
+    ms = _medir_ms(algoritmo, {'i': iteraciones}, repeticiones)
+    while ms > objetivo_ms and iteraciones > base:
+        iteraciones -= 10000
+        ms = _medir_ms(algoritmo, {'i': iteraciones}, repeticiones)
+    return {'i': iteraciones}, ms
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Calibra el costo del hash de contraseñas')
+    parser.add_argument('--objetivo-ms', type=float, default=250,
+                        help='latencia máxima de una verificación (por defecto 250 ms)')
+    parser.add_argument('--algoritmo', choices=sorted(ALGORITMOS), default='pbkdf2_sha256')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    actuales = parametros_actuales(args.algoritmo)
+    ms_actual = _medir_ms(args.algoritmo, actuales, args.repeticiones)
+    print(f"⏱️  Parámetros vigentes {_codificar_parametros(actuales)}: {ms_actual:.1f} ms")
+
+    parametros, ms = calibrar(args.objetivo_ms, args.algoritmo, args.repeticiones)
+    print(f"✅ Recomendado para {args.objetivo_ms:.0f} ms: {_codificar_parametros(parametros)} ({ms:.1f} ms)")
+    if args.algoritmo == 'scrypt':
+        print(f"💡 Ajusta ALGORITMO = 'scrypt' y PARAMETROS_SCRYPT = {parametros} en contrasenas.py")
+    else:
+        print(f"💡 Ajusta ITERACIONES_PBKDF2 = {parametros['i']} en contrasenas.py")
@@ -1,101 +1,20 @@
 import sqlite3
 from datetime import datetime, timedelta
-import hashlib
-import secrets
+import threading
+import time
+from flask import g, has_app_context
+from migraciones import aplicar_migraciones
+from contrasenas import hash_password, verify_password
+from metricas import CursorMedido
+
+DB_PATH = 'clinic.db'
 
 def init_db():
     """Inicializa la base de datos con todas las tablas necesarias"""
-    conn = sqlite3.connect('clinic.db')
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
-    # Tabla de usuarios
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            nombre TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            rol TEXT NOT NULL CHECK(rol IN ('admin', 'doctor')),
-            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            activo INTEGER DEFAULT 1
-        )
-    ''')
-    print("✓ Tabla usuarios creada")
-    
-    # Tabla de pacientes
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pacientes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            especie TEXT NOT NULL,
-            raza TEXT,
-            edad INTEGER,
-            peso REAL,
-            color TEXT,
-            sexo TEXT CHECK(sexo IN ('M', 'F')),
-            nombre_dueno TEXT NOT NULL,
-            telefono_dueno TEXT NOT NULL,
-            email_dueno TEXT,
-            direccion_dueno TEXT,
-            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            notas TEXT
-        )
-    ''')
-    print("✓ Tabla pacientes creada")
-    
-    # Tabla de consultas
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS consultas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            paciente_id INTEGER NOT NULL,
-            doctor_id INTEGER NOT NULL,
-            fecha_consulta TIMESTAMP NOT NULL,
-            motivo TEXT NOT NULL,
-            diagnostico TEXT,
-            tratamiento TEXT,
-            medicamentos TEXT,
-            proxima_cita TIMESTAMP,
-            estado TEXT CHECK(estado IN ('pendiente', 'completada', 'cancelada')) DEFAULT 'pendiente',
-            costo REAL,
-            FOREIGN KEY (paciente_id) REFERENCES pacientes (id),
-            FOREIGN KEY (doctor_id) REFERENCES usuarios (id)
-        )
-    ''')
-    print("✓ Tabla consultas creada")
-    
-    # Tabla de historial médico
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS historial_medico (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            paciente_id INTEGER NOT NULL,
-            consulta_id INTEGER,
-            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            tipo TEXT NOT NULL CHECK(tipo IN ('consulta', 'vacuna', 'cirugia', 'analisis', 'otro')),
-            descripcion TEXT NOT NULL,
-            doctor_id INTEGER,
-            archivo_adjunto TEXT,
-            FOREIGN KEY (paciente_id) REFERENCES pacientes (id),
-            FOREIGN KEY (consulta_id) REFERENCES consultas (id),
-            FOREIGN KEY (doctor_id) REFERENCES usuarios (id)
-        )
-    ''')
-    print("✓ Tabla historial_medico creada")
-    
-    # Tabla de mantenimiento
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS mantenimiento_sistema (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            titulo TEXT NOT NULL,
-            descripcion TEXT NOT NULL,
-            tipo TEXT CHECK(tipo IN ('actualizacion', 'mantenimiento', 'backup', 'error')) NOT NULL,
-            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            realizado_por INTEGER,
-            estado TEXT CHECK(estado IN ('pendiente', 'en_proceso', 'completado')) DEFAULT 'pendiente',
-            FOREIGN KEY (realizado_por) REFERENCES usuarios (id)
-        )
-    ''')
-    print("✓ Tabla mantenimiento_sistema creada")
+    crear_tablas(cursor)
     
     # ==================== DATOS DE PRUEBA ====================
     
@@ -107,16 +26,12 @@ def init_db():
         ('dr.rodriguez', hash_password('DrRodriguez123!'), 'Dr. Luis Rodríguez', 'lrodriguez@vetclinic.com', 'doctor')
     ]
     
-    for usuario in usuarios_ejemplo:
-        try:
-            cursor.execute(
-                '''INSERT OR IGNORE INTO usuarios 
-                (username, password, nombre, email, rol) 
-                VALUES (?, ?, ?, ?, ?)''',
-                usuario
-            )
-        except Exception as e:
-            print(f"Error insertando usuario {usuario[0]}: {e}")
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO usuarios 
+        (username, password, nombre, email, rol) 
+        VALUES (?, ?, ?, ?, ?)''',
+        usuarios_ejemplo
+    )
     print("✓ Usuarios de prueba insertados")
     
     # Insertar pacientes de prueba
@@ -142,17 +57,13 @@ def init_db():
          'Activo, necesita ejercicio diario')
     ]
     
-    for paciente in pacientes_ejemplo:
-        try:
-            cursor.execute(
-                '''INSERT OR IGNORE INTO pacientes 
-                (nombre, especie, raza, edad, peso, color, sexo, nombre_dueno, 
-                 telefono_dueno, email_dueno, direccion_dueno, notas) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                paciente
-            )
-        except Exception as e:
-            print(f"Error insertando paciente {paciente[0]}: {e}")
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO pacientes 
+        (nombre, especie, raza, edad, peso, color, sexo, nombre_dueno, 
+         telefono_dueno, email_dueno, direccion_dueno, notas) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        pacientes_ejemplo
+    )
     print("✓ Pacientes de prueba insertados")
     
     # Insertar consultas de prueba
@@ -181,17 +92,13 @@ def init_db():
          'pendiente', 950.00)
     ]
     
-    for consulta in consultas_ejemplo:
-        try:
-            cursor.execute(
-                '''INSERT OR IGNORE INTO consultas 
-                (paciente_id, doctor_id, fecha_consulta, motivo, diagnostico, 
-                 tratamiento, medicamentos, proxima_cita, estado, costo) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                consulta
-            )
-        except Exception as e:
-            print(f"Error insertando consulta: {e}")
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO consultas 
+        (paciente_id, doctor_id, fecha_consulta, motivo, diagnostico, 
+         tratamiento, medicamentos, proxima_cita, estado, costo) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        consultas_ejemplo
+    )
     print("✓ Consultas de prueba insertadas")
     
     # Insertar historial médico de prueba
@@ -218,16 +125,12 @@ def init_db():
          'Análisis de sangre rutinario - resultados normales', 2, 'analisis_sangre.pdf')
     ]
     
-    for historial in historial_ejemplo:
-        try:
-            cursor.execute(
-                '''INSERT OR IGNORE INTO historial_medico 
-                (paciente_id, consulta_id, fecha, tipo, descripcion, doctor_id, archivo_adjunto) 
-                VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                historial
-            )
-        except Exception as e:
-            print(f"Error insertando historial médico: {e}")
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO historial_medico 
+        (paciente_id, consulta_id, fecha, tipo, descripcion, doctor_id, archivo_adjunto) 
+        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        historial_ejemplo
+    )
     print("✓ Historial médico de prueba insertado")
     
     # Insertar registros de mantenimiento de prueba
@@ -248,52 +151,292 @@ def init_db():
          'actualizacion', '2024-01-05 14:00:00', 1, 'completado')
     ]
     
-    for mantenimiento in mantenimiento_ejemplo:
-        try:
-            cursor.execute(
-                '''INSERT OR IGNORE INTO mantenimiento_sistema 
-                (titulo, descripcion, tipo, fecha, realizado_por, estado) 
-                VALUES (?, ?, ?, ?, ?, ?)''',
-                mantenimiento
-            )
-        except Exception as e:
-            print(f"Error insertando registro de mantenimiento: {e}")
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO mantenimiento_sistema 
+        (titulo, descripcion, tipo, fecha, realizado_por, estado) 
+        VALUES (?, ?, ?, ?, ?, ?)''',
+        mantenimiento_ejemplo
+    )
     print("✓ Registros de mantenimiento insertados")
     
     conn.commit()
+    
+    # Aplicar migraciones de esquema (índices, etc.)
+    aplicar_migraciones(conn)
+    
     conn.close()
     print("\n✅ Base de datos inicializada exitosamente con datos de prueba!")
 
-def get_db_connection():
-    """Crea y retorna una conexión a la base de datos"""
-    conn = sqlite3.connect('clinic.db')
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def hash_password(password):
-    """Convierte la contraseña en hash seguro"""
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    )
-    return f"{salt}:{password_hash.hex()}"
+def crear_tablas(cursor):
+    """Crea las tablas base del sistema (sin datos de prueba)"""
+    # Tabla de usuarios
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            nombre TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            rol TEXT NOT NULL CHECK(rol IN ('admin', 'doctor')),
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            activo INTEGER DEFAULT 1
+        )
+    ''')
+    print("✓ Tabla usuarios creada")
+    
+    # Tabla de pacientes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pacientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            especie TEXT NOT NULL,
+            raza TEXT,
+            edad INTEGER,
+            peso REAL,
+            color TEXT,
+            sexo TEXT CHECK(sexo IN ('M', 'F')),
+            nombre_dueno TEXT NOT NULL,
+            telefono_dueno TEXT NOT NULL,
+            email_dueno TEXT,
+            direccion_dueno TEXT,
+            fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notas TEXT
+        )
+    ''')
+    print("✓ Tabla pacientes creada")
+    
+    # Tabla de consultas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS consultas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER NOT NULL,
+            doctor_id INTEGER NOT NULL,
+            fecha_consulta TIMESTAMP NOT NULL,
+            motivo TEXT NOT NULL,
+            diagnostico TEXT,
+            tratamiento TEXT,
+            medicamentos TEXT,
+            proxima_cita TIMESTAMP,
+            estado TEXT CHECK(estado IN ('pendiente', 'completada', 'cancelada')) DEFAULT 'pendiente',
+            costo REAL,
+            FOREIGN KEY (paciente_id) REFERENCES pacientes (id),
+            FOREIGN KEY (doctor_id) REFERENCES usuarios (id)
+        )
+    ''')
+    print("✓ Tabla consultas creada")
+    
+    # Tabla de historial médico
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS historial_medico (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            paciente_id INTEGER NOT NULL,
+            consulta_id INTEGER,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            tipo TEXT NOT NULL CHECK(tipo IN ('consulta', 'vacuna', 'cirugia', 'analisis', 'otro')),
+            descripcion TEXT NOT NULL,
+            doctor_id INTEGER,
+            archivo_adjunto TEXT,
+            FOREIGN KEY (paciente_id) REFERENCES pacientes (id),
+            FOREIGN KEY (consulta_id) REFERENCES consultas (id),
+            FOREIGN KEY (doctor_id) REFERENCES usuarios (id)
+        )
+    ''')
+    print("✓ Tabla historial_medico creada")
+    
+    # Tabla de mantenimiento
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mantenimiento_sistema (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo TEXT NOT NULL,
+            descripcion TEXT NOT NULL,
+            tipo TEXT CHECK(tipo IN ('actualizacion', 'mantenimiento', 'backup', 'error')) NOT NULL,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            realizado_por INTEGER,
+            estado TEXT CHECK(estado IN ('pendiente', 'en_proceso', 'completado')) DEFAULT 'pendiente',
+            FOREIGN KEY (realizado_por) REFERENCES usuarios (id)
+        )
+    ''')
+    print("✓ Tabla mantenimiento_sistema creada")
 
-def verify_password(password, stored_hash):
-    """Verifica si la contraseña coincide con el hash almacenado"""
+def actualizar_esquema():
+    """Aplica las migraciones pendientes sobre una base de datos existente"""
+    conn = sqlite3.connect(DB_PATH)
     try:
-        salt, stored_password_hash = stored_hash.split(':')
-        password_hash = hashlib.pbkdf2_hmac(
-            'sha256',
-            password.encode('utf-8'),
-            salt.encode('utf-8'),
-            100000
-        )
-        return password_hash.hex() == stored_password_hash
-    except:
-        return False
+        return aplicar_migraciones(conn)
+    finally:
+        conn.close()
+
+# ==================== POOL DE CONEXIONES ====================
+
+class ConexionPool(sqlite3.Connection):
+    """Conexión SQLite que vuelve al pool en lugar de cerrarse"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = None
+        self._en_contexto = False
+
+    def cursor(self, factory=CursorMedido):
+        """Cursor instrumentado: cada sentencia queda registrada en las métricas"""
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def close(self):
+        """Descarta cambios sin confirmar y devuelve la conexión al pool"""
+        if self._pool is None:
+            super().close()
+            return
+        if self.in_transaction:
+            self.rollback()
+        # Dentro de una petición la conexión se libera en el teardown
+        if not self._en_contexto:
+            self._pool.liberar(self)
+
+    def cerrar_definitivamente(self):
+        """Cierra la conexión física con SQLite"""
+        super().close()
+
+
+class PoolConexiones:
+    """Pool acotado de conexiones SQLite configuradas una sola vez"""
+
+    def __init__(self, ruta=DB_PATH, max_conexiones=8, timeout=10.0, busy_timeout_ms=5000):
+        self.ruta = ruta
+        self.max_conexiones = max_conexiones
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self._libres = []
+        self._creadas = 0
+        self._condicion = threading.Condition()
+        self._checkouts = 0
+        self._esperas = 0
+        self._tiempo_espera_total = 0.0
+        self._tiempo_espera_max = 0.0
+
+    def _crear_conexion(self):
+        """Abre una conexión nueva y aplica los PRAGMA del pool"""
+        conn = sqlite3.connect(self.ruta, timeout=self.busy_timeout_ms / 1000,
+                               check_same_thread=False, factory=ConexionPool)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn._pool = self
+        return conn
+
+    def obtener(self):
+        """Entrega una conexión libre, creando o esperando si hace falta"""
+        inicio = time.perf_counter()
+        with self._condicion:
+            while not self._libres and self._creadas >= self.max_conexiones:
+                restante = self.timeout - (time.perf_counter() - inicio)
+                if restante <= 0:
+                    raise TimeoutError('No hay conexiones disponibles en el pool')
+                self._condicion.wait(restante)
+
+            if self._libres:
+                conn = self._libres.pop()
+            else:
+                self._creadas += 1
+                conn = None
+
+            espera = time.perf_counter() - inicio
+            self._checkouts += 1
+            if espera > 0.001:
+                self._esperas += 1
+            self._tiempo_espera_total += espera
+            self._tiempo_espera_max = max(self._tiempo_espera_max, espera)
+
+        if conn is None:
+            try:
+                conn = self._crear_conexion()
+            except Exception:
+                with self._condicion:
+                    self._creadas -= 1
+                    self._condicion.notify()
+                raise
+        return conn
+
+    def liberar(self, conn):
+        """Devuelve una conexión al pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        conn._en_contexto = False
+        with self._condicion:
+            self._libres.append(conn)
+            self._condicion.notify()
+
+    def cerrar_todas(self):
+        """Cierra las conexiones libres (las prestadas se cierran al devolverse)"""
+        with self._condicion:
+            for conn in self._libres:
+                conn.cerrar_definitivamente()
+            self._creadas -= len(self._libres)
+            self._libres = []
+
+    def estadisticas(self):
+        """Retorna métricas de uso del pool"""
+        with self._condicion:
+            return {
+                'ruta': self.ruta,
+                'max_conexiones': self.max_conexiones,
+                'conexiones_creadas': self._creadas,
+                'conexiones_libres': len(self._libres),
+                'conexiones_en_uso': self._creadas - len(self._libres),
+                'checkouts': self._checkouts,
+                'esperas': self._esperas,
+                'tiempo_espera_total_ms': round(self._tiempo_espera_total * 1000, 3),
+                'tiempo_espera_max_ms': round(self._tiempo_espera_max * 1000, 3),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def configurar_pool(ruta=DB_PATH, **opciones):
+    """Reemplaza el pool global (por ejemplo, para apuntar a otra base de datos)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar_todas()
+        _pool = PoolConexiones(ruta, **opciones)
+    return _pool
+
+def obtener_pool():
+    """Retorna el pool global, creándolo la primera vez"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexiones(DB_PATH)
+    return _pool
+
+def get_db_connection():
+    """Retorna una conexión del pool (la misma durante toda una petición Flask)"""
+    if has_app_context():
+        conn = g.get('_conexion_db')
+        if conn is None:
+            conn = obtener_pool().obtener()
+            conn._en_contexto = True
+            g._conexion_db = conn
+        return conn
+    return obtener_pool().obtener()
+
+def liberar_conexion_contexto(exception=None):
+    """Devuelve al pool la conexión de la petición (usar en teardown_appcontext)"""
+    conn = g.pop('_conexion_db', None)
+    if conn is not None:
+        conn._pool.liberar(conn)
+
+def estadisticas_pool():
+    """Retorna las métricas del pool global"""
+    return obtener_pool().estadisticas()
 
 # ==================== FUNCIONES AUXILIARES ====================
 
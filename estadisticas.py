@@ -0,0 +1,112 @@
+# estadisticas.py
+from rangos_fecha import rango_mes, filtro_rango
+
+# ==================== DASHBOARD ADMIN ====================
+
+def estadisticas_admin(conn, mes=None):
+    """Lee las cifras del dashboard admin desde stats_counters"""
+    mes = mes or rango_mes()[0][:7]
+    cursor = conn.cursor()
+    cursor.execute('''
+        WITH totales AS (
+            SELECT
+                (SELECT COALESCE(SUM(valor), 0) FROM stats_counters
+                 WHERE tipo = 'pacientes') AS total_pacientes,
+                (SELECT COALESCE(SUM(valor), 0) FROM stats_counters
+                 WHERE tipo = 'consultas' AND mes = ?) AS consultas_mes
+        ),
+        medicos AS (
+            SELECT u.id, u.nombre, COALESCE(SUM(s.valor), 0) AS total_consultas
+            FROM usuarios u
+            LEFT JOIN stats_counters s ON s.tipo = 'consultas' AND s.doctor_id = u.id
+            WHERE u.rol = 'doctor' AND u.activo = 1
+            GROUP BY u.id, u.nombre
+        )
+        SELECT t.total_pacientes, t.consultas_mes, m.id, m.nombre, m.total_consultas
+        FROM totales t
+        LEFT JOIN medicos m
+        ORDER BY m.total_consultas DESC
+    ''', (mes,))
+    return _armar_estadisticas_admin(cursor.fetchall())
+
+def estadisticas_admin_en_vivo(conn, rango=None):
+    """Calcula las cifras del dashboard admin en una sola consulta sobre las tablas"""
+    en_rango, params = filtro_rango('fecha_consulta', rango or rango_mes())
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        WITH totales AS (
+            SELECT
+                (SELECT COUNT(*) FROM pacientes) AS total_pacientes,
+                (SELECT COUNT(*) FROM consultas
+                 WHERE {en_rango}) AS consultas_mes
+        ),
+        medicos AS (
+            SELECT u.id, u.nombre, COUNT(c.id) AS total_consultas
+            FROM usuarios u
+            LEFT JOIN consultas c ON u.id = c.doctor_id
+            WHERE u.rol = 'doctor' AND u.activo = 1
+            GROUP BY u.id, u.nombre
+        )
+        SELECT t.total_pacientes, t.consultas_mes, m.id, m.nombre, m.total_consultas
+        FROM totales t
+        LEFT JOIN medicos m
+        ORDER BY m.total_consultas DESC
+    ''', params)
+    return _armar_estadisticas_admin(cursor.fetchall())
+
+def _armar_estadisticas_admin(filas):
+    medicos = [{'nombre': f['nombre'], 'consultas': f['total_consultas'] or 0}
+               for f in filas if f['id'] is not None]
+    return {
+        'pacientes': filas[0]['total_pacientes'],
+        'consultas_mes': filas[0]['consultas_mes'],
+        'doctores': len(medicos),
+        'medicos': medicos
+    }
+
+# ==================== DASHBOARD DOCTOR ====================
+
+def estadisticas_doctor(conn, doctor_id, mes=None):
+    """Lee las cifras del dashboard de un doctor desde stats_counters"""
+    mes = mes or rango_mes()[0][:7]
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT
+            COALESCE(SUM(CASE WHEN tipo = 'consultas' THEN valor END), 0) AS total_consultas,
+            COALESCE(SUM(CASE WHEN tipo = 'pacientes_doctor' THEN valor END), 0) AS pacientes,
+            COALESCE(SUM(CASE WHEN tipo = 'consultas' AND mes = ? THEN valor END), 0) AS consultas_mes
+        FROM stats_counters
+        WHERE tipo IN ('consultas', 'pacientes_doctor') AND doctor_id = ?
+    ''', (mes, doctor_id))
+    return dict(cursor.fetchone())
+
+def estadisticas_doctor_en_vivo(conn, doctor_id, rango=None):
+    """Calcula las cifras del dashboard de un doctor sobre las tablas"""
+    en_rango, params = filtro_rango('fecha_consulta', rango or rango_mes())
+    cursor = conn.cursor()
+    # Cada subconsulta usa su propio índice; un SUM(CASE ...) sobre todas las
+    # filas del doctor obligaría a recorrerlas aunque el rango sea pequeño
+    cursor.execute(f'''
+        SELECT
+            (SELECT COUNT(*) FROM consultas
+             WHERE doctor_id = ?) AS total_consultas,
+            (SELECT COUNT(DISTINCT paciente_id) FROM consultas
+             WHERE doctor_id = ?) AS pacientes,
+            (SELECT COUNT(*) FROM consultas
+             WHERE doctor_id = ?
+             AND {en_rango}) AS consultas_mes
+    ''', (doctor_id, doctor_id, doctor_id, *params))
+    return dict(cursor.fetchone())
+
+def consultas_recientes_doctor(conn, doctor_id, limite=5):
+    """Obtiene las últimas consultas de un doctor con datos del paciente"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT c.*, p.nombre as paciente_nombre, p.especie
+        FROM consultas c
+        JOIN pacientes p ON c.paciente_id = p.id
+        WHERE c.doctor_id = ?
+        ORDER BY c.fecha_consulta DESC
+        LIMIT ?
+    ''', (doctor_id, limite))
+    return [dict(c) for c in cursor.fetchall()]
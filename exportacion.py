@@ -0,0 +1,89 @@
+# exportacion.py
+import csv
+import io
+import json
+import zlib
+
+from rangos_fecha import rango_dias, filtro_rango
+
+TAMANO_LOTE = 1000
+
+# tabla expuesta -> (tabla real, columna de fecha, filtro por doctor)
+EXPORTABLES = {
+    'pacientes': ('pacientes', 'fecha_registro',
+                  'EXISTS (SELECT 1 FROM consultas c WHERE c.paciente_id = t.id AND c.doctor_id = ?)'),
+    'consultas': ('consultas', 'fecha_consulta', 't.doctor_id = ?'),
+    'historial': ('historial_medico', 'fecha', 't.doctor_id = ?'),
+}
+
+def construir_consulta(tabla, desde=None, hasta=None, doctor_id=None):
+    """Arma el SELECT de exportación; 'desde' y 'hasta' son fechas inclusivas (YYYY-MM-DD)"""
+    tabla_real, columna_fecha, filtro_doctor = EXPORTABLES[tabla]
+    condiciones = []
+    params = []
+
+    # Rango semiabierto [desde, hasta + 1 día)
+    en_rango, params_rango = filtro_rango(f't.{columna_fecha}', rango_dias(desde, hasta))
+    if en_rango:
+        condiciones.append(en_rango)
+        params.extend(params_rango)
+
+    if doctor_id is not None:
+        condiciones.append(filtro_doctor)
+        params.append(int(doctor_id))
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    return f'SELECT t.* FROM {tabla_real} t {where} ORDER BY t.id', params
+
+def iterar_lotes(conn, sql, params, tamano_lote=TAMANO_LOTE):
+    """Recorre el resultado con fetchmany: nunca hay más de un lote en memoria"""
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    columnas = [d[0] for d in cursor.description]
+    yield columnas
+    while True:
+        filas = cursor.fetchmany(tamano_lote)
+        if not filas:
+            break
+        yield filas
+
+def formatear_ndjson(lotes):
+    """Convierte los lotes en bloques de texto NDJSON (una fila por línea)"""
+    columnas = next(lotes)
+    for filas in lotes:
+        yield ''.join(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + '\n'
+                      for fila in filas)
+
+def formatear_csv(lotes):
+    """Convierte los lotes en bloques de texto CSV con encabezado"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(next(lotes))
+    for filas in lotes:
+        escritor.writerows(tuple(fila) for fila in filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def codificar(bloques, comprimir=False):
+    """Codifica a UTF-8 y, si se pide, comprime en streaming con gzip"""
+    if not comprimir:
+        for bloque in bloques:
+            yield bloque.encode('utf-8')
+        return
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for bloque in bloques:
+        datos = compresor.compress(bloque.encode('utf-8'))
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+def exportar(conn, tabla, formato='ndjson', desde=None, hasta=None, doctor_id=None,
+             comprimir=False, tamano_lote=TAMANO_LOTE):
+    """Generador de bytes con la exportación completa de una tabla"""
+    sql, params = construir_consulta(tabla, desde, hasta, doctor_id)
+    lotes = iterar_lotes(conn, sql, params, tamano_lote)
+    bloques = formatear_csv(lotes) if formato == 'csv' else formatear_ndjson(lotes)
+    return codificar(bloques, comprimir)
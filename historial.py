@@ -0,0 +1,97 @@
+# historial.py
+from paginacion import codificar_cursor, decodificar_cursor
+
+# Línea de tiempo de un paciente: consultas y entradas de historial médico en
+# una sola consulta UNION ALL, paginada por keyset sobre (fecha, origen, id).
+# 'origen' ('c' consulta, 'h' historial) desempata los ids, que se repiten
+# entre tablas. Cada rama lee solo su página desde el índice (paciente_id, fecha).
+
+def _condicion_keyset(columna, origen, clave):
+    """Filtro de una rama para las filas posteriores a 'clave' en orden descendente"""
+    if clave is None:
+        return '', []
+    fecha, origen_clave, evento_id = clave
+    if origen == origen_clave:
+        return f'AND {columna} <= ? AND ({columna} < ? OR id < ?)', [fecha, fecha, evento_id]
+    if origen < origen_clave:
+        return f'AND {columna} <= ?', [fecha]
+    return f'AND {columna} < ?', [fecha]
+
+def version_linea_tiempo(conn, paciente_id):
+    """Versión de la línea de tiempo ('paciente.usuarios') o None si el paciente no existe"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT COALESCE(v.version, 0),
+               (SELECT version FROM usuarios_version WHERE id = 1)
+        FROM pacientes p
+        LEFT JOIN pacientes_version v ON v.paciente_id = p.id
+        WHERE p.id = ?
+    ''', (paciente_id,))
+    fila = cursor.fetchone()
+    return f'{fila[0]}.{fila[1]}' if fila else None
+
+def linea_tiempo(conn, paciente_id, cursor_pagina=None, limite=50):
+    """Eventos de un paciente del más reciente al más antiguo.
+
+    Las entradas de historial vinculadas a una consulta se muestran como esa
+    consulta. Los campos vacíos se omiten. Retorna (eventos, siguiente_cursor);
+    el cursor es None en la última página.
+    """
+    clave = decodificar_cursor(cursor_pagina, 3) if cursor_pagina else None
+    filtro_c, params_c = _condicion_keyset('fecha_consulta', 'c', clave)
+    filtro_h, params_h = _condicion_keyset('fecha', 'h', clave)
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT e.origen,
+               e.id,
+               e.fecha,
+               e.tipo,
+               u.nombre AS doctor,
+               e.motivo,
+               e.diagnostico,
+               e.tratamiento,
+               e.medicamentos,
+               e.costo,
+               e.estado,
+               e.descripcion,
+               e.adjunto
+        FROM (
+            SELECT * FROM (
+                SELECT 'c' AS origen, id, fecha_consulta AS fecha, 'consulta' AS tipo, doctor_id,
+                       motivo, diagnostico, tratamiento, medicamentos, costo, estado,
+                       NULL AS descripcion, NULL AS adjunto
+                FROM consultas
+                WHERE paciente_id = ? {filtro_c}
+                ORDER BY fecha_consulta DESC, id DESC
+                LIMIT ?
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'h', id, fecha, tipo, doctor_id,
+                       NULL, diagnostico, NULL, NULL, NULL, NULL,
+                       descripcion, archivo_adjunto
+                FROM historial_medico
+                WHERE paciente_id = ? AND consulta_id IS NULL {filtro_h}
+                ORDER BY fecha DESC, id DESC
+                LIMIT ?
+            )
+        ) e
+        LEFT JOIN usuarios u ON u.id = e.doctor_id
+        ORDER BY e.fecha DESC, e.origen DESC, e.id DESC
+        LIMIT ?
+    ''', [paciente_id, *params_c, limite + 1, paciente_id, *params_h, limite + 1, limite + 1])
+    filas = cursor.fetchall()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima['fecha'], ultima['origen'], ultima['id'])
+
+    eventos = []
+    for fila in filas:
+        evento = {campo: valor for campo, valor in zip(fila.keys(), fila) if valor is not None}
+        evento['origen'] = 'consulta' if fila['origen'] == 'c' else 'historial'
+        eventos.append(evento)
+    return eventos, siguiente
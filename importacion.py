@@ -0,0 +1,304 @@
+# importacion.py
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from rangos_fecha import FORMATO_FECHA
+
+TAMANO_LOTE = 1000
+MAX_ERRORES_EN_MEMORIA = 1000
+FORMATOS_ENTRADA = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M')
+
+# ==================== VALIDACIÓN ====================
+
+def _texto(valor):
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+def _entero(valor):
+    valor = _texto(valor)
+    return None if valor is None else int(valor)
+
+def _real(valor):
+    valor = _texto(valor)
+    return None if valor is None else float(valor)
+
+def _fecha(valor):
+    valor = _texto(valor)
+    if valor is None:
+        return None
+    # Las dos formas que guarda la aplicación: solo fecha ('YYYY-MM-DD', del
+    # formulario de consultas) o FORMATO_FECHA; la agenda y los rangos
+    # comparan las fechas como texto en esas formas
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        pass
+    # Con hora: 'YYYY-MM-DD HH:MM[:SS]' o con 'T', guardada como FORMATO_FECHA
+    for formato in FORMATOS_ENTRADA:
+        try:
+            return datetime.strptime(valor, formato).strftime(FORMATO_FECHA)
+        except ValueError:
+            pass
+    raise ValueError('usar YYYY-MM-DD o YYYY-MM-DD HH:MM[:SS]')
+
+def _opcion(*opciones):
+    def validar(valor):
+        valor = _texto(valor)
+        if valor is not None and valor not in opciones:
+            raise ValueError(f"debe ser uno de: {', '.join(opciones)}")
+        return valor
+    return validar
+
+# tabla -> lista de (columna, conversor, requerida); refleja los NOT NULL y CHECK del esquema
+ESQUEMAS = {
+    'pacientes': [
+        ('id', _entero, False),
+        ('nombre', _texto, True),
+        ('especie', _texto, True),
+        ('raza', _texto, False),
+        ('edad', _entero, False),
+        ('peso', _real, False),
+        ('color', _texto, False),
+        ('sexo', _opcion('M', 'F'), False),
+        ('nombre_dueno', _texto, True),
+        ('telefono_dueno', _texto, True),
+        ('email_dueno', _texto, False),
+        ('direccion_dueno', _texto, False),
+        ('notas', _texto, False),
+    ],
+    'consultas': [
+        ('id', _entero, False),
+        ('paciente_id', _entero, True),
+        ('doctor_id', _entero, True),
+        ('fecha_consulta', _fecha, True),
+        ('motivo', _texto, True),
+        ('diagnostico', _texto, False),
+        ('tratamiento', _texto, False),
+        ('medicamentos', _texto, False),
+        ('proxima_cita', _fecha, False),
+        ('estado', _opcion('pendiente', 'completada', 'cancelada'), False),
+        ('costo', _real, False),
+    ],
+}
+
+# Claves foráneas que se validan por lote antes de insertar
+REFERENCIAS = {
+    'consultas': [('paciente_id', 'pacientes'), ('doctor_id', 'usuarios')],
+}
+
+def validar_fila(tabla, fila):
+    """Convierte y valida una fila; retorna (valores, None) o (None, mensaje de error)"""
+    valores = []
+    for columna, conversor, requerida in ESQUEMAS[tabla]:
+        try:
+            valor = conversor(fila.get(columna))
+        except (TypeError, ValueError) as e:
+            return None, f"{columna}: valor inválido ({e})"
+        if requerida and valor is None:
+            return None, f"{columna}: campo requerido"
+        valores.append(valor)
+    # 'estado' tiene DEFAULT 'pendiente' en la tabla
+    if tabla == 'consultas' and valores[9] is None:
+        valores[9] = 'pendiente'
+    return tuple(valores), None
+
+# ==================== LECTURA ====================
+
+def leer_filas(archivo, formato):
+    """Genera (número de línea, dict) desde un archivo de texto CSV o NDJSON"""
+    if formato == 'csv':
+        lector = csv.DictReader(archivo)
+        for fila in lector:
+            yield lector.line_num, fila
+    else:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                fila = None
+            yield numero, fila if isinstance(fila, dict) else {'__invalida__': linea}
+
+# ==================== IMPORTACIÓN ====================
+
+def _filtrar_referencias(conn, tabla, lote, errores):
+    """Descarta las filas del lote cuyas claves foráneas no existen"""
+    for columna, tabla_ref in REFERENCIAS.get(tabla, []):
+        indice = [c for c, _, _ in ESQUEMAS[tabla]].index(columna)
+        ids = sorted({valores[indice] for _, valores in lote})
+        existentes = set()
+        for inicio in range(0, len(ids), 500):
+            parte = ids[inicio:inicio + 500]
+            marcadores = ','.join('?' * len(parte))
+            existentes.update(r[0] for r in conn.execute(
+                f'SELECT id FROM {tabla_ref} WHERE id IN ({marcadores})', parte))
+        validas = []
+        for linea, valores in lote:
+            if valores[indice] in existentes:
+                validas.append((linea, valores))
+            else:
+                errores.append((linea, f"{columna}: no existe {tabla_ref}.id = {valores[indice]}"))
+        lote = validas
+    return lote
+
+def _insertar_lote(conn, sql, lote, errores):
+    """Inserta un lote en una transacción; si falla, reintenta fila por fila"""
+    try:
+        conn.execute('BEGIN')
+        conn.executemany(sql, [valores for _, valores in lote])
+        conn.commit()
+        return len(lote)
+    except sqlite3.DatabaseError:
+        conn.rollback()
+
+    insertadas = 0
+    conn.execute('BEGIN')
+    for linea, valores in lote:
+        try:
+            conn.execute('SAVEPOINT fila')
+            conn.execute(sql, valores)
+            conn.execute('RELEASE fila')
+            insertadas += 1
+        except sqlite3.DatabaseError as e:
+            conn.execute('ROLLBACK TO fila')
+            conn.execute('RELEASE fila')
+            errores.append((linea, str(e)))
+    conn.commit()
+    return insertadas
+
+def importar(conn, tabla, filas, tamano_lote=TAMANO_LOTE, desde_linea=0,
+             al_confirmar=None, al_error=None):
+    """Importa filas (número de línea, dict) en lotes con executemany.
+
+    Las filas con línea <= desde_linea se omiten (reanudación). Después de
+    confirmar cada lote se llama al_confirmar(última_línea). Los errores se
+    pasan a al_error(línea, mensaje) si se indica y se resumen en el resultado.
+    """
+    columnas = [c for c, _, _ in ESQUEMAS[tabla]]
+    sql = (f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+           f"VALUES ({', '.join('?' * len(columnas))})")
+    # Un 'id' vacío deja que SQLite asigne uno nuevo
+
+    resumen = {'procesadas': 0, 'insertadas': 0, 'con_error': 0, 'errores': [],
+               'ultima_linea': desde_linea}
+    inicio = time.perf_counter()
+    lote = []
+    errores = []
+
+    def registrar_errores():
+        for linea, mensaje in errores:
+            resumen['con_error'] += 1
+            if al_error:
+                al_error(linea, mensaje)
+            if len(resumen['errores']) < MAX_ERRORES_EN_MEMORIA:
+                resumen['errores'].append({'linea': linea, 'error': mensaje})
+        errores.clear()
+
+    def confirmar_lote(ultima_linea):
+        validas = _filtrar_referencias(conn, tabla, lote, errores)
+        if validas:
+            resumen['insertadas'] += _insertar_lote(conn, sql, validas, errores)
+        registrar_errores()
+        resumen['ultima_linea'] = ultima_linea
+        if al_confirmar:
+            al_confirmar(ultima_linea)
+        lote.clear()
+
+    if conn.in_transaction:
+        conn.commit()
+
+    ultima_linea = desde_linea
+    for linea, fila in filas:
+        if linea <= desde_linea:
+            continue
+        ultima_linea = linea
+        resumen['procesadas'] += 1
+        if fila is None or '__invalida__' in fila:
+            errores.append((linea, 'fila con formato inválido'))
+        else:
+            valores, error = validar_fila(tabla, fila)
+            if error:
+                errores.append((linea, error))
+            else:
+                lote.append((linea, valores))
+        if len(lote) >= tamano_lote:
+            confirmar_lote(ultima_linea)
+
+    confirmar_lote(ultima_linea)
+
+    segundos = time.perf_counter() - inicio
+    resumen['segundos'] = round(segundos, 3)
+    resumen['filas_por_segundo'] = round(resumen['procesadas'] / segundos, 1) if segundos else 0.0
+    return resumen
+
+# ==================== CLI ====================
+
+def _leer_checkpoint(ruta, archivo, tabla):
+    if not ruta or not os.path.exists(ruta):
+        return 0
+    with open(ruta, encoding='utf-8') as f:
+        datos = json.load(f)
+    if datos.get('archivo') != os.path.abspath(archivo) or datos.get('tabla') != tabla:
+        return 0
+    return datos.get('ultima_linea', 0)
+
+def _guardar_checkpoint(ruta, archivo, tabla, ultima_linea):
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'archivo': os.path.abspath(archivo), 'tabla': tabla,
+                   'ultima_linea': ultima_linea}, f)
+    os.replace(temporal, ruta)
+
+def main():
+    parser = argparse.ArgumentParser(description='Importación masiva de pacientes o consultas')
+    parser.add_argument('tabla', choices=sorted(ESQUEMAS))
+    parser.add_argument('archivo')
+    parser.add_argument('--formato', choices=['csv', 'ndjson'])
+    parser.add_argument('--db', default='clinic.db')
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE)
+    parser.add_argument('--checkpoint', help='archivo para reanudar una importación interrumpida')
+    parser.add_argument('--errores', help='archivo NDJSON con el reporte de errores por fila')
+    args = parser.parse_args()
+
+    formato = args.formato or ('csv' if args.archivo.lower().endswith('.csv') else 'ndjson')
+    desde_linea = _leer_checkpoint(args.checkpoint, args.archivo, args.tabla)
+    if desde_linea:
+        print(f"⏩ Reanudando desde la línea {desde_linea + 1}")
+
+    conn = sqlite3.connect(args.db)
+    conn.execute('PRAGMA foreign_keys = ON')
+    reporte = open(args.errores, 'a', encoding='utf-8') if args.errores else None
+
+    def al_confirmar(ultima_linea):
+        if args.checkpoint:
+            _guardar_checkpoint(args.checkpoint, args.archivo, args.tabla, ultima_linea)
+
+    def al_error(linea, mensaje):
+        if reporte:
+            reporte.write(json.dumps({'linea': linea, 'error': mensaje}, ensure_ascii=False) + '\n')
+
+    try:
+        with open(args.archivo, encoding='utf-8', newline='') as archivo:
+            resumen = importar(conn, args.tabla, leer_filas(archivo, formato), args.lote,
+                               desde_linea, al_confirmar, al_error)
+    finally:
+        conn.close()
+        if reporte:
+            reporte.close()
+
+    print(f"\n📊 RESUMEN DE IMPORTACIÓN ({args.tabla}):")
+    print(f"   • Filas procesadas: {resumen['procesadas']}")
+    print(f"   • Insertadas: {resumen['insertadas']}")
+    print(f"   • Con error: {resumen['con_error']}")
+    print(f"   • Tiempo: {resumen['segundos']} s ({resumen['filas_por_segundo']} filas/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# mantenimiento.py
+
+DIAS_INACTIVIDAD = 730  # 24 meses sin consultas
+
+# Columnas permitidas para ordenar la lista de inactivos
+ORDENES_INACTIVOS = {
+    'inactividad': 'dias_inactivo',
+    'nombre': 'p.nombre',
+    'dueno': 'p.nombre_dueno',
+    'ultima_consulta': 'ultima_consulta',
+}
+
+def pacientes_inactivos(conn, orden='inactividad', direccion='desc', limite=50, offset=0,
+                        dias=DIAS_INACTIVIDAD):
+    """Obtiene una página de pacientes inactivos con su última consulta y médico.
+
+    Retorna (pacientes, total). Todo se resuelve en una sola consulta: la última
+    consulta de cada paciente sale del índice (paciente_id, fecha_consulta).
+    """
+    columna = ORDENES_INACTIVOS.get(orden, ORDENES_INACTIVOS['inactividad'])
+    direccion = 'ASC' if str(direccion).lower() == 'asc' else 'DESC'
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT p.*,
+               c.fecha_consulta AS ultima_consulta,
+               c.doctor_id,
+               COALESCE(u.nombre, 'No registrado') AS doctor_nombre,
+               julianday('now') - julianday(c.fecha_consulta) AS dias_inactivo,
+               ROUND((julianday('now') - julianday(c.fecha_consulta)) / 30.44, 1) AS meses_inactivo,
+               COUNT(*) OVER () AS total_inactivos
+        FROM pacientes p
+        LEFT JOIN consultas c ON c.id = (
+            SELECT c2.id FROM consultas c2
+            WHERE c2.paciente_id = p.id
+            ORDER BY c2.fecha_consulta DESC, c2.id DESC
+            LIMIT 1
+        )
+        LEFT JOIN usuarios u ON u.id = c.doctor_id
+        WHERE c.id IS NULL
+           OR julianday('now') - julianday(c.fecha_consulta) > ?
+        ORDER BY {columna} {direccion}, p.id
+        LIMIT ? OFFSET ?
+    ''', (dias, limite, offset))
+    filas = cursor.fetchall()
+
+    if not filas:
+        if offset == 0:
+            return [], 0
+        # Página fuera de rango: se necesita el total igualmente
+        _, total = pacientes_inactivos(conn, orden, direccion, 1, 0, dias)
+        return [], total
+
+    total = filas[0]['total_inactivos']
+    pacientes = []
+    for fila in filas:
+        paciente = dict(fila)
+        del paciente['total_inactivos']
+        if paciente['meses_inactivo'] is None:
+            paciente['meses_inactivo'] = 'N/A'
+        pacientes.append(paciente)
+    return pacientes, total
+
+# ==================== PURGA DE PACIENTES ====================
+
+# Cada lote es una transacción corta: entre lotes otras escrituras pueden tomar el lock
+TAMANO_LOTE_PURGA = 500
+# Por encima de esta cantidad la purga pasa a la cola de tareas
+UMBRAL_PURGA_EN_SEGUNDO_PLANO = 1000
+
+def eliminar_pacientes(conn, ids, tamano_lote=TAMANO_LOTE_PURGA, despues_de_lote=None):
+    """Elimina pacientes por lotes de DELETE ... WHERE id IN (...).
+
+    Las consultas e historial se borran por ON DELETE CASCADE (migración 10),
+    usando los índices por paciente_id. Cada lote se confirma por separado;
+    despues_de_lote(procesados, eliminados) se llama tras cada commit.
+    Retorna la cantidad de pacientes eliminados.
+    """
+    ids = sorted({int(i) for i in ids})
+    eliminados = 0
+    for inicio in range(0, len(ids), tamano_lote):
+        lote = ids[inicio:inicio + tamano_lote]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = conn.execute(
+                f"DELETE FROM pacientes WHERE id IN ({', '.join('?' * len(lote))})", lote)
+            eliminados += cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if despues_de_lote:
+            despues_de_lote(inicio + len(lote), eliminados)
+    return eliminados
+
@@ -0,0 +1,315 @@
+# metricas.py
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request, session
+
+# Límites (en segundos) de los buckets del histograma de latencia
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UMBRAL_LENTO_MS = 100       # sentencias más lentas que esto van al log de consultas lentas
+MAX_CONSULTAS_LENTAS = 200  # entradas que conserva el log en memoria
+
+# ==================== REGISTRO ====================
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+                break
+        self.suma += valor
+        self.total += 1
+
+    def acumulados(self):
+        total = 0
+        for limite, conteo in zip(self.buckets, self.conteos):
+            total += conteo
+            yield limite, total
+
+
+class RegistroMetricas:
+    """Métricas de peticiones y sentencias SQL del proceso"""
+
+    def __init__(self, umbral_lento_ms=UMBRAL_LENTO_MS, max_lentas=MAX_CONSULTAS_LENTAS):
+        self.umbral_lento = umbral_lento_ms / 1000
+        self._lock = threading.Lock()
+        self._latencias = {}     # (endpoint, método) -> Histograma
+        self._peticiones = {}    # (endpoint, método, estado) -> total
+        self._consultas_peticion = {}   # (endpoint, método) -> sentencias SQL de sus peticiones
+        self._sql = {}           # sentencia normalizada -> [ejecuciones, segundos, filas, lentas]
+        self._lentas = deque(maxlen=max_lentas)
+
+    def observar_peticion(self, endpoint, metodo, estado, segundos, consultas=0):
+        with self._lock:
+            histograma = self._latencias.get((endpoint, metodo))
+            if histograma is None:
+                histograma = self._latencias[(endpoint, metodo)] = Histograma()
+            histograma.observar(segundos)
+            clave = (endpoint, metodo, estado)
+            self._peticiones[clave] = self._peticiones.get(clave, 0) + 1
+            self._consultas_peticion[(endpoint, metodo)] = (
+                self._consultas_peticion.get((endpoint, metodo), 0) + consultas)
+
+    def consultas_en_peticiones(self):
+        """Total de sentencias SQL atribuidas a peticiones ya terminadas (incluido su streaming)"""
+        with self._lock:
+            return sum(self._consultas_peticion.values())
+
+    def observar_sql(self, sql, segundos, filas, plan=None, endpoint=None):
+        sentencia = normalizar_sql(sql)
+        lenta = segundos >= self.umbral_lento
+        with self._lock:
+            datos = self._sql.get(sentencia)
+            if datos is None:
+                datos = self._sql[sentencia] = [0, 0.0, 0, 0]
+            datos[0] += 1
+            datos[1] += segundos
+            datos[2] += max(filas, 0)
+            if lenta:
+                datos[3] += 1
+                self._lentas.append({
+                    'fecha': datetime.now().isoformat(timespec='seconds'),
+                    'ms': round(segundos * 1000, 2),
+                    'filas': filas,
+                    'endpoint': endpoint,
+                    'sql': ' '.join(sql.split()),
+                    'plan': plan,
+                })
+
+    def consultas_lentas(self):
+        """Retorna el log de sentencias lentas, de la más reciente a la más antigua"""
+        with self._lock:
+            return list(reversed(self._lentas))
+
+    def exportar_prometheus(self):
+        """Retorna todas las métricas en el formato de texto de Prometheus"""
+        lineas = []
+        with self._lock:
+            lineas.append('# HELP clinica_http_request_duration_seconds Latencia de peticiones por endpoint')
+            lineas.append('# TYPE clinica_http_request_duration_seconds histogram')
+            for (endpoint, metodo), histograma in sorted(self._latencias.items()):
+                etiquetas = f'endpoint="{_escapar(endpoint)}",method="{metodo}"'
+                for limite, acumulado in histograma.acumulados():
+                    lineas.append(f'clinica_http_request_duration_seconds_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+                lineas.append(f'clinica_http_request_duration_seconds_bucket{{{etiquetas},le="+Inf"}} {histograma.total}')
+                lineas.append(f'clinica_http_request_duration_seconds_sum{{{etiquetas}}} {histograma.suma:.6f}')
+                lineas.append(f'clinica_http_request_duration_seconds_count{{{etiquetas}}} {histograma.total}')
+
+            lineas.append('# HELP clinica_http_requests_total Peticiones atendidas por endpoint y estado')
+            lineas.append('# TYPE clinica_http_requests_total counter')
+            for (endpoint, metodo, estado), total in sorted(self._peticiones.items()):
+                lineas.append(f'clinica_http_requests_total{{endpoint="{_escapar(endpoint)}",'
+                              f'method="{metodo}",status="{estado}"}} {total}')
+
+            lineas.append('# HELP clinica_http_sql_statements_total Sentencias SQL ejecutadas por las peticiones de cada endpoint')
+            lineas.append('# TYPE clinica_http_sql_statements_total counter')
+            for (endpoint, metodo), total in sorted(self._consultas_peticion.items()):
+                lineas.append(f'clinica_http_sql_statements_total{{endpoint="{_escapar(endpoint)}",'
+                              f'method="{metodo}"}} {total}')
+
+            metricas_sql = [
+                ('clinica_sql_statements_total', 'counter', 'Sentencias SQL ejecutadas', 0, '{}'),
+                ('clinica_sql_statement_seconds_total', 'counter', 'Tiempo total en sentencias SQL', 1, '{:.6f}'),
+                ('clinica_sql_rows_total', 'counter', 'Filas leídas o modificadas por sentencia', 2, '{}'),
+                ('clinica_sql_slow_statements_total', 'counter',
+                 f'Sentencias que superaron {self.umbral_lento * 1000:.0f} ms', 3, '{}'),
+            ]
+            for nombre, tipo, ayuda, indice, formato in metricas_sql:
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+                for sentencia, datos in sorted(self._sql.items()):
+                    lineas.append(f'{nombre}{{statement="{_escapar(sentencia)}"}} {formato.format(datos[indice])}')
+        return '\n'.join(lineas) + '\n'
+
+    def reiniciar(self):
+        with self._lock:
+            self._latencias.clear()
+            self._peticiones.clear()
+            self._consultas_peticion.clear()
+            self._sql.clear()
+            self._lentas.clear()
+
+
+def exportar_valores(prefijo, valores):
+    """Convierte un dict de estadísticas numéricas en gauges de Prometheus"""
+    lineas = []
+    for clave, valor in sorted(valores.items()):
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            continue
+        lineas.append(f'# TYPE {prefijo}{clave} gauge')
+        lineas.append(f'{prefijo}{clave} {valor}')
+    return '\n'.join(lineas) + '\n' if lineas else ''
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def normalizar_sql(sql):
+    """Reduce una sentencia a una etiqueta estable: sin literales ni listas IN variables"""
+    sql = ' '.join(sql.split())
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\?(\s*,\s*\?)+', '?, …', sql)
+    return sql[:160]
+
+
+registro_metricas = RegistroMetricas()
+
+# ==================== SQL ====================
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor que mide cada sentencia: tiempo de execute más el de leer sus filas.
+
+    La medición se cierra al agotar las filas, en el siguiente execute o al
+    cerrar/descartar el cursor. Las sentencias lentas se registran con su
+    EXPLAIN QUERY PLAN.
+    """
+
+    _medicion = None
+
+    def _iniciar(self, sql, params):
+        self._terminar()
+        self._medicion = [sql, params, 0.0, 0]
+
+    def _terminar(self):
+        medicion, self._medicion = self._medicion, None
+        if medicion is None:
+            return
+        sql, params, segundos, filas = medicion
+        if filas == 0 and self.rowcount > 0:
+            filas = self.rowcount    # INSERT/UPDATE/DELETE
+        plan = None
+        if segundos >= registro_metricas.umbral_lento:
+            plan = _explicar(self.connection, sql, params)
+        endpoint = request.endpoint if has_request_context() else None
+        registro_metricas.observar_sql(sql, segundos, filas, plan, endpoint)
+        if has_request_context():
+            g._consultas_sql = g.get('_consultas_sql', 0) + 1
+
+    def _medir(self, funcion, *args):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        if self._medicion is not None:
+            self._medicion[2] += time.perf_counter() - inicio
+        return resultado
+
+    def execute(self, sql, params=()):
+        self._iniciar(sql, params)
+        self._medir(super().execute, sql, params)
+        if self.description is None:
+            self._terminar()
+        return self
+
+    def executemany(self, sql, secuencia):
+        self._iniciar(sql, None)
+        self._medir(super().executemany, sql, secuencia)
+        self._terminar()
+        return self
+
+    def fetchone(self):
+        fila = self._medir(super().fetchone)
+        if fila is None:
+            self._terminar()
+        elif self._medicion is not None:
+            self._medicion[3] += 1
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = self._medir(super().fetchmany, self.arraysize if size is None else size)
+        if self._medicion is not None:
+            self._medicion[3] += len(filas)
+        if not filas:
+            self._terminar()
+        return filas
+
+    def fetchall(self):
+        filas = self._medir(super().fetchall)
+        if self._medicion is not None:
+            self._medicion[3] += len(filas)
+        self._terminar()
+        return filas
+
+    def __next__(self):
+        try:
+            fila = self._medir(super().__next__)
+        except StopIteration:
+            self._terminar()
+            raise
+        if self._medicion is not None:
+            self._medicion[3] += 1
+        return fila
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._terminar()
+        except Exception:
+            pass
+
+
+def _explicar(conn, sql, params):
+    """EXPLAIN QUERY PLAN de una sentencia, en una línea"""
+    if not re.match(r'\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b', sql, re.IGNORECASE):
+        return None
+    try:
+        cursor = sqlite3.Cursor(conn)
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params if params is not None else ())
+        return ' | '.join(fila[3] for fila in cursor.fetchall())
+    except sqlite3.Error:
+        return None
+
+# ==================== PETICIONES ====================
+
+def _inicio_peticion():
+    g._inicio_peticion = time.perf_counter()
+
+def _mostrar_consultas():
+    """La cabecera X-Consultas-SQL solo se envía con PERFILAR_SQL activo o a un admin"""
+    return current_app.config.get('PERFILAR_SQL') or session.get('rol') == 'admin'
+
+def _fin_peticion(respuesta):
+    inicio = g.pop('_inicio_peticion', None)
+    if inicio is None:
+        return respuesta
+    endpoint, metodo = request.endpoint or 'sin_ruta', request.method
+    # Las sentencias de un cuerpo en streaming (con stream_with_context) suman en este mismo g
+    contexto = g._get_current_object()
+
+    def registrar():
+        registro_metricas.observar_peticion(endpoint, metodo, respuesta.status_code,
+                                            time.perf_counter() - inicio,
+                                            contexto.get('_consultas_sql', 0))
+
+    if respuesta.is_streamed:
+        # El cuerpo se genera después de este hook: latencia y consultas se
+        # registran al cerrar la respuesta, y la cabecera no puede llevarlas
+        respuesta.call_on_close(registrar)
+        return respuesta
+    registrar()
+    if _mostrar_consultas():
+        respuesta.headers['X-Consultas-SQL'] = str(g.get('_consultas_sql', 0))
+    return respuesta
+
+def instrumentar(app):
+    """Registra los hooks que miden cada petición de la aplicación.
+
+    Con app.config['PERFILAR_SQL'] cada respuesta no streaming lleva la
+    cabecera X-Consultas-SQL; sin él, solo las de un admin.
+    """
+    app.before_request(_inicio_peticion)
+    app.after_request(_fin_peticion)
@@ -0,0 +1,585 @@
+# migraciones.py
+import re
+import sqlite3
+import sys
+
+from contadores import poblar_contadores
+
+# ==================== PASOS DE MIGRACIÓN ====================
+
+def _migracion_001_indices(cursor):
+    """Índices para las consultas más frecuentes de los dashboards"""
+    # Dashboard y stats del doctor: WHERE doctor_id = ? [AND rango de fecha] ORDER BY fecha_consulta DESC
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_doctor_fecha
+        ON consultas (doctor_id, fecha_consulta)
+    ''')
+    # COUNT(DISTINCT paciente_id) WHERE doctor_id = ? resuelto solo con el índice
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_doctor_paciente
+        ON consultas (doctor_id, paciente_id)
+    ''')
+    # Última consulta por paciente (mantenimiento) y borrado por paciente
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_paciente_fecha
+        ON consultas (paciente_id, fecha_consulta)
+    ''')
+    # Consultas pendientes ordenadas por fecha
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_estado_fecha
+        ON consultas (estado, fecha_consulta)
+    ''')
+    # Conteos por mes sin filtrar por doctor
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultas_fecha
+        ON consultas (fecha_consulta)
+    ''')
+    # Historial de un paciente: WHERE paciente_id = ? ORDER BY fecha DESC
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_historial_paciente_fecha
+        ON historial_medico (paciente_id, fecha)
+    ''')
+    # Listados de pacientes ordenados por nombre
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pacientes_nombre
+        ON pacientes (nombre)
+    ''')
+    # El login busca por email: ya lo cubre el índice UNIQUE de usuarios.email
+
+
+def _migracion_002_contadores(cursor):
+    """Contadores materializados para los dashboards, mantenidos por triggers"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            tipo TEXT NOT NULL,
+            doctor_id INTEGER NOT NULL DEFAULT 0,
+            mes TEXT NOT NULL DEFAULT '',
+            estado TEXT NOT NULL DEFAULT '',
+            valor INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tipo, doctor_id, mes, estado)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_stats_counters_mes
+        ON stats_counters (tipo, mes)
+    ''')
+
+    # Pacientes
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_pacientes_insert
+        AFTER INSERT ON pacientes
+        BEGIN
+            INSERT INTO stats_counters (tipo, doctor_id, mes, estado, valor)
+            VALUES ('pacientes', 0, '', '', 1)
+            ON CONFLICT (tipo, doctor_id, mes, estado) DO UPDATE SET valor = valor + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_pacientes_delete
+        AFTER DELETE ON pacientes
+        BEGIN
+            UPDATE stats_counters SET valor = valor - 1
+            WHERE tipo = 'pacientes' AND doctor_id = 0 AND mes = '' AND estado = '';
+        END
+    ''')
+
+    # Consultas: se descuenta la fila anterior (OLD) y se suma la nueva (NEW)
+    sumar_consulta = '''
+            INSERT INTO stats_counters (tipo, doctor_id, mes, estado, valor)
+            VALUES ('consultas', NEW.doctor_id, substr(NEW.fecha_consulta, 1, 7),
+                    COALESCE(NEW.estado, ''), 1)
+            ON CONFLICT (tipo, doctor_id, mes, estado) DO UPDATE SET valor = valor + 1;
+    '''
+    restar_consulta = '''
+            UPDATE stats_counters SET valor = valor - 1
+            WHERE tipo = 'consultas' AND doctor_id = OLD.doctor_id
+            AND mes = substr(OLD.fecha_consulta, 1, 7) AND estado = COALESCE(OLD.estado, '');
+    '''
+    # Un par (doctor, paciente) cuenta la primera vez que aparece y deja de
+    # contar cuando desaparece su última consulta
+    sumar_paciente_doctor = '''
+            INSERT INTO stats_counters (tipo, doctor_id, mes, estado, valor)
+            SELECT 'pacientes_doctor', NEW.doctor_id, '', '', 1
+            WHERE NOT EXISTS (
+                SELECT 1 FROM consultas
+                WHERE doctor_id = NEW.doctor_id AND paciente_id = NEW.paciente_id
+                AND id <> NEW.id
+            ){condicion}
+            ON CONFLICT (tipo, doctor_id, mes, estado) DO UPDATE SET valor = valor + 1;
+    '''
+    restar_paciente_doctor = '''
+            UPDATE stats_counters SET valor = valor - 1
+            WHERE tipo = 'pacientes_doctor' AND doctor_id = OLD.doctor_id
+            AND mes = '' AND estado = ''
+            AND NOT EXISTS (
+                SELECT 1 FROM consultas
+                WHERE doctor_id = OLD.doctor_id AND paciente_id = OLD.paciente_id
+            ){condicion};
+    '''
+    cambio_par = '''
+            AND (OLD.doctor_id <> NEW.doctor_id OR OLD.paciente_id <> NEW.paciente_id)'''
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_consultas_insert
+        AFTER INSERT ON consultas
+        BEGIN
+            {sumar_consulta}
+            {sumar_paciente_doctor.format(condicion='')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_consultas_delete
+        AFTER DELETE ON consultas
+        BEGIN
+            {restar_consulta}
+            {restar_paciente_doctor.format(condicion='')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_consultas_update
+        AFTER UPDATE OF doctor_id, paciente_id, fecha_consulta, estado ON consultas
+        BEGIN
+            {restar_consulta}
+            {sumar_consulta}
+            {restar_paciente_doctor.format(condicion=cambio_par)}
+            {sumar_paciente_doctor.format(condicion=cambio_par)}
+        END
+    ''')
+
+    # Carga inicial con los datos existentes
+    poblar_contadores(cursor)
+
+
+def _migracion_003_busqueda(cursor):
+    """Índices FTS5 (sin acentos, con prefijos) sobre pacientes y texto clínico"""
+    tokenizador = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+    fuentes = [
+        ('pacientes_fts', 'pacientes',
+         ['nombre', 'raza', 'nombre_dueno', 'telefono_dueno', 'notas']),
+        ('consultas_fts', 'consultas',
+         ['motivo', 'diagnostico', 'tratamiento', 'medicamentos']),
+        ('historial_fts', 'historial_medico',
+         ['descripcion']),
+    ]
+
+    for tabla_fts, tabla, columnas in fuentes:
+        lista = ', '.join(columnas)
+        nuevos = ', '.join(f'NEW.{c}' for c in columnas)
+        viejos = ', '.join(f'OLD.{c}' for c in columnas)
+
+        # Tabla de contenido externo: el texto se lee de la tabla original
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {tabla_fts}
+            USING fts5({lista}, content = '{tabla}', content_rowid = 'id', {tokenizador})
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla_fts}_insert
+            AFTER INSERT ON {tabla}
+            BEGIN
+                INSERT INTO {tabla_fts} (rowid, {lista}) VALUES (NEW.id, {nuevos});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla_fts}_delete
+            AFTER DELETE ON {tabla}
+            BEGIN
+                INSERT INTO {tabla_fts} ({tabla_fts}, rowid, {lista})
+                VALUES ('delete', OLD.id, {viejos});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla_fts}_update
+            AFTER UPDATE OF {lista} ON {tabla}
+            BEGIN
+                INSERT INTO {tabla_fts} ({tabla_fts}, rowid, {lista})
+                VALUES ('delete', OLD.id, {viejos});
+                INSERT INTO {tabla_fts} (rowid, {lista}) VALUES (NEW.id, {nuevos});
+            END
+        ''')
+        # Indexar los datos existentes
+        cursor.execute(f"INSERT INTO {tabla_fts} ({tabla_fts}) VALUES ('rebuild')")
+
+
+def _migracion_004_logs_seguridad(cursor):
+    """Tabla de eventos de seguridad usada por log_evento_seguridad"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS logs_seguridad (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo_evento TEXT NOT NULL,
+            usuario TEXT,
+            ip TEXT,
+            detalles TEXT,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Consultas de auditoría: últimos eventos de un tipo
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_logs_seguridad_tipo_fecha
+        ON logs_seguridad (tipo_evento, fecha)
+    ''')
+
+
+def _migracion_005_version_usuarios(cursor):
+    """Contador global de cambios en usuarios para invalidar el cache de sesiones"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO usuarios_version (id, version) VALUES (1, 1)')
+    # Solo las columnas que guarda el cache: el rehash de contraseñas no invalida nada
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_version_update
+        AFTER UPDATE OF username, nombre, email, rol, activo ON usuarios
+        BEGIN
+            UPDATE usuarios_version SET version = version + 1 WHERE id = 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_usuarios_version_delete
+        AFTER DELETE ON usuarios
+        BEGIN
+            UPDATE usuarios_version SET version = version + 1 WHERE id = 1;
+        END
+    ''')
+
+
+def _migracion_006_linea_tiempo(cursor):
+    """Columna diagnostico en historial_medico y versión por paciente para la línea de tiempo"""
+    # Las bases creadas por init_db no tienen la columna que leen las vistas de historial
+    columnas = [fila[1] for fila in cursor.execute('PRAGMA table_info(historial_medico)')]
+    if 'diagnostico' not in columnas:
+        cursor.execute('ALTER TABLE historial_medico ADD COLUMN diagnostico TEXT')
+        cursor.execute('''
+            UPDATE historial_medico
+            SET diagnostico = (SELECT c.diagnostico FROM consultas c WHERE c.id = historial_medico.consulta_id)
+            WHERE consulta_id IS NOT NULL
+        ''')
+
+    # Contador de cambios por paciente: el ETag de la línea de tiempo sin leer los eventos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pacientes_version (
+            paciente_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    subir = '''
+                INSERT INTO pacientes_version (paciente_id, version) VALUES ({fila}.paciente_id, 1)
+                ON CONFLICT (paciente_id) DO UPDATE SET version = version + 1;'''
+    for tabla in ('consultas', 'historial_medico'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla}_version_insert
+            AFTER INSERT ON {tabla}
+            BEGIN{subir.format(fila='NEW')}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla}_version_delete
+            AFTER DELETE ON {tabla}
+            BEGIN{subir.format(fila='OLD')}
+            END
+        ''')
+        # Si el evento cambia de paciente, cambian las dos líneas de tiempo
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla}_version_update
+            AFTER UPDATE ON {tabla}
+            BEGIN{subir.format(fila='NEW')}
+                INSERT INTO pacientes_version (paciente_id, version)
+                SELECT OLD.paciente_id, 1 WHERE OLD.paciente_id IS NOT NEW.paciente_id
+                ON CONFLICT (paciente_id) DO UPDATE SET version = version + 1;
+            END
+        ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_pacientes_version_delete
+        AFTER DELETE ON pacientes
+        BEGIN
+            DELETE FROM pacientes_version WHERE paciente_id = OLD.id;
+        END
+    ''')
+
+
+def _migracion_007_version_tablas(cursor):
+    """Contador de cambios por tabla para los ETag de las respuestas HTTP"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tablas_version (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    # usuarios ya tiene su contador en usuarios_version
+    for tabla in ('pacientes', 'consultas', 'historial_medico'):
+        cursor.execute('INSERT OR IGNORE INTO tablas_version (tabla, version) VALUES (?, 1)', (tabla,))
+        for evento in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{tabla}_tablas_version_{evento.lower()}
+                AFTER {evento} ON {tabla}
+                BEGIN
+                    UPDATE tablas_version SET version = version + 1 WHERE tabla = '{tabla}';
+                END
+            ''')
+
+
+def _migracion_008_agenda(cursor):
+    """Duración de las consultas y horario de atención por doctor"""
+    columnas = [fila[1] for fila in cursor.execute('PRAGMA table_info(consultas)')]
+    if 'duracion_minutos' not in columnas:
+        # NULL en las consultas existentes: la agenda les asume la duración por defecto
+        cursor.execute('ALTER TABLE consultas ADD COLUMN duracion_minutos INTEGER')
+    # Bloques de atención por día de la semana (0 = lunes); varios por día para turnos partidos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS horarios_doctor (
+            doctor_id INTEGER NOT NULL,
+            dia_semana INTEGER NOT NULL CHECK (dia_semana BETWEEN 0 AND 6),
+            hora_inicio TEXT NOT NULL,
+            hora_fin TEXT NOT NULL,
+            duracion_turno INTEGER NOT NULL DEFAULT 30,
+            PRIMARY KEY (doctor_id, dia_semana, hora_inicio),
+            FOREIGN KEY (doctor_id) REFERENCES usuarios (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    # La detección de solapamientos usa idx_consultas_doctor_fecha (migración 1)
+
+
+def _migracion_009_archivo(cursor):
+    """Tablas *_archivo para pacientes inactivos y sus consultas e historial"""
+    # Copia de las columnas actuales sin restricciones: el archivo solo guarda y devuelve filas.
+    # Una migración que agregue columnas a estas tablas debe agregarlas también a su archivo.
+    for tabla, indice in [('pacientes', None), ('consultas', 'paciente_id'), ('historial_medico', 'paciente_id')]:
+        columnas = [f'{nombre} {tipo}' if nombre != 'id' else 'id INTEGER PRIMARY KEY'
+                    for _, nombre, tipo, _, _, _ in cursor.execute(f'PRAGMA table_info({tabla})').fetchall()]
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {tabla}_archivo (
+                {', '.join(columnas)},
+                fecha_archivado TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        if indice:
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{tabla}_archivo_{indice}
+                ON {tabla}_archivo ({indice})
+            ''')
+    # Búsqueda de archivados por nombre (keyset sobre (nombre, id), como en pacientes)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pacientes_archivo_nombre
+        ON pacientes_archivo (nombre)
+    ''')
+    # Con foreign_keys activo, borrar una consulta busca historial_medico.consulta_id:
+    # sin índice es un recorrido completo del historial por cada consulta archivada
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_historial_consulta
+        ON historial_medico (consulta_id)
+    ''')
+
+
+def _reconstruir_tabla(cursor, tabla, sql_nuevo):
+    """Reemplaza la definición de una tabla con el procedimiento de 12 pasos de SQLite.
+
+    Crea la tabla nueva, copia las filas (mismos id), borra la original,
+    renombra la nueva y recrea los índices y triggers de la original. Corre
+    dentro de la transacción de la migración, con foreign_keys desactivado
+    (ver aplicar_migraciones).
+    """
+    cursor.execute("""
+        SELECT sql FROM sqlite_master
+        WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    """, (tabla,))
+    dependientes = [fila[0] for fila in cursor.fetchall()]
+    columnas = ', '.join(f'"{fila[1]}"' for fila in cursor.execute(f'PRAGMA table_info({tabla})').fetchall())
+    cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (tabla,))
+    secuencia = cursor.fetchone()
+
+    temporal = f'{tabla}_nueva'
+    cursor.execute(re.sub(rf'^\s*CREATE\s+TABLE\s+"?{tabla}"?', f'CREATE TABLE {temporal}',
+                          sql_nuevo, count=1, flags=re.IGNORECASE))
+    cursor.execute(f'INSERT INTO {temporal} ({columnas}) SELECT {columnas} FROM {tabla}')
+    cursor.execute(f'DROP TABLE {tabla}')
+    cursor.execute(f'ALTER TABLE {temporal} RENAME TO {tabla}')
+    for sql in dependientes:
+        cursor.execute(sql)
+    # AUTOINCREMENT: no reutilizar ids de filas ya borradas
+    if secuencia:
+        cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (secuencia[0], tabla))
+
+
+def _migracion_010_borrado_en_cascada(cursor):
+    """ON DELETE CASCADE de pacientes hacia consultas e historial_medico"""
+    # SQLite no permite cambiar una clave foránea con ALTER TABLE: se
+    # reconstruyen las tablas y al final se verifica la base completa
+    tablas = ('consultas', 'historial_medico')
+    for tabla in tablas:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,))
+        sql = cursor.fetchone()[0]
+        nuevo = re.sub(r'(REFERENCES\s+pacientes\s*\(\s*id\s*\))(?!\s+ON\s+DELETE)',
+                       r'\1 ON DELETE CASCADE', sql, flags=re.IGNORECASE)
+        if nuevo != sql:
+            _reconstruir_tabla(cursor, tabla, nuevo)
+
+    for tabla in tablas:
+        cursor.execute(f'PRAGMA foreign_key_check({tabla})')
+        huerfanas = cursor.fetchall()
+        if huerfanas:
+            raise sqlite3.IntegrityError(
+                f'{len(huerfanas)} filas de {tabla} con claves foráneas inválidas (PRAGMA foreign_key_check)')
+    cursor.execute('PRAGMA integrity_check')
+    resultado = cursor.fetchone()[0]
+    if resultado != 'ok':
+        raise sqlite3.DatabaseError(f'integrity_check después de reconstruir las tablas: {resultado}')
+
+
+def _migracion_011_tareas(cursor):
+    """Cola de tareas en segundo plano"""
+    # Cada tarea queda también en mantenimiento_sistema, el registro de
+    # mantenimientos que ya existía (pendiente / en_proceso / completado)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tareas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            parametros TEXT NOT NULL DEFAULT '{}',
+            estado TEXT NOT NULL DEFAULT 'pendiente'
+                CHECK (estado IN ('pendiente', 'en_proceso', 'completado', 'error')),
+            progreso INTEGER NOT NULL DEFAULT 0,
+            total INTEGER,
+            resultado TEXT,
+            error TEXT,
+            intentos INTEGER NOT NULL DEFAULT 0,
+            max_intentos INTEGER NOT NULL DEFAULT 3,
+            proximo_intento TIMESTAMP,
+            creado_por INTEGER,
+            mantenimiento_id INTEGER,
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_inicio TIMESTAMP,
+            fecha_fin TIMESTAMP,
+            FOREIGN KEY (creado_por) REFERENCES usuarios (id) ON DELETE SET NULL,
+            FOREIGN KEY (mantenimiento_id) REFERENCES mantenimiento_sistema (id) ON DELETE SET NULL
+        )
+    ''')
+    # Al arrancar se retoman las pendientes e interrumpidas
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tareas_estado
+        ON tareas (estado, id)
+    ''')
+
+
+def _migracion_012_duracion_mantenimiento(cursor):
+    """Duración y tamaño de cada mantenimiento (respaldos y tareas)"""
+    columnas = [fila[1] for fila in cursor.execute('PRAGMA table_info(mantenimiento_sistema)')]
+    if 'duracion_ms' not in columnas:
+        cursor.execute('ALTER TABLE mantenimiento_sistema ADD COLUMN duracion_ms INTEGER')
+    if 'tamano_bytes' not in columnas:
+        cursor.execute('ALTER TABLE mantenimiento_sistema ADD COLUMN tamano_bytes INTEGER')
+
+
+def _migracion_013_concesion_tareas(cursor):
+    """Dueño y último latido de cada tarea en proceso"""
+    # Una tarea en proceso solo se retoma cuando su concesión venció: el
+    # proceso dueño actualiza actualizado_en mientras la ejecuta
+    columnas = [fila[1] for fila in cursor.execute('PRAGMA table_info(tareas)')]
+    if 'worker_id' not in columnas:
+        cursor.execute('ALTER TABLE tareas ADD COLUMN worker_id TEXT')
+    if 'actualizado_en' not in columnas:
+        cursor.execute('ALTER TABLE tareas ADD COLUMN actualizado_en TIMESTAMP')
+
+
+def _migracion_014_fechas_con_hora(cursor):
+    """Fechas con hora en el formato de los rangos ('YYYY-MM-DD HH:MM:SS')"""
+    # Los rangos comparan las fechas como texto: '2024-01-01T11:00' ordena
+    # después de '2024-01-01 12:00:00' y quedaba fuera de los periodos con
+    # hora. Se reescriben los valores con 'T' o sin segundos; los de solo
+    # fecha ya se comparan bien y no se tocan
+    tablas = {fila[0] for fila in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    columnas = [('consultas', 'fecha_consulta'), ('consultas', 'proxima_cita'), ('historial_medico', 'fecha')]
+    for tabla, columna in columnas + [(f'{t}_archivo', c) for t, c in columnas]:
+        if tabla not in tablas:
+            continue
+        cursor.execute(f'''
+            UPDATE {tabla}
+            SET {columna} = strftime('%Y-%m-%d %H:%M:%S', {columna})
+            WHERE {columna} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9][T ]*'
+              AND strftime('%Y-%m-%d %H:%M:%S', {columna}) IS NOT NULL
+              AND {columna} != strftime('%Y-%m-%d %H:%M:%S', {columna})
+        ''')
+
+
+# Lista ordenada de migraciones: (versión, descripción, función)
+MIGRACIONES = [
+    (1, 'Índices para consultas e historial médico', _migracion_001_indices),
+    (2, 'Contadores materializados para dashboards', _migracion_002_contadores),
+    (3, 'Búsqueda de texto completo (FTS5)', _migracion_003_busqueda),
+    (4, 'Registro de eventos de seguridad', _migracion_004_logs_seguridad),
+    (5, 'Versión de usuarios para el cache de sesiones', _migracion_005_version_usuarios),
+    (6, 'Diagnóstico en historial y versión por paciente', _migracion_006_linea_tiempo),
+    (7, 'Versión por tabla para respuestas condicionales', _migracion_007_version_tablas),
+    (8, 'Agenda: duración de consultas y horarios de doctores', _migracion_008_agenda),
+    (9, 'Archivo de pacientes inactivos', _migracion_009_archivo),
+    (10, 'Borrado en cascada de consultas e historial', _migracion_010_borrado_en_cascada),
+    (11, 'Cola de tareas en segundo plano', _migracion_011_tareas),
+    (12, 'Duración y tamaño de los mantenimientos', _migracion_012_duracion_mantenimiento),
+    (13, 'Concesión de las tareas en proceso', _migracion_013_concesion_tareas),
+    (14, 'Fechas con hora en formato uniforme', _migracion_014_fechas_con_hora),
+]
+
+# ==================== MOTOR DE MIGRACIONES ====================
+
+def _crear_tabla_version(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            fecha_aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def version_actual(conn):
+    """Retorna la versión de esquema aplicada (0 si no hay ninguna)"""
+    cursor = conn.cursor()
+    _crear_tabla_version(cursor)
+    cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+    return cursor.fetchone()[0]
+
+def aplicar_migraciones(conn, hasta=None):
+    """Aplica en orden las migraciones pendientes, cada una en su propia transacción"""
+    if conn.in_transaction:
+        conn.commit()
+
+    actual = version_actual(conn)
+    aplicadas = []
+    cursor = conn.cursor()
+
+    # Reconstruir una tabla (migración 10) requiere las claves foráneas
+    # desactivadas, y el PRAGMA no tiene efecto dentro de una transacción
+    cursor.execute('PRAGMA foreign_keys')
+    claves_foraneas = cursor.fetchone()[0]
+    cursor.execute('PRAGMA foreign_keys = OFF')
+    try:
+        for version, descripcion, migracion in MIGRACIONES:
+            if version <= actual or (hasta is not None and version > hasta):
+                continue
+            try:
+                cursor.execute('BEGIN')
+                migracion(cursor)
+                cursor.execute(
+                    'INSERT INTO schema_version (version, descripcion) VALUES (?, ?)',
+                    (version, descripcion)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error en migración {version} ({descripcion}): {e}")
+                raise
+            aplicadas.append(version)
+            print(f"✓ Migración {version} aplicada: {descripcion}")
+    finally:
+        if claves_foraneas:
+            cursor.execute('PRAGMA foreign_keys = ON')
+
+    return aplicadas
+
+# ==================== EJECUCIÓN ====================
+
+if __name__ == '__main__':
+    ruta = sys.argv[1] if len(sys.argv) > 1 else 'clinic.db'
+    conn = sqlite3.connect(ruta)
+    aplicadas = aplicar_migraciones(conn)
+    print(f"📊 Versión de esquema: {version_actual(conn)} ({len(aplicadas)} migraciones nuevas)")
+    conn.close()
@@ -1,105 +1,144 @@
 # migrar_passwords.py
+import argparse
+import contextlib
 import sqlite3
-import hashlib
-import secrets
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-def crear_backup():
+from contrasenas import hash_password, es_hash
+from respaldos import crear_respaldo
+
+DB_PATH = 'clinic.db'
+TAMANO_LOTE = 1000
+
+def crear_backup(ruta=DB_PATH):
     """Crea un backup de la base de datos antes de la migración"""
-    if os.path.exists('clinic.db'):
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_name = f'backup_clinic_{timestamp}.db'
-        import shutil
-        shutil.copy2('clinic.db', backup_name)
-        print(f"📦 Backup creado: {backup_name}")
+    if os.path.exists(ruta):
+        # Copia en caliente comprimida y con checksum (ver respaldos.py)
+        respaldo = crear_respaldo(ruta)
+        print(f"📦 Backup creado: {respaldo['archivo']}")
         return True
     return False
 
-def hash_password(password):
-    """Convierte la contraseña en hash seguro"""
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    )
-    return f"{salt}:{password_hash.hex()}"
-
 def verificar_contraseña_hash(contrasena):
-    """Verifica si una contraseña ya está en formato hash"""
-    # Un hash PBKDF2 con salt típicamente tiene: salt:hash
-    # donde salt es hexadecimal (32 chars) + ':' + hash (64 chars)
-    if contrasena and ':' in contrasena:
-        parts = contrasena.split(':')
-        if len(parts) == 2:
-            salt, hash_part = parts
-            # Verificar longitudes típicas
-            if len(salt) == 32 and len(hash_part) == 64:
-                return True
-    return False
+    """Verifica si una contraseña ya está en formato hash (nuevo o heredado salt:hash)"""
+    return es_hash(contrasena)
+
+# ==================== PROGRESO ====================
+
+def _ruta_progreso(ruta):
+    return f'{ruta}.migracion_passwords.json'
+
+def _leer_progreso(ruta):
+    """Retorna el último id confirmado de una migración interrumpida (o None)"""
+    if not os.path.exists(_ruta_progreso(ruta)):
+        return None
+    with open(_ruta_progreso(ruta), encoding='utf-8') as f:
+        return json.load(f).get('ultimo_id')
 
-def migrar_contraseñas():
-    """Migra contraseñas existentes a formato hash"""
+def _guardar_progreso(ruta, ultimo_id):
+    temporal = f'{_ruta_progreso(ruta)}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'ultimo_id': ultimo_id, 'actualizado': datetime.now().isoformat()}, f)
+    os.replace(temporal, _ruta_progreso(ruta))
+
+# ==================== MIGRACIÓN ====================
+
+def migrar_contraseñas(ruta=DB_PATH, procesos=None, tamano_lote=TAMANO_LOTE):
+    """Migra contraseñas existentes a formato hash.
+
+    El hash se calcula en paralelo (un proceso por núcleo) y cada lote se
+    confirma por separado, así el bloqueo de escritura dura milisegundos. El
+    último id confirmado se guarda en disco para reanudar si se interrumpe.
+    """
     print("🔍 Iniciando migración de contraseñas...")
-    
-    # Crear backup primero
-    if not crear_backup():
-        print("❌ No se encontró la base de datos clinic.db")
+
+    ultimo_id = _leer_progreso(ruta)
+    if ultimo_id is not None:
+        # El backup ya se tomó en la ejecución interrumpida
+        print(f"⏩ Reanudando después del usuario id {ultimo_id}")
+    elif not crear_backup(ruta):
+        print(f"❌ No se encontró la base de datos {ruta}")
         print("💡 Ejecuta primero: python app.py para crear la base de datos")
         return
-    
-    conn = sqlite3.connect('clinic.db')
+
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA busy_timeout = 5000')
     cursor = conn.cursor()
-    
+
     # Contar usuarios
     cursor.execute('SELECT COUNT(*) FROM usuarios')
     total_usuarios = cursor.fetchone()[0]
     print(f"👥 Total de usuarios en sistema: {total_usuarios}")
-    
-    # Verificar cuántos necesitan migración
-    cursor.execute('SELECT id, username, password FROM usuarios')
-    usuarios = cursor.fetchall()
-    
+
     usuarios_migrados = 0
     usuarios_ya_hash = 0
-    
-    for usuario_id, username, contrasena in usuarios:
-        if not contrasena:
-            print(f"⚠️  Usuario {username} no tiene contraseña")
-            continue
-            
-        if verificar_contraseña_hash(contrasena):
-            usuarios_ya_hash += 1
-            continue
-        
-        # Migrar a hash
-        try:
-            password_hash = hash_password(contrasena)
+    usuarios_sin_contrasena = 0
+    inicio = time.perf_counter()
+
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        while True:
+            # Recorrido por id (keyset): cada lote se lee fuera de toda transacción
             cursor.execute(
-                'UPDATE usuarios SET password = ? WHERE id = ?',
-                (password_hash, usuario_id)
+                'SELECT id, username, password FROM usuarios WHERE id > ? ORDER BY id LIMIT ?',
+                (ultimo_id or 0, tamano_lote)
+            )
+            usuarios = cursor.fetchall()
+            if not usuarios:
+                break
+
+            pendientes = []
+            for usuario_id, username, contrasena in usuarios:
+                if not contrasena:
+                    print(f"⚠️  Usuario {username} no tiene contraseña")
+                    usuarios_sin_contrasena += 1
+                elif verificar_contraseña_hash(contrasena):
+                    usuarios_ya_hash += 1
+                else:
+                    pendientes.append((usuario_id, contrasena))
+
+            # Migrar a hash: el trabajo de CPU se reparte entre los procesos
+            bloque = max(1, len(pendientes) // (procesos * 4))
+            hashes = ejecutor.map(hash_password, [c for _, c in pendientes], chunksize=bloque)
+
+            # Solo se actualiza si la contraseña no cambió mientras se calculaba el hash;
+            # rowcount cuenta las filas realmente actualizadas
+            cursor.executemany(
+                'UPDATE usuarios SET password = ? WHERE id = ? AND password = ?',
+                [(h, usuario_id, contrasena) for h, (usuario_id, contrasena) in zip(hashes, pendientes)]
             )
-            usuarios_migrados += 1
-            print(f"  ✅ {username}: Migrado a hash")
-        except Exception as e:
-            print(f"  ❌ {username}: Error en migración - {e}")
-    
+            usuarios_migrados += max(cursor.rowcount, 0)
+            conn.commit()
+
+            ultimo_id = usuarios[-1][0]
+            _guardar_progreso(ruta, ultimo_id)
+            segundos = time.perf_counter() - inicio
+            print(f"  ✅ Hasta id {ultimo_id}: {usuarios_migrados} migrados "
+                  f"({usuarios_migrados / segundos:.1f} hashes/s)")
+
+    conn.close()
+    # Sin lotes (tabla vacía) no se llegó a guardar el progreso
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_ruta_progreso(ruta))
+    segundos = time.perf_counter() - inicio
+
     if usuarios_migrados > 0:
-        conn.commit()
         print(f"\n📊 RESUMEN DE MIGRACIÓN:")
         print(f"   • Total usuarios: {total_usuarios}")
         print(f"   • Ya en hash: {usuarios_ya_hash}")
         print(f"   • Migrados ahora: {usuarios_migrados}")
-        print(f"   • Sin contraseña: {total_usuarios - usuarios_ya_hash - usuarios_migrados}")
+        print(f"   • Sin contraseña: {usuarios_sin_contrasena}")
+        print(f"   • Procesos: {procesos}")
+        print(f"   • Tiempo: {segundos:.2f} s ({usuarios_migrados / segundos:.1f} hashes/s)")
         print("\n🎉 Migración completada exitosamente!")
     else:
         print("\n✅ Todas las contraseñas ya están en formato hash")
         print(f"   ({usuarios_ya_hash} usuarios verificados)")
-    
-    conn.close()
-    
+
     # Mostrar contraseñas de ejemplo para testing
     print("\n🔐 Contraseñas de prueba (para login):")
     print("   admin / Admin123!")
@@ -107,4 +146,9 @@ def migrar_contraseñas():
     print("   dr.gomez / DrGomez789!")
 
 if __name__ == '__main__':
-    migrar_contraseñas()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Migra contraseñas en texto plano a PBKDF2')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--procesos', type=int, help='por defecto, un proceso por núcleo')
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE)
+    args = parser.parse_args()
+    migrar_contraseñas(args.db, args.procesos, args.lote)
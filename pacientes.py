@@ -0,0 +1,46 @@
+# pacientes.py
+from paginacion import codificar_cursor, decodificar_cursor, escapar_like
+
+def buscar_pacientes(conn, texto=None, cursor_pagina=None, limite=50, archivados=False):
+    """Lista pacientes ordenados por (nombre, id) con paginación por keyset.
+
+    'texto' filtra por nombre del paciente, del dueño o especie. Con
+    archivados=True busca en pacientes_archivo en lugar de los activos.
+    Retorna (pacientes, siguiente_cursor); el cursor es None en la última página.
+    """
+    tabla = 'pacientes_archivo' if archivados else 'pacientes'
+    condiciones = []
+    params = []
+
+    if texto:
+        patron = f'%{escapar_like(texto)}%'
+        condiciones.append('''(nombre LIKE ? ESCAPE '\\'
+                               OR nombre_dueno LIKE ? ESCAPE '\\'
+                               OR especie LIKE ? ESCAPE '\\')''')
+        params += [patron, patron, patron]
+
+    if cursor_pagina:
+        nombre, paciente_id = decodificar_cursor(cursor_pagina, 2)
+        condiciones.append('(nombre, id) > (?, ?)')
+        params += [nombre, paciente_id]
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT id,
+               nombre,
+               especie,
+               raza,
+               nombre_dueno AS dueno
+        FROM {tabla}
+        {where}
+        ORDER BY nombre, id
+        LIMIT ?
+    ''', params + [limite + 1])
+    filas = [dict(p) for p in cursor.fetchall()]
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1]['nombre'], filas[-1]['id'])
+    return filas, siguiente
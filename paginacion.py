@@ -0,0 +1,35 @@
+# paginacion.py
+import base64
+import json
+
+# Cursores opacos para paginación por keyset: la última clave de orden de la
+# página actual se serializa y el cliente la devuelve para pedir la siguiente.
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+def codificar_cursor(*valores):
+    """Serializa los valores de la clave de orden en un cursor opaco"""
+    datos = json.dumps(valores, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, cantidad):
+    """Recupera los valores de un cursor; lanza ValueError si es inválido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+    except Exception:
+        raise ValueError('Cursor inválido')
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        raise ValueError('Cursor inválido')
+    return valores
+
+def normalizar_limite(limite, defecto=LIMITE_POR_DEFECTO, maximo=LIMITE_MAXIMO):
+    """Acota el tamaño de página solicitado"""
+    if limite is None:
+        return defecto
+    return min(max(int(limite), 1), maximo)
+
+def escapar_like(texto):
+    """Escapa los comodines de LIKE (usar con ESCAPE '\\')"""
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
@@ -0,0 +1,83 @@
+# rangos_fecha.py
+from datetime import date, datetime, timedelta, timezone
+
+# Las fechas se guardan como texto 'YYYY-MM-DD' o 'YYYY-MM-DD HH:MM:SS'
+# (FORMATO_FECHA), así que un rango semiabierto [inicio, fin) con límites en
+# ese formato se compara lexicográficamente y puede usar los índices. Los
+# límites a medianoche van sin hora para que los valores de solo fecha caigan
+# en su día. La variante con 'T' ('YYYY-MM-DDTHH:MM') NO se compara bien con
+# un límite con hora, porque 'T' ordena después de ' ': la importación la
+# normaliza al guardar y la migración 14 reescribió los valores existentes.
+# strftime('now') de SQLite trabaja en UTC, por eso es la zona por defecto.
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+def _fecha_referencia(referencia=None, zona=timezone.utc):
+    """Normaliza la referencia (None = ahora) a una fecha en la zona indicada"""
+    if referencia is None:
+        return datetime.now(zona).date()
+    if isinstance(referencia, datetime):
+        if referencia.tzinfo is not None:
+            referencia = referencia.astimezone(zona)
+        return referencia.date()
+    return referencia
+
+def _como_datetime(valor):
+    if isinstance(valor, datetime):
+        return valor
+    return datetime.combine(valor, datetime.min.time())
+
+def _formatear(valor):
+    """Formatea un límite: solo fecha si es medianoche, para incluir valores sin hora"""
+    if isinstance(valor, datetime):
+        if valor.time() == datetime.min.time():
+            return valor.strftime('%Y-%m-%d')
+        return valor.strftime(FORMATO_FECHA)
+    return valor.strftime('%Y-%m-%d')
+
+def rango_mes(referencia=None, zona=timezone.utc):
+    """Retorna (inicio, fin) del mes de la referencia como rango semiabierto"""
+    dia = _fecha_referencia(referencia, zona)
+    inicio = dia.replace(day=1)
+    if inicio.month == 12:
+        fin = date(inicio.year + 1, 1, 1)
+    else:
+        fin = date(inicio.year, inicio.month + 1, 1)
+    return _formatear(inicio), _formatear(fin)
+
+def rango_semana(referencia=None, zona=timezone.utc):
+    """Retorna (inicio, fin) de la semana (lunes a domingo) de la referencia"""
+    dia = _fecha_referencia(referencia, zona)
+    inicio = dia - timedelta(days=dia.weekday())
+    return _formatear(inicio), _formatear(inicio + timedelta(days=7))
+
+def rango_periodo(desde, hasta):
+    """Retorna (inicio, fin) para un periodo arbitrario; 'hasta' queda excluido"""
+    if _como_datetime(hasta) <= _como_datetime(desde):
+        raise ValueError('El fin del periodo debe ser posterior al inicio')
+    return _formatear(desde), _formatear(hasta)
+
+def rango_dias(desde=None, hasta=None):
+    """Retorna (inicio, fin) para días inclusivos 'YYYY-MM-DD'; un límite None queda abierto.
+
+    Lanza ValueError si alguna fecha es inválida.
+    """
+    inicio = _formatear(date.fromisoformat(desde)) if desde else None
+    fin = _formatear(date.fromisoformat(hasta) + timedelta(days=1)) if hasta else None
+    return inicio, fin
+
+def filtro_rango(columna, rango):
+    """Genera el predicado SQL indexable y sus parámetros para un rango.
+
+    Un límite None deja el rango abierto de ese lado; sin ningún límite
+    retorna (None, ()).
+    """
+    inicio, fin = rango
+    condiciones, params = [], []
+    if inicio is not None:
+        condiciones.append(f'{columna} >= ?')
+        params.append(inicio)
+    if fin is not None:
+        condiciones.append(f'{columna} < ?')
+        params.append(fin)
+    return ' AND '.join(condiciones) or None, tuple(params)
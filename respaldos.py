@@ -0,0 +1,250 @@
+# respaldos.py
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DB_PATH = 'clinic.db'
+DIRECTORIO_RESPALDOS = 'respaldos'
+PREFIJO = 'respaldo_clinic_'
+EXTENSION = '.db.gz'
+
+PAGINAS_POR_PASO = 256       # páginas por paso cuando la base no está en modo WAL
+PAUSA_ENTRE_PASOS = 0.005    # segundos sin lock entre pasos: las escrituras pasan
+MAX_REINICIOS = 3            # tras esto se copia todo en un solo paso
+CONSERVAR = 7                # respaldos que se mantienen en el directorio
+TAMANO_BLOQUE = 1024 * 1024
+
+class RespaldoInvalido(Exception):
+    """El archivo de respaldo no coincide con su checksum o no pasa integrity_check"""
+
+def _sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _ruta_checksum(archivo):
+    return f'{archivo}.sha256'
+
+# ==================== COPIA EN CALIENTE ====================
+
+class _ReinicioExcesivo(Exception):
+    pass
+
+def _copiar(origen, destino, paginas_por_paso, pausa):
+    """Copia con la API de backup; retorna (páginas, reinicios).
+
+    En modo WAL (el de la aplicación) la copia en un solo paso lee una
+    instantánea sin bloquear a los escritores, y es lo que se hace por
+    defecto. Con journal de rollback el lector sí frena las escrituras: se
+    copia por pasos con una pausa sin lock entre ellos. Si otra conexión
+    escribe durante una copia por pasos, SQLite la reinicia; después de
+    MAX_REINICIOS se termina en un solo paso para no reintentar sin fin.
+    """
+    if paginas_por_paso is None:
+        modo = origen.execute('PRAGMA journal_mode').fetchone()[0]
+        paginas_por_paso = -1 if modo == 'wal' else PAGINAS_POR_PASO
+    estado = {'reinicios': 0, 'restantes': None, 'paginas': 0}
+
+    def progreso(status, restantes, total):
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] > MAX_REINICIOS:
+                raise _ReinicioExcesivo()
+        estado['restantes'] = restantes
+        estado['paginas'] = total
+        if pausa and restantes:
+            time.sleep(pausa)
+
+    try:
+        origen.backup(destino, pages=paginas_por_paso, progress=progreso)
+    except _ReinicioExcesivo:
+        origen.backup(destino, pages=-1, progress=progreso)
+    return estado['paginas'], estado['reinicios']
+
+def crear_respaldo(ruta_bd=DB_PATH, directorio=DIRECTORIO_RESPALDOS, paginas_por_paso=None,
+                   pausa=PAUSA_ENTRE_PASOS, conservar=CONSERVAR, verificar=True):
+    """Crea un respaldo comprimido de la base en uso.
+
+    Copia con la API de backup de SQLite (consistente aunque haya escrituras),
+    verifica la copia con integrity_check, la comprime con gzip y escribe el
+    SHA-256 al lado (formato sha256sum). Luego aplica la retención.
+    paginas_por_paso=None elige según el modo de journal (ver _copiar).
+    Retorna un dict con archivo, tamaños, checksum y duración.
+    """
+    if not os.path.exists(ruta_bd):
+        raise FileNotFoundError(f'No se encontró la base de datos {ruta_bd}')
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+    nombre = f"{PREFIJO}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{EXTENSION}"
+    archivo = os.path.join(directorio, nombre)
+    temporal = os.path.join(directorio, f'.{nombre}.tmp')
+
+    origen = sqlite3.connect(ruta_bd, timeout=30)
+    destino = sqlite3.connect(temporal)
+    try:
+        paginas, reinicios = _copiar(origen, destino, paginas_por_paso, pausa)
+        if verificar:
+            resultado = destino.execute('PRAGMA integrity_check').fetchone()[0]
+            if resultado != 'ok':
+                raise RespaldoInvalido(f'La copia no pasó integrity_check: {resultado}')
+        destino.close()
+        origen.close()
+
+        tamano_original = os.path.getsize(temporal)
+        with open(temporal, 'rb') as entrada, gzip.open(f'{archivo}.tmp', 'wb', compresslevel=6) as salida:
+            shutil.copyfileobj(entrada, salida, TAMANO_BLOQUE)
+        os.replace(f'{archivo}.tmp', archivo)
+        checksum = _sha256(archivo)
+        with open(_ruta_checksum(archivo), 'w', encoding='utf-8') as f:
+            f.write(f'{checksum}  {nombre}\n')
+    except Exception:
+        for ruta in (f'{archivo}.tmp', archivo):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        raise
+    finally:
+        destino.close()
+        origen.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    eliminados = aplicar_retencion(directorio, conservar)
+    return {
+        'archivo': archivo,
+        'tamano_bytes': os.path.getsize(archivo),
+        'tamano_original': tamano_original,
+        'sha256': checksum,
+        'paginas': paginas,
+        'reinicios': reinicios,
+        'duracion_ms': round((time.perf_counter() - inicio) * 1000),
+        'eliminados': eliminados,
+    }
+
+# ==================== RETENCIÓN ====================
+
+def listar_respaldos(directorio=DIRECTORIO_RESPALDOS):
+    """Respaldos del directorio, del más reciente al más antiguo"""
+    if not os.path.isdir(directorio):
+        return []
+    respaldos = []
+    for nombre in os.listdir(directorio):
+        if nombre.startswith(PREFIJO) and nombre.endswith(EXTENSION):
+            ruta = os.path.join(directorio, nombre)
+            respaldos.append({
+                'archivo': ruta,
+                'tamano_bytes': os.path.getsize(ruta),
+                'fecha': datetime.fromtimestamp(os.path.getmtime(ruta)).strftime('%Y-%m-%d %H:%M:%S'),
+                'con_checksum': os.path.exists(_ruta_checksum(ruta)),
+            })
+    # El nombre lleva la fecha con microsegundos: ordenar por nombre es ordenar por fecha
+    respaldos.sort(key=lambda r: r['archivo'], reverse=True)
+    return respaldos
+
+def aplicar_retencion(directorio=DIRECTORIO_RESPALDOS, conservar=CONSERVAR):
+    """Elimina los respaldos más antiguos que excedan 'conservar'; retorna los eliminados"""
+    eliminados = []
+    for respaldo in listar_respaldos(directorio)[conservar:]:
+        for ruta in (respaldo['archivo'], _ruta_checksum(respaldo['archivo'])):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        eliminados.append(respaldo['archivo'])
+    return eliminados
+
+# ==================== VERIFICACIÓN Y RESTAURACIÓN ====================
+
+def verificar_checksum(archivo):
+    """True si el archivo coincide con el SHA-256 guardado a su lado"""
+    with open(_ruta_checksum(archivo), encoding='utf-8') as f:
+        esperado = f.read().split()[0]
+    return _sha256(archivo) == esperado
+
+def restaurar_respaldo(archivo, destino):
+    """Descomprime el respaldo en 'destino' y lo verifica.
+
+    Pensado para una ruta de prueba: no sobrescribe un archivo existente
+    (tampoco la base en uso). Lanza RespaldoInvalido si el checksum o el
+    integrity_check fallan. Retorna un resumen con la cantidad de filas.
+    """
+    if os.path.exists(destino):
+        raise FileExistsError(f'{destino} ya existe')
+    if not verificar_checksum(archivo):
+        raise RespaldoInvalido(f'{archivo} no coincide con su checksum')
+
+    with gzip.open(archivo, 'rb') as entrada, open(destino, 'wb') as salida:
+        shutil.copyfileobj(entrada, salida, TAMANO_BLOQUE)
+
+    conn = sqlite3.connect(destino)
+    try:
+        integridad = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        if integridad != 'ok':
+            raise RespaldoInvalido(f'{archivo} no pasó integrity_check: {integridad}')
+        filas = {tabla: conn.execute(f'SELECT COUNT(*) FROM {tabla}').fetchone()[0]
+                 for tabla in ('usuarios', 'pacientes', 'consultas', 'historial_medico')}
+    finally:
+        conn.close()
+    return {'archivo': archivo, 'destino': destino, 'integridad': integridad, 'filas': filas}
+
+def verificar_respaldo(archivo):
+    """Restaura el respaldo en un directorio temporal, lo verifica y lo descarta"""
+    with tempfile.TemporaryDirectory() as tmp:
+        resultado = restaurar_respaldo(archivo, os.path.join(tmp, 'verificacion.db'))
+    del resultado['destino']
+    return resultado
+
+# ==================== REGISTRO ====================
+
+def registrar_respaldo(conn, respaldo, usuario_id=None):
+    """Agrega el respaldo a mantenimiento_sistema con su duración y tamaño"""
+    conn.execute('''
+        INSERT INTO mantenimiento_sistema
+            (titulo, descripcion, tipo, realizado_por, estado, duracion_ms, tamano_bytes)
+        VALUES ('Respaldo de la base de datos', ?, 'backup', ?, 'completado', ?, ?)
+    ''', (f"{respaldo['archivo']} (sha256 {respaldo['sha256'][:12]})", usuario_id,
+          respaldo['duracion_ms'], respaldo['tamano_bytes']))
+    conn.commit()
+
+# ==================== EJECUCIÓN ====================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Respaldos en caliente de la base de datos')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    crear = subcomandos.add_parser('crear')
+    crear.add_argument('--base', default=DB_PATH)
+    crear.add_argument('--directorio', default=DIRECTORIO_RESPALDOS)
+    crear.add_argument('--conservar', type=int, default=CONSERVAR)
+    listar = subcomandos.add_parser('listar')
+    listar.add_argument('--directorio', default=DIRECTORIO_RESPALDOS)
+    verificar = subcomandos.add_parser('verificar')
+    verificar.add_argument('archivo')
+    restaurar = subcomandos.add_parser('restaurar')
+    restaurar.add_argument('archivo')
+    restaurar.add_argument('destino')
+    args = parser.parse_args()
+
+    try:
+        if args.comando == 'crear':
+            respaldo = crear_respaldo(args.base, args.directorio, conservar=args.conservar)
+            conn = sqlite3.connect(args.base, timeout=30)
+            registrar_respaldo(conn, respaldo)
+            conn.close()
+            print(f"📦 Respaldo creado: {respaldo['archivo']} "
+                  f"({respaldo['tamano_bytes'] / 1024:.0f} KB, {respaldo['duracion_ms']} ms)")
+        elif args.comando == 'listar':
+            for respaldo in listar_respaldos(args.directorio):
+                print(f"{respaldo['fecha']}  {respaldo['tamano_bytes'] / 1024:>10.0f} KB  {respaldo['archivo']}")
+        elif args.comando == 'verificar':
+            print(f"✓ {verificar_respaldo(args.archivo)}")
+        else:
+            print(f"✓ {restaurar_respaldo(args.archivo, args.destino)}")
+    except (OSError, RespaldoInvalido) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,158 @@
+# seguridad.py
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TiempoAgotado
+
+from contrasenas import hash_password, verify_password, necesita_rehash
+
+# ==================== LIMITADOR DE INTENTOS ====================
+
+class LimitadorTasa:
+    """Token bucket por clave (IP, email...) con expiración y tamaño acotado.
+
+    Cada clave guarda solo [fichas, último instante, avisado]. Un bucket que
+    lleva inactivo lo suficiente para volver a llenarse se descarta, porque
+    equivale a no tenerlo; si aun así se supera max_claves se desaloja el
+    menos usado.
+    """
+
+    def __init__(self, capacidad=5, por_segundo=5 / 60, max_claves=100000):
+        self.capacidad = capacidad
+        self.por_segundo = por_segundo
+        self.max_claves = max_claves
+        self._buckets = OrderedDict()   # clave -> [fichas, último, avisado]
+        self._lock = threading.Lock()
+        self._rechazos = 0
+
+    def _purgar(self, ahora):
+        # Los buckets más antiguos están al inicio: se corta en el primero vigente
+        llenado = self.capacidad / self.por_segundo
+        while self._buckets:
+            clave, bucket = next(iter(self._buckets.items()))
+            if ahora - bucket[1] < llenado and len(self._buckets) <= self.max_claves:
+                break
+            del self._buckets[clave]
+
+    def consumir(self, clave):
+        """Consume una ficha. Retorna (permitido, segundos para reintentar, primer rechazo)"""
+        ahora = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(clave, None)
+            if bucket is None:
+                bucket = [float(self.capacidad), ahora, False]
+            else:
+                bucket[0] = min(self.capacidad, bucket[0] + (ahora - bucket[1]) * self.por_segundo)
+                bucket[1] = ahora
+            self._buckets[clave] = bucket
+            self._purgar(ahora)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                bucket[2] = False
+                return True, 0.0, False
+
+            self._rechazos += 1
+            primer_rechazo = not bucket[2]
+            bucket[2] = True
+            return False, (1 - bucket[0]) / self.por_segundo, primer_rechazo
+
+    def estadisticas(self):
+        with self._lock:
+            return {'claves': len(self._buckets), 'rechazos': self._rechazos,
+                    'capacidad': self.capacidad, 'por_minuto': round(self.por_segundo * 60, 2)}
+
+# ==================== VERIFICACIÓN DE CONTRASEÑAS ====================
+
+class ColaLlena(Exception):
+    """No hay lugar en la cola de verificación de contraseñas"""
+
+
+class VerificacionDemorada(Exception):
+    """La verificación no terminó dentro del timeout del verificador"""
+
+
+def _verificar_con_rehash(password, stored_hash):
+    if not verify_password(password, stored_hash):
+        return False, None
+    return True, hash_password(password) if necesita_rehash(stored_hash) else None
+
+
+class VerificadorPasswords:
+    """Verifica contraseñas en un pool de hilos acotado.
+
+    PBKDF2 libera el GIL, así que un pool pequeño limita cuántos núcleos se
+    dedican al hashing. Si ya hay max_en_cola verificaciones esperando se
+    rechaza de inmediato en lugar de acumular peticiones bloqueadas. El hilo
+    de la petición espera el resultado, pero como máximo 'timeout' segundos.
+    """
+
+    def __init__(self, max_trabajadores=2, max_en_cola=16, timeout=10.0):
+        self.max_trabajadores = max_trabajadores
+        self.max_en_cola = max_en_cola
+        self.timeout = timeout
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_trabajadores,
+                                            thread_name_prefix='verificador')
+        self._cupos = threading.BoundedSemaphore(max_trabajadores + max_en_cola)
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._rechazadas = 0
+        self._demoradas = 0
+
+    def _liberar(self):
+        with self._lock:
+            self._pendientes -= 1
+        self._cupos.release()
+
+    def _ejecutar(self, funcion, *args):
+        try:
+            return funcion(*args)
+        finally:
+            self._liberar()
+
+    def _enviar(self, funcion, *args):
+        if not self._cupos.acquire(blocking=False):
+            with self._lock:
+                self._rechazadas += 1
+            raise ColaLlena()
+        with self._lock:
+            self._pendientes += 1
+        futuro = self._ejecutor.submit(self._ejecutar, funcion, *args)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except TiempoAgotado:
+            # Si no llegó a empezar se descarta y su cupo se libera aquí;
+            # si ya está corriendo, _ejecutar lo libera al terminar
+            if futuro.cancel():
+                self._liberar()
+            with self._lock:
+                self._demoradas += 1
+            raise VerificacionDemorada()
+
+    def verificar(self, password, stored_hash):
+        """Verifica en el pool y espera el resultado.
+
+        Lanza ColaLlena si no hay cupo y VerificacionDemorada si el resultado
+        no llega dentro de 'timeout'.
+        """
+        return self._enviar(verify_password, password, stored_hash)
+
+    def verificar_con_rehash(self, password, stored_hash):
+        """Como verificar, pero retorna (válida, nuevo hash o None).
+
+        Si la contraseña es correcta y el hash usa parámetros viejos, el hash
+        nuevo se calcula en el mismo trabajo del pool.
+        """
+        return self._enviar(_verificar_con_rehash, password, stored_hash)
+
+    def estadisticas(self):
+        with self._lock:
+            return {'max_trabajadores': self.max_trabajadores, 'max_en_cola': self.max_en_cola,
+                    'pendientes': self._pendientes, 'rechazadas': self._rechazadas,
+                    'demoradas': self._demoradas}
+
+
+# Instancias compartidas por la aplicación
+limitador_ip = LimitadorTasa(capacidad=20, por_segundo=20 / 60)
+limitador_email = LimitadorTasa(capacidad=5, por_segundo=5 / 60)
+verificador_passwords = VerificadorPasswords()
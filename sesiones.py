@@ -0,0 +1,149 @@
+# sesiones.py
+import threading
+import time
+from functools import wraps
+
+from flask import flash, g, jsonify, redirect, request, session, url_for
+
+from database import get_db_connection
+
+# ==================== CACHE DE USUARIOS ====================
+
+class CacheUsuarios:
+    """Cache en memoria de los datos de autorización de cada usuario.
+
+    Cada entrada guarda la generación en que se cargó. invalidar(user_id)
+    descarta un usuario e invalidar() sube la generación global, lo que anula
+    todas las entradas en O(1). Una carga que se cruza con una invalidación
+    no se guarda, así nunca queda en cache un dato anterior al cambio.
+
+    Los cambios hechos fuera de este proceso se detectan con el contador
+    usuarios_version (mantenido por triggers), consultado como máximo una vez
+    cada 'intervalo' segundos.
+    """
+
+    def __init__(self, cargar, version_bd, ttl=300.0, intervalo=2.0):
+        self._cargar = cargar
+        self._version_bd = version_bd
+        self.ttl = ttl
+        self.intervalo = intervalo
+        self._datos = {}          # user_id -> (generación, expira, usuario)
+        self._versiones = {}      # user_id -> contador de invalidaciones
+        self._generacion = 0
+        self._lock = threading.Lock()
+        self._verificando = threading.Lock()
+        self._ultima_version_bd = None
+        self._proxima_verificacion = 0.0
+        self._aciertos = 0
+        self._cargas = 0
+
+    def _verificar_bd(self, ahora):
+        # Un solo hilo consulta la base; los demás siguen con el cache vigente
+        if ahora < self._proxima_verificacion or not self._verificando.acquire(blocking=False):
+            return
+        try:
+            version = self._version_bd()
+            if self._ultima_version_bd is not None and version != self._ultima_version_bd:
+                self.invalidar()
+            self._ultima_version_bd = version
+            self._proxima_verificacion = ahora + self.intervalo
+        finally:
+            self._verificando.release()
+
+    def obtener(self, user_id):
+        """Retorna el dict del usuario (id, username, nombre, rol, activo) o None si no existe"""
+        ahora = time.monotonic()
+        self._verificar_bd(ahora)
+
+        entrada = self._datos.get(user_id)
+        if entrada is not None and entrada[0] == self._generacion and entrada[1] > ahora:
+            self._aciertos += 1
+            return entrada[2]
+
+        with self._lock:
+            generacion = self._generacion
+            version = self._versiones.get(user_id, 0)
+        usuario = self._cargar(user_id)
+        with self._lock:
+            self._cargas += 1
+            if generacion == self._generacion and version == self._versiones.get(user_id, 0):
+                self._datos[user_id] = (generacion, ahora + self.ttl, usuario)
+        return usuario
+
+    def invalidar(self, user_id=None):
+        """Descarta un usuario, o todos si no se indica user_id"""
+        with self._lock:
+            if user_id is None:
+                self._generacion += 1
+                self._datos.clear()
+            else:
+                self._versiones[user_id] = self._versiones.get(user_id, 0) + 1
+                self._datos.pop(user_id, None)
+
+    def estadisticas(self):
+        with self._lock:
+            return {'entradas': len(self._datos), 'generacion': self._generacion,
+                    'aciertos': self._aciertos, 'cargas': self._cargas,
+                    'version_bd': self._ultima_version_bd}
+
+
+def _cargar_usuario(user_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, username, nombre, rol, activo FROM usuarios WHERE id = ?', (user_id,))
+    usuario = cursor.fetchone()
+    conn.close()
+    return dict(usuario) if usuario else None
+
+def _version_usuarios():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT version FROM usuarios_version WHERE id = 1')
+    fila = cursor.fetchone()
+    conn.close()
+    return fila[0] if fila else 0
+
+
+cache_usuarios = CacheUsuarios(_cargar_usuario, _version_usuarios)
+
+# ==================== AUTORIZACIÓN ====================
+
+def usuario_actual():
+    """Retorna el usuario de la sesión si existe y está activo; si no, None"""
+    user_id = session.get('user_id')
+    if user_id is None:
+        return None
+    usuario = cache_usuarios.obtener(user_id)
+    if not usuario or not usuario['activo']:
+        return None
+    return usuario
+
+def requiere_sesion(*roles, api=False):
+    """Decorador de autorización para todas las rutas.
+
+    Verifica contra el cache de usuarios (sin consultar la base) que la
+    sesión pertenezca a un usuario activo y, si se indican, con uno de los
+    roles. Las rutas api y las peticiones que no son GET reciben 401 en JSON;
+    las páginas redirigen al login.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            usuario = usuario_actual()
+            if usuario is None or (roles and usuario['rol'] not in roles):
+                if usuario is None:
+                    session.clear()
+                if api or request.method != 'GET':
+                    return jsonify({'success': False, 'error': 'No autorizado',
+                                    'message': 'No autorizado'}), 401
+                flash('Debe iniciar sesión' if usuario is None else 'Acceso denegado', 'error')
+                return redirect(url_for('login'))
+
+            # Reflejar en la cookie cambios de nombre o rol hechos por un admin
+            if session.get('rol') != usuario['rol'] or session.get('nombre') != usuario['nombre']:
+                session['rol'] = usuario['rol']
+                session['nombre'] = usuario['nombre']
+            g.usuario = usuario
+            return vista(*args, **kwargs)
+        return envoltura
+    return decorador
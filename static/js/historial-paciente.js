@@ -4,22 +4,42 @@ document.addEventListener("DOMContentLoaded", () => {
     const historialDiv = document.getElementById("historialPaciente");
     const buscador = document.querySelector(".search-box input");
 
-    let pacientesGlobal = []; // almacenamos los pacientes
-
-    // ===== 1) Obtener lista de pacientes desde Flask =====
-    fetch("/api/pacientes")
-        .then(res => res.json())
-        .then(data => {
-            pacientesGlobal = data;
-            mostrarPacientes(data);
-        })
-        .catch(err => console.error("Error cargando pacientes", err));
+    const LIMITE = 50;
+    let siguienteCursor = null;
+    let busquedaActual = "";
+    let peticionActual = null;
+    let temporizador = null;
+
+    // ===== 1) Obtener pacientes desde Flask (paginado y filtrado en el servidor) =====
+    function cargarPacientes(texto, cursor) {
+        if (peticionActual) peticionActual.abort();
+        peticionActual = new AbortController();
+
+        const params = new URLSearchParams({ limit: LIMITE });
+        if (texto) params.set("q", texto);
+        if (cursor) params.set("cursor", cursor);
+
+        fetch(`/api/pacientes?${params}`, { signal: peticionActual.signal })
+            .then(res => res.json())
+            .then(data => {
+                siguienteCursor = data.next_cursor;
+                mostrarPacientes(data.pacientes, Boolean(cursor));
+            })
+            .catch(err => {
+                if (err.name !== "AbortError") console.error("Error cargando pacientes", err);
+            });
+    }
+
+    cargarPacientes("", null);
 
     // ===== Mostrar lista =====
-    function mostrarPacientes(lista) {
-        listaPacientesDiv.innerHTML = "";
+    function mostrarPacientes(lista, agregar) {
+        const botonPrevio = document.getElementById("cargarMasPacientes");
+        if (botonPrevio) botonPrevio.remove();
 
-        if (lista.length === 0) {
+        if (!agregar) listaPacientesDiv.innerHTML = "";
+
+        if (!agregar && lista.length === 0) {
             listaPacientesDiv.innerHTML = "<p>No hay pacientes encontrados</p>";
             return;
         }
@@ -35,48 +55,51 @@ document.addEventListener("DOMContentLoaded", () => {
             div.addEventListener("click", () => cargarHistorial(p.id));
             listaPacientesDiv.appendChild(div);
         });
+
+        if (siguienteCursor) {
+            const boton = document.createElement("button");
+            boton.id = "cargarMasPacientes";
+            boton.classList.add("load-more");
+            boton.textContent = "Cargar más pacientes";
+            boton.addEventListener("click", () => cargarPacientes(busquedaActual, siguienteCursor));
+            listaPacientesDiv.appendChild(boton);
+        }
     }
 
-    // ===== 2) Búsqueda =====
-    buscador.addEventListener("keyup", () => {
-        const text = buscador.value.toLowerCase();
-        const filtrados = pacientesGlobal.filter(p =>
-            p.nombre.toLowerCase().includes(text) ||
-            p.dueno.toLowerCase().includes(text)
-        );
-        mostrarPacientes(filtrados);
+    // ===== 2) Búsqueda en el servidor mientras se escribe =====
+    buscador.addEventListener("input", () => {
+        clearTimeout(temporizador);
+        temporizador = setTimeout(() => {
+            const texto = buscador.value.trim();
+            if (texto === busquedaActual) return;
+            busquedaActual = texto;
+            cargarPacientes(texto, null);
+        }, 250);
     });
 
-    // ===== 3) Obtener historial del paciente =====
+    // ===== 3) Línea de tiempo del paciente (consultas + historial) =====
+    // Primera página guardada por paciente con su ETag: si no cambió, el servidor
+    // responde 304 y se reutiliza sin volver a descargarla
+    const lineasGuardadas = new Map();
+
     function cargarHistorial(id) {
 
-        historialDiv.innerHTML = "<p>Cargando...</p>";
+        const guardada = lineasGuardadas.get(id);
+        if (!guardada) historialDiv.innerHTML = "<p>Cargando...</p>";
 
-        fetch(`/api/patient-history/${id}`)
-            .then(res => res.json())
-            .then(historial => {
-                if (!historial.length) {
-                    historialDiv.innerHTML = `
-                        <div class="empty">
-                            <p>El paciente no tiene historial registrado.</p>
-                        </div>
-                    `;
-                    return;
-                }
-
-                historialDiv.innerHTML = "";
-                historial.forEach(item => {
-                    const div = document.createElement("div");
-                    div.classList.add("hist-item");
-                    div.innerHTML = `
-                        <p><strong>Fecha:</strong> ${item.fecha}</p>
-                        <p><strong>Doctor:</strong> ${item.doctor_nombre || "No registrado"}</p>
-                        <p><strong>Motivo:</strong> ${item.motivo}</p>
-                        <hr>
-                    `;
-                    historialDiv.appendChild(div);
+        fetch(`/api/patient/${id}/timeline?limit=${LIMITE}`, {
+            cache: "no-store",
+            headers: guardada ? { "If-None-Match": guardada.etag } : {}
+        })
+            .then(res => {
+                if (res.status === 304) return guardada.data;
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                return res.json().then(data => {
+                    lineasGuardadas.set(id, { etag: res.headers.get("ETag"), data });
+                    return data;
                 });
             })
+            .then(data => mostrarHistorial(id, data, false))
             .catch(err => {
                 historialDiv.innerHTML = "<p>Error cargando historial.</p>";
                 console.error(err);
@@ -84,4 +107,54 @@ document.addEventListener("DOMContentLoaded", () => {
 
     }
 
+    function cargarMasHistorial(id, cursor) {
+        const params = new URLSearchParams({ limit: LIMITE, cursor });
+        fetch(`/api/patient/${id}/timeline?${params}`)
+            .then(res => res.json())
+            .then(data => mostrarHistorial(id, data, true))
+            .catch(err => console.error("Error cargando historial", err));
+    }
+
+    function mostrarHistorial(id, data, agregar) {
+        const botonPrevio = document.getElementById("cargarMasHistorial");
+        if (botonPrevio) botonPrevio.remove();
+
+        if (!agregar && !data.eventos.length) {
+            historialDiv.innerHTML = `
+                <div class="empty">
+                    <p>El paciente no tiene historial registrado.</p>
+                </div>
+            `;
+            return;
+        }
+
+        if (!agregar) historialDiv.innerHTML = "";
+        data.eventos.forEach(item => {
+            const div = document.createElement("div");
+            div.classList.add("hist-item");
+            div.innerHTML = `
+                <p><strong>Fecha:</strong> ${item.fecha}</p>
+                <p><strong>Tipo:</strong> ${item.tipo}${item.estado ? ` (${item.estado})` : ""}</p>
+                <p><strong>Doctor:</strong> ${item.doctor || "No registrado"}</p>
+                ${item.motivo ? `<p><strong>Motivo:</strong> ${item.motivo}</p>` : ""}
+                ${item.diagnostico ? `<p><strong>Diagnóstico:</strong> ${item.diagnostico}</p>` : ""}
+                ${item.tratamiento ? `<p><strong>Tratamiento:</strong> ${item.tratamiento}</p>` : ""}
+                ${item.medicamentos ? `<p><strong>Medicamentos:</strong> ${item.medicamentos}</p>` : ""}
+                ${item.descripcion ? `<p>${item.descripcion}</p>` : ""}
+                ${item.costo != null ? `<p><strong>Costo:</strong> $${item.costo}</p>` : ""}
+                <hr>
+            `;
+            historialDiv.appendChild(div);
+        });
+
+        if (data.next_cursor) {
+            const boton = document.createElement("button");
+            boton.id = "cargarMasHistorial";
+            boton.classList.add("load-more");
+            boton.textContent = "Cargar más eventos";
+            boton.addEventListener("click", () => cargarMasHistorial(id, data.next_cursor));
+            historialDiv.appendChild(boton);
+        }
+    }
+
 });
@@ -0,0 +1,308 @@
+# tareas.py
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database import get_db_connection
+
+ESPERA_BASE_REINTENTO = 2.0    # segundos; se duplica en cada reintento
+MAX_ESPERA_REINTENTO = 300.0
+# Una tarea en proceso cuyo dueño no dio señales en este tiempo se considera abandonada
+CONCESION_SEGUNDOS = 120
+LATIDO_SEGUNDOS = 30
+# Errores en los parámetros de la tarea: reintentar no cambiaría el resultado
+ERRORES_DEFINITIVOS = (ValueError, TypeError, KeyError)
+
+
+class ColaTareas:
+    """Tareas largas (archivo, purgas, contadores...) fuera de la petición HTTP.
+
+    Cada tarea es una fila de 'tareas' con su progreso, así el estado
+    sobrevive a reinicios y se consulta desde cualquier proceso; la ejecución
+    corre en un pool de hilos. Un fallo transitorio (base bloqueada, disco)
+    se reintenta con espera exponencial hasta max_intentos.
+
+    Al tomar una tarea el proceso la marca con su worker_id y renueva
+    actualizado_en mientras la ejecuta; otro proceso (el reloader de Flask,
+    un segundo worker) solo la retoma si esa concesión venció.
+    """
+
+    def __init__(self, max_trabajadores=2):
+        self.max_trabajadores = max_trabajadores
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{id(self):x}'
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_trabajadores,
+                                            thread_name_prefix='tarea')
+        self._manejadores = {}   # tipo -> (función, título, tipo de mantenimiento, max_intentos)
+        self._latido = None
+        self._abandonadas = set()   # tareas que no pudimos liberar: su concesión no se renueva
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo, funcion, titulo, tipo_mantenimiento='mantenimiento', max_intentos=3):
+        """Asocia un tipo de tarea a funcion(conn, parametros, progreso) -> resultado (JSON)"""
+        self._manejadores[tipo] = (funcion, titulo, tipo_mantenimiento, max_intentos)
+
+    @property
+    def tipos(self):
+        return sorted(self._manejadores)
+
+    # ==================== ENCOLAR ====================
+
+    def encolar(self, tipo, parametros=None, usuario_id=None):
+        """Registra la tarea como pendiente y la envía al pool; retorna su id"""
+        if tipo not in self._manejadores:
+            raise ValueError(f'Tipo de tarea desconocido: {tipo}')
+        _, titulo, tipo_mantenimiento, max_intentos = self._manejadores[tipo]
+        parametros = parametros or {}
+
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO mantenimiento_sistema (titulo, descripcion, tipo, realizado_por, estado)
+                VALUES (?, ?, ?, ?, 'pendiente')
+            ''', (titulo, f'Tarea en segundo plano: {tipo}', tipo_mantenimiento, usuario_id))
+            cursor.execute('''
+                INSERT INTO tareas (tipo, parametros, max_intentos, creado_por, mantenimiento_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (tipo, json.dumps(parametros), max_intentos, usuario_id, cursor.lastrowid))
+            tarea_id = cursor.lastrowid
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        self._programar(tarea_id, 0)
+        return tarea_id
+
+    def _programar(self, tarea_id, espera):
+        self._iniciar_latido()
+        if espera <= 0:
+            self._ejecutor.submit(self._ejecutar, tarea_id)
+            return
+        temporizador = threading.Timer(espera, self._ejecutor.submit, (self._ejecutar, tarea_id))
+        temporizador.daemon = True
+        temporizador.start()
+
+    def reanudar(self):
+        """Vuelve a programar las tareas pendientes y las abandonadas por un proceso caído.
+
+        Se llama una vez al arrancar, desde el proceso que atiende las tareas
+        (no al importar el módulo). Las tareas en proceso con la concesión
+        vigente pertenecen a otro proceso vivo y no se tocan.
+        """
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE tareas
+                SET estado = 'pendiente', worker_id = NULL
+                WHERE estado = 'en_proceso'
+                  AND (actualizado_en IS NULL
+                       OR actualizado_en < datetime('now', '-' || ? || ' seconds'))
+            ''', (CONCESION_SEGUNDOS,))
+            conn.commit()
+            cursor.execute('''
+                SELECT id,
+                       MAX(0, (julianday(proximo_intento) - julianday('now')) * 86400) AS espera
+                FROM tareas
+                WHERE estado = 'pendiente'
+                ORDER BY id
+            ''')
+            pendientes = cursor.fetchall()
+        finally:
+            conn.close()
+        for tarea_id, espera in pendientes:
+            self._programar(tarea_id, espera or 0)
+        return len(pendientes)
+
+    # ==================== EJECUCIÓN ====================
+
+    def _ejecutar(self, tarea_id):
+        conn = get_db_connection()
+        tomada = False
+        try:
+            # Solo un trabajador (de este u otro proceso) puede tomar la tarea
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE tareas
+                SET estado = 'en_proceso',
+                    intentos = intentos + 1,
+                    proximo_intento = NULL,
+                    worker_id = ?,
+                    actualizado_en = CURRENT_TIMESTAMP,
+                    fecha_inicio = COALESCE(fecha_inicio, CURRENT_TIMESTAMP)
+                WHERE id = ? AND estado = 'pendiente'
+            ''', (self.worker_id, tarea_id))
+            if cursor.rowcount == 0:
+                conn.commit()
+                return
+            tomada = True
+            with self._lock:
+                self._abandonadas.discard(tarea_id)
+            cursor.execute('''
+                UPDATE mantenimiento_sistema SET estado = 'en_proceso'
+                WHERE id = (SELECT mantenimiento_id FROM tareas WHERE id = ?)
+            ''', (tarea_id,))
+            conn.commit()
+
+            cursor.execute('SELECT tipo, parametros, intentos, max_intentos FROM tareas WHERE id = ?',
+                           (tarea_id,))
+            tipo, parametros, intentos, max_intentos = cursor.fetchone()
+
+            def progreso(hechos, total=None):
+                conn.execute('''
+                    UPDATE tareas
+                    SET progreso = ?, total = COALESCE(?, total), actualizado_en = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (hechos, total, tarea_id))
+                conn.commit()
+
+            inicio = time.perf_counter()
+            try:
+                funcion = self._manejadores[tipo][0]
+                resultado = funcion(conn, json.loads(parametros), progreso)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._fallo(conn, tarea_id, tipo, e, intentos, max_intentos)
+                return
+
+            try:
+                cursor.execute('''
+                    UPDATE tareas
+                    SET estado = 'completado', resultado = ?, error = NULL, worker_id = NULL,
+                        fecha_fin = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (json.dumps(resultado), tarea_id))
+                # Duración del intento exitoso; el tamaño, si la tarea produce un archivo
+                tamano = resultado.get('tamano_bytes') if isinstance(resultado, dict) else None
+                cursor.execute('''
+                    UPDATE mantenimiento_sistema
+                    SET estado = 'completado', duracion_ms = ?, tamano_bytes = ?
+                    WHERE id = (SELECT mantenimiento_id FROM tareas WHERE id = ?)
+                ''', (round((time.perf_counter() - inicio) * 1000), tamano, tarea_id))
+                conn.commit()
+            except Exception as e:
+                # Sin esto la tarea quedaría en proceso con nuestra concesión renovada para siempre
+                if conn.in_transaction:
+                    conn.rollback()
+                self._fallo(conn, tarea_id, tipo, e, intentos, max_intentos)
+        except Exception as e:
+            print(f"Error ejecutando la tarea {tarea_id}: {e}")
+            if tomada:
+                self._liberar(tarea_id, e)
+        finally:
+            conn.close()
+
+    def _liberar(self, tarea_id, error):
+        """Devuelve a pendiente una tarea nuestra cuyo estado no se pudo registrar"""
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute('''
+                UPDATE tareas
+                SET estado = 'pendiente', worker_id = NULL, error = ?,
+                    proximo_intento = datetime('now', '+' || ? || ' seconds')
+                WHERE id = ? AND estado = 'en_proceso' AND worker_id = ?
+            ''', (str(error), int(ESPERA_BASE_REINTENTO), tarea_id, self.worker_id))
+            liberada = cursor.rowcount
+            conn.commit()
+        except Exception as e:
+            # La concesión dejará de renovarse y vencerá: reanudar() la retomará
+            print(f"Error liberando la tarea {tarea_id}: {e}")
+            with self._lock:
+                self._abandonadas.add(tarea_id)
+            return
+        finally:
+            conn.close()
+        if liberada:
+            self._programar(tarea_id, ESPERA_BASE_REINTENTO)
+
+    def _iniciar_latido(self):
+        with self._lock:
+            if self._latido is None:
+                self._latido = threading.Thread(target=self._latir, name='tarea-latido', daemon=True)
+                self._latido.start()
+
+    def _latir(self):
+        """Renueva la concesión de las tareas que este proceso tiene en proceso"""
+        while True:
+            time.sleep(LATIDO_SEGUNDOS)
+            with self._lock:
+                abandonadas = list(self._abandonadas)
+            conn = get_db_connection()
+            try:
+                conn.execute(f'''
+                    UPDATE tareas SET actualizado_en = CURRENT_TIMESTAMP
+                    WHERE estado = 'en_proceso' AND worker_id = ?
+                      AND id NOT IN ({', '.join('?' * len(abandonadas))})
+                ''', (self.worker_id, *abandonadas))
+                conn.commit()
+            except Exception as e:
+                print(f"Error renovando la concesión de las tareas: {e}")
+            finally:
+                conn.close()
+
+    def _fallo(self, conn, tarea_id, tipo, error, intentos, max_intentos):
+        print(f"Error en tarea {tarea_id} ({tipo}), intento {intentos}/{max_intentos}: {error}")
+        cursor = conn.cursor()
+        if not isinstance(error, ERRORES_DEFINITIVOS) and intentos < max_intentos:
+            espera = min(ESPERA_BASE_REINTENTO * 2 ** (intentos - 1), MAX_ESPERA_REINTENTO)
+            cursor.execute('''
+                UPDATE tareas
+                SET estado = 'pendiente', error = ?, worker_id = NULL,
+                    proximo_intento = datetime('now', '+' || ? || ' seconds')
+                WHERE id = ?
+            ''', (str(error), int(espera), tarea_id))
+            conn.commit()
+            self._programar(tarea_id, espera)
+            return
+
+        cursor.execute('''
+            UPDATE tareas
+            SET estado = 'error', error = ?, worker_id = NULL, fecha_fin = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (str(error), tarea_id))
+        # mantenimiento_sistema registra los fallos con tipo 'error'
+        cursor.execute('''
+            UPDATE mantenimiento_sistema
+            SET tipo = 'error', estado = 'completado', descripcion = descripcion || ' - ' || ?
+            WHERE id = (SELECT mantenimiento_id FROM tareas WHERE id = ?)
+        ''', (str(error), tarea_id))
+        conn.commit()
+
+    # ==================== CONSULTA ====================
+
+    def estado(self, tarea_id):
+        """Estado de la tarea como dict (parámetros y resultado decodificados), o None"""
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, tipo, parametros, estado, progreso, total, resultado, error,
+                       intentos, max_intentos, proximo_intento, creado_por, worker_id, actualizado_en,
+                       fecha_creacion, fecha_inicio, fecha_fin
+                FROM tareas
+                WHERE id = ?
+            ''', (tarea_id,))
+            fila = cursor.fetchone()
+        finally:
+            conn.close()
+        if fila is None:
+            return None
+
+        tarea = dict(fila)
+        tarea['parametros'] = json.loads(tarea['parametros'])
+        tarea['resultado'] = json.loads(tarea['resultado']) if tarea['resultado'] else None
+        tarea['porcentaje'] = (round(100 * tarea['progreso'] / tarea['total'], 1)
+                               if tarea['total'] else None)
+        return tarea
+
+
+# Instancia compartida por la aplicación
+cola_tareas = ColaTareas()
@@ -0,0 +1,46 @@
+# tests/conftest.py
+import os
+import shutil
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Aplicación sobre una copia de clinic.db en un directorio temporal"""
+    directorio = tmp_path_factory.mktemp('clinica')
+    shutil.copy(os.path.join(RAIZ, 'clinic.db'), directorio / 'clinic.db')
+    # La aplicación usa 'clinic.db' relativo al directorio actual
+    os.chdir(directorio)
+    import calc_app
+    calc_app.app.testing = True
+    return calc_app.app
+
+
+def _sesion(app, email, password):
+    cliente = app.test_client()
+    respuesta = cliente.post('/login', json={'email': email, 'password': password})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return cliente
+
+
+@pytest.fixture(scope='session')
+def admin(app):
+    return _sesion(app, 'admin@vetclinic.com', 'Admin123!')
+
+
+@pytest.fixture(scope='session')
+def doctor(app):
+    return _sesion(app, 'mlopez@vetclinic.com', 'DraLopez456!')
+
+
+@pytest.fixture
+def conn(app):
+    from database import get_db_connection
+    conexion = get_db_connection()
+    yield conexion
+    conexion.close()
@@ -0,0 +1,23 @@
+# tests/test_agenda.py
+from datetime import datetime
+
+import pytest
+
+from agenda import leer_fecha_hora
+
+
+@pytest.mark.parametrize('texto', ['2026-10-19 09:30', '2026-10-19T09:30:45', ' 2026-10-19 09:30:00 '])
+def test_leer_fecha_hora_local(texto):
+    assert leer_fecha_hora(texto) == datetime(2026, 10, 19, 9, 30)
+
+
+@pytest.mark.parametrize('texto', ['2026-10-19T09:30Z', '2026-10-19T09:30:00-03:00', '2026-10-19 09:30+05:30'])
+def test_leer_fecha_hora_rechaza_desplazamientos(texto):
+    with pytest.raises(ValueError, match='zona horaria'):
+        leer_fecha_hora(texto)
+
+
+def test_reservar_con_desplazamiento_responde_400(doctor):
+    respuesta = doctor.post('/api/agenda/book', json={'inicio': '2026-10-19T09:30:00Z', 'paciente_id': 1})
+    assert respuesta.status_code == 400
+    assert 'zona horaria' in respuesta.get_json()['message']
@@ -0,0 +1,47 @@
+# tests/test_asgi.py
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def adaptador(app):
+    # asgi importa calc_app: se importa después de que 'app' apunte a la base temporal
+    from asgi import AdaptadorASGI
+    return AdaptadorASGI(app, trabajadores_api=1, max_cuerpo=1000)
+
+
+def _post(adaptador, partes, headers=()):
+    """Envía un POST con el cuerpo en 'partes'; retorna (status, en_curso al recibir cada parte)"""
+    enviados, en_curso = [], []
+    mensajes = [{'type': 'http.request', 'body': parte, 'more_body': i < len(partes) - 1}
+                for i, parte in enumerate(partes)]
+
+    async def receive():
+        en_curso.append(adaptador._en_curso)
+        return mensajes.pop(0)
+
+    async def send(mensaje):
+        enviados.append(mensaje)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/import', 'headers': list(headers)}
+    asyncio.run(adaptador(scope, receive, send))
+    return enviados[0]['status'], en_curso
+
+
+def test_cuerpo_mayor_al_limite_responde_413(adaptador):
+    status, recibidas = _post(adaptador, [b'x' * 600] * 5)
+    # Corta en cuanto pasa el límite, sin leer el resto
+    assert status == 413 and len(recibidas) == 2
+    assert adaptador._en_curso == 0
+
+
+def test_content_length_excesivo_se_rechaza_sin_leer(adaptador):
+    status, recibidas = _post(adaptador, [b'x'], headers=[(b'content-length', b'5000')])
+    assert status == 413 and recibidas == []
+
+
+def test_peticion_cuenta_en_curso_mientras_se_recibe(adaptador):
+    status, recibidas = _post(adaptador, [b'{}'])
+    assert recibidas == [1] and adaptador._en_curso == 0
+    assert status != 413
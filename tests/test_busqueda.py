@@ -0,0 +1,29 @@
+# tests/test_busqueda.py
+from busqueda import buscar, resaltar
+
+
+def test_resaltar_escapa_el_texto_guardado():
+    assert resaltar('<b>\x02Luna\x03</b> & "x"') == '&lt;b&gt;<mark>Luna</mark>&lt;/b&gt; &amp; &quot;x&quot;'
+
+
+def test_fragmento_no_inyecta_html(admin, conn):
+    conn.execute('''
+        INSERT INTO pacientes (nombre, especie, nombre_dueno, telefono_dueno, notas)
+        VALUES ('Firulais', 'Perro', 'Ana', '555-0000', '<script>alert(1)</script> zorrito travieso')
+    ''')
+    conn.commit()
+    respuesta = admin.get('/api/search?q=zorrito')
+    fragmentos = [r['fragmento'] for r in respuesta.get_json()['resultados']]
+    assert fragmentos
+    assert all('<script>' not in f for f in fragmentos)
+    assert any('&lt;script&gt;' in f and '<mark>' in f for f in fragmentos)
+
+
+def test_relevancia_normalizada_por_fuente(app, conn):
+    resultados = buscar(conn, 'control', limite=50)
+    assert resultados
+    relevancias = [r['relevancia'] for r in resultados]
+    assert relevancias == sorted(relevancias, reverse=True)
+    assert all(0 < r <= 1 for r in relevancias)
+    for tipo in {r['tipo'] for r in resultados}:
+        assert max(r['relevancia'] for r in resultados if r['tipo'] == tipo) == 1.0
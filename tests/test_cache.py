@@ -0,0 +1,34 @@
+# tests/test_cache.py
+from cache import CacheLRU
+
+
+def _calculo_con_invalidacion(cache, *etiquetas_invalidadas, prefijo=None):
+    def calcular():
+        # Un cambio llega mientras se calcula el valor viejo
+        if prefijo:
+            cache.invalidar_prefijo(prefijo)
+        cache.invalidar(*etiquetas_invalidadas)
+        return 'viejo'
+    return calcular
+
+
+def test_invalidacion_durante_el_calculo_no_guarda_el_valor():
+    cache = CacheLRU()
+    valor = cache.obtener_o_calcular('stats', _calculo_con_invalidacion(cache, 'consultas'),
+                                     etiquetas=('consultas',))
+    assert valor == 'viejo'
+    assert cache.obtener('stats') is None
+
+
+def test_invalidar_prefijo_durante_el_calculo_no_guarda_el_valor():
+    cache = CacheLRU()
+    cache.obtener_o_calcular('doctor:2', _calculo_con_invalidacion(cache, prefijo='consultas'),
+                             etiquetas=('consultas:doctor:2',))
+    assert cache.obtener('doctor:2') is None
+
+
+def test_invalidar_otra_etiqueta_no_afecta_el_calculo():
+    cache = CacheLRU()
+    cache.obtener_o_calcular('stats', _calculo_con_invalidacion(cache, 'usuarios'),
+                             etiquetas=('consultas',))
+    assert cache.obtener('stats') == 'viejo'
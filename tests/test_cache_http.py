@@ -0,0 +1,29 @@
+# tests/test_cache_http.py
+from cache import cache_lectura
+from cache_http import versiones_tablas
+
+
+def test_cambio_de_una_tabla_invalida_solo_sus_etiquetas(app, conn):
+    versiones_tablas()
+    cache_lectura.guardar('prueba:pacientes', 1, etiquetas=('pacientes',))
+    cache_lectura.guardar('prueba:doctor', 2, etiquetas=('consultas:doctor:2',))
+    cache_lectura.guardar('prueba:usuarios', 3, etiquetas=('usuarios',))
+
+    # Escritura hecha por fuera de la aplicación: solo la registra el trigger
+    conn.execute("UPDATE consultas SET motivo = motivo WHERE id = (SELECT MIN(id) FROM consultas)")
+    conn.commit()
+    versiones_tablas()
+
+    assert cache_lectura.obtener('prueba:doctor') is None
+    assert cache_lectura.obtener('prueba:pacientes') == 1
+    assert cache_lectura.obtener('prueba:usuarios') == 3
+
+
+def test_etag_cambia_con_el_mes_utc_de_las_estadisticas(app, monkeypatch):
+    import cache_http
+    with app.test_request_context('/admin/stats'):
+        monkeypatch.setattr(cache_http, 'rango_mes', lambda: ('2026-10-01', '2026-11-01'))
+        octubre = cache_http.calcular_etag(('consultas',))
+        assert cache_http.calcular_etag(('consultas',)) == octubre
+        monkeypatch.setattr(cache_http, 'rango_mes', lambda: ('2026-11-01', '2026-12-01'))
+        assert cache_http.calcular_etag(('consultas',)) != octubre
@@ -0,0 +1,67 @@
+# tests/test_exportacion.py
+import json
+import sqlite3
+import tracemalloc
+
+import pytest
+
+from exportacion import construir_consulta, exportar
+
+
+def test_rango_inclusivo_de_dias():
+    sql, params = construir_consulta('consultas', desde='2024-01-16', hasta='2024-01-18')
+    assert 't.fecha_consulta >= ? AND t.fecha_consulta < ?' in sql
+    assert params == ['2024-01-16', '2024-01-19']
+
+
+def test_rango_abierto_de_un_lado():
+    sql, params = construir_consulta('historial', hasta='2024-01-18', doctor_id=2)
+    assert 't.fecha >= ?' not in sql
+    assert params == ['2024-01-19', 2]
+
+
+def test_exportacion_filtra_por_fechas(admin):
+    respuesta = admin.get('/api/export/consultas?desde=2024-01-16&hasta=2024-01-18')
+    assert respuesta.status_code == 200
+    fechas = {json.loads(linea)['fecha_consulta'][:10] for linea in respuesta.data.decode().splitlines()}
+    assert fechas == {'2024-01-16', '2024-01-17', '2024-01-18'}
+
+
+def test_fecha_invalida_responde_400(admin):
+    assert admin.get('/api/export/consultas?desde=2024-13-01').status_code == 400
+
+
+def _pico_exportacion(ruta, formato, comprimir=False):
+    """Pico de memoria (bytes) de recorrer la exportación completa con lotes de 100 filas"""
+    conn = sqlite3.connect(ruta)
+    tracemalloc.start()
+    try:
+        total = sum(len(b) for b in exportar(conn, 'consultas', formato, comprimir=comprimir, tamano_lote=100))
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        conn.close()
+    return total, pico
+
+
+@pytest.mark.parametrize('formato, comprimir', [('ndjson', False), ('csv', False), ('ndjson', True)])
+def test_memoria_de_la_exportacion_no_crece_con_las_filas(tmp_path, formato, comprimir):
+    picos = {}
+    for filas in (2000, 40000):
+        ruta = tmp_path / f'{filas}.db'
+        conn = sqlite3.connect(ruta)
+        conn.execute('''
+            CREATE TABLE consultas (id INTEGER PRIMARY KEY, paciente_id INTEGER, doctor_id INTEGER,
+                                    fecha_consulta TEXT, motivo TEXT, diagnostico TEXT)
+        ''')
+        conn.executemany('INSERT INTO consultas VALUES (?, ?, ?, ?, ?, ?)', (
+            (i, i % 500, i % 7, f'2024-01-{i % 28 + 1:02d} 10:00:00', 'Control general', 'Sin hallazgos ' * 5)
+            for i in range(1, filas + 1)))
+        conn.commit()
+        conn.close()
+        total, picos[filas] = _pico_exportacion(ruta, formato, comprimir)
+        assert total > 0
+
+    # Solo hay un lote en memoria: 20 veces más filas no mueven el pico
+    assert picos[40000] < 1024 * 1024
+    assert picos[40000] < picos[2000] * 1.5 + 64 * 1024
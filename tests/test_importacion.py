@@ -0,0 +1,80 @@
+# tests/test_importacion.py
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+
+def _lunes_futuro(semanas=4):
+    hoy = date.today()
+    return hoy + timedelta(days=7 * semanas - hoy.weekday())
+
+
+def _importar_consultas(admin, *filas):
+    cuerpo = ''.join(json.dumps(fila) + '\n' for fila in filas)
+    respuesta = admin.post('/api/import/consultas?format=ndjson', data=cuerpo.encode('utf-8'))
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+
+@pytest.mark.parametrize('texto', ['2026-10-19 09:00', '2026-10-19T09:00', '2026-10-19T09:00:00'])
+def test_fecha_se_guarda_en_formato_canonico(texto):
+    from importacion import _fecha
+    assert _fecha(texto) == '2026-10-19 09:00:00'
+
+
+def test_fecha_sin_hora_se_guarda_tal_cual():
+    from importacion import _fecha
+    assert _fecha('2025-12-12') == '2025-12-12'
+
+
+@pytest.mark.parametrize('texto', ['20261019', '2026-10-19 9h', '2026-02-30'])
+def test_fecha_rechaza_formatos_compactos_o_invalidos(texto):
+    from importacion import validar_fila
+    valores, error = validar_fila('consultas', {
+        'paciente_id': 1, 'doctor_id': 3, 'fecha_consulta': texto, 'motivo': 'Control'})
+    assert valores is None
+    assert error.startswith('fecha_consulta')
+
+
+def test_consulta_importada_bloquea_el_turno_en_la_agenda(admin, conn):
+    inicio = datetime.combine(_lunes_futuro(), datetime.min.time()).replace(hour=10)
+    resumen = _importar_consultas(admin, {
+        'paciente_id': 1, 'doctor_id': 3, 'motivo': 'Control',
+        'fecha_consulta': inicio.strftime('%Y-%m-%dT%H:%M')})
+    assert resumen['insertadas'] == 1
+
+    guardada = conn.execute(
+        'SELECT fecha_consulta FROM consultas WHERE doctor_id = 3 ORDER BY id DESC LIMIT 1').fetchone()[0]
+    assert guardada == inicio.strftime('%Y-%m-%d %H:%M:%S')
+
+    respuesta = admin.post('/api/agenda/book', json={
+        'doctor_id': 3, 'paciente_id': 1, 'inicio': inicio.strftime('%Y-%m-%d %H:%M')})
+    assert respuesta.status_code == 409
+
+
+def test_filas_con_fecha_invalida_se_reportan_por_linea(admin):
+    resumen = _importar_consultas(
+        admin,
+        {'paciente_id': 1, 'doctor_id': 3, 'motivo': 'Control', 'fecha_consulta': '20261019'},
+        {'paciente_id': 1, 'doctor_id': 3, 'motivo': 'Control', 'fecha_consulta': '2026-10-19 9h'})
+    assert resumen['insertadas'] == 0
+    assert [e['linea'] for e in resumen['errores']] == [1, 2]
+
+
+def test_consultas_exportadas_se_vuelven_a_importar(admin):
+    # Diciembre de 2025 tiene consultas cargadas con el formulario (solo fecha)
+    exportadas = [json.loads(linea) for linea in
+                  admin.get('/api/export/consultas?desde=2025-12-01&hasta=2025-12-31').data.decode().splitlines()]
+    assert any(len(fila['fecha_consulta']) == 10 for fila in exportadas)
+    for fila in exportadas:
+        del fila['id']
+
+    resumen = _importar_consultas(admin, *exportadas)
+    assert resumen['errores'] == []
+    assert resumen['insertadas'] == len(exportadas)
+
+    reimportadas = [json.loads(linea) for linea in
+                    admin.get('/api/export/consultas?desde=2025-12-01&hasta=2025-12-31').data.decode().splitlines()]
+    fechas = sorted(fila['fecha_consulta'] for fila in exportadas)
+    assert sorted(fila['fecha_consulta'] for fila in reimportadas) == sorted(fechas * 2)
@@ -0,0 +1,24 @@
+# tests/test_linea_tiempo.py
+URL = '/api/patient/1/timeline'
+
+
+def test_pagina_sin_cambios_responde_304(admin):
+    primera = admin.get(f'{URL}?limit=2')
+    assert primera.status_code == 200
+    repetida = admin.get(f'{URL}?limit=2', headers={'If-None-Match': primera.headers['ETag']})
+    assert repetida.status_code == 304
+
+
+def test_etag_distingue_cursor_y_limite(admin):
+    primera = admin.get(f'{URL}?limit=2')
+    etag = primera.headers['ETag']
+    cursor = primera.get_json()['next_cursor']
+    assert cursor
+
+    segunda = admin.get(f'{URL}?limit=2&cursor={cursor}', headers={'If-None-Match': etag})
+    assert segunda.status_code == 200
+    assert segunda.get_json()['eventos'] != primera.get_json()['eventos']
+
+    otro_limite = admin.get(f'{URL}?limit=3', headers={'If-None-Match': etag})
+    assert otro_limite.status_code == 200
+    assert len(otro_limite.get_json()['eventos']) == 3
@@ -0,0 +1,31 @@
+# tests/test_metricas.py
+from metricas import registro_metricas
+
+
+def _peticiones(endpoint):
+    return sum(total for (nombre, _, _), total in registro_metricas._peticiones.items() if nombre == endpoint)
+
+
+def test_cabecera_de_consultas_solo_para_admin(app, admin, doctor):
+    assert 'X-Consultas-SQL' in admin.get('/api/pacientes').headers
+    assert 'X-Consultas-SQL' not in doctor.get('/api/pacientes').headers
+
+    app.config['PERFILAR_SQL'] = True
+    try:
+        assert 'X-Consultas-SQL' in doctor.get('/api/pacientes').headers
+    finally:
+        app.config.pop('PERFILAR_SQL')
+
+
+def test_exportacion_en_streaming_se_registra_al_cerrar(app, admin):
+    consultas_antes = registro_metricas.consultas_en_peticiones()
+    registradas = _peticiones('export_data')
+
+    respuesta = admin.get('/api/export/consultas')
+    assert respuesta.is_streamed
+    assert respuesta.get_data() and 'X-Consultas-SQL' not in respuesta.headers
+    respuesta.close()
+
+    # Una sola observación, con las sentencias que corrieron durante el streaming
+    assert _peticiones('export_data') == registradas + 1
+    assert registro_metricas.consultas_en_peticiones() > consultas_antes
@@ -0,0 +1,59 @@
+# tests/test_migraciones.py
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import RAIZ
+from migraciones import aplicar_migraciones, version_actual
+
+
+@pytest.fixture
+def base(tmp_path):
+    ruta = tmp_path / 'clinic.db'
+    shutil.copy(os.path.join(RAIZ, 'clinic.db'), ruta)
+    conn = sqlite3.connect(ruta)
+    yield conn
+    conn.close()
+
+
+def _acciones(conn, tabla):
+    return {fila[2]: fila[6] for fila in conn.execute(f'PRAGMA foreign_key_list({tabla})')}
+
+
+def test_borrado_en_cascada_reconstruye_las_tablas(base, capsys):
+    base.execute('PRAGMA foreign_keys = ON')
+    aplicar_migraciones(base, hasta=9)
+    objetos = base.execute("SELECT type, name FROM sqlite_master WHERE tbl_name IN "
+                           "('consultas', 'historial_medico') ORDER BY name").fetchall()
+    consultas = base.execute('SELECT * FROM consultas ORDER BY id').fetchall()
+
+    aplicar_migraciones(base, hasta=10)
+    assert _acciones(base, 'consultas')['pacientes'] == 'CASCADE'
+    assert _acciones(base, 'historial_medico') == {
+        'pacientes': 'CASCADE', 'consultas': 'NO ACTION', 'usuarios': 'NO ACTION'}
+    # Mismas filas, índices y triggers; foreign_keys vuelve a su estado
+    assert base.execute("SELECT type, name FROM sqlite_master WHERE tbl_name IN "
+                        "('consultas', 'historial_medico') ORDER BY name").fetchall() == objetos
+    assert base.execute('SELECT * FROM consultas ORDER BY id').fetchall() == consultas
+    assert base.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+
+    paciente = consultas[0][1]
+    base.execute('DELETE FROM historial_medico WHERE consulta_id IN '
+                 '(SELECT id FROM consultas WHERE paciente_id = ?)', (paciente,))
+    base.execute('DELETE FROM pacientes WHERE id = ?', (paciente,))
+    assert base.execute('SELECT COUNT(*) FROM consultas WHERE paciente_id = ?', (paciente,)).fetchone()[0] == 0
+
+
+def test_claves_invalidas_revierten_la_migracion(base, capsys):
+    aplicar_migraciones(base, hasta=9)
+    base.execute("INSERT INTO consultas (paciente_id, doctor_id, fecha_consulta, motivo) "
+                 "VALUES (999999, 1, '2024-01-01', 'huérfana')")
+    base.commit()
+    esquema = base.execute("SELECT sql FROM sqlite_master WHERE name = 'consultas'").fetchone()
+
+    with pytest.raises(sqlite3.IntegrityError):
+        aplicar_migraciones(base, hasta=10)
+    assert version_actual(base) == 9
+    assert base.execute("SELECT sql FROM sqlite_master WHERE name = 'consultas'").fetchone() == esquema
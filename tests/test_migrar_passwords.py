@@ -0,0 +1,36 @@
+# tests/test_migrar_passwords.py
+import os
+import sqlite3
+
+from contrasenas import es_hash
+from migrar_passwords import migrar_contraseñas, _ruta_progreso
+
+
+def _base(ruta, usuarios):
+    conn = sqlite3.connect(ruta)
+    conn.execute('CREATE TABLE usuarios (id INTEGER PRIMARY KEY, username TEXT, password TEXT)')
+    conn.executemany('INSERT INTO usuarios (username, password) VALUES (?, ?)', usuarios)
+    conn.commit()
+    conn.close()
+
+
+def test_tabla_vacia_no_falla(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _base('vacia.db', [])
+    migrar_contraseñas('vacia.db', procesos=1)
+    assert not os.path.exists(_ruta_progreso('vacia.db'))
+
+
+def test_cuenta_solo_las_filas_actualizadas(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    _base('clinic.db', [('a', 'Clave1!'), ('b', 'Clave2!'), ('c', None)])
+    migrar_contraseñas('clinic.db', procesos=1)
+    assert 'Migrados ahora: 2' in capsys.readouterr().out
+
+    conn = sqlite3.connect('clinic.db')
+    assert all(es_hash(p) for (p,) in conn.execute('SELECT password FROM usuarios WHERE password IS NOT NULL'))
+    conn.close()
+
+    # Segunda pasada: nada pendiente y sin archivo de progreso que borrar
+    migrar_contraseñas('clinic.db', procesos=1)
+    assert 'Todas las contraseñas ya están en formato hash' in capsys.readouterr().out
@@ -0,0 +1,82 @@
+# tests/test_rangos_fecha.py
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from migraciones import _migracion_014_fechas_con_hora
+from rangos_fecha import rango_mes, rango_semana, rango_periodo, filtro_rango
+
+
+def _en_rango(valores, rango):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE consultas (fecha_consulta TEXT, proxima_cita TEXT)')
+    conn.executemany('INSERT INTO consultas (fecha_consulta) VALUES (?)', [(v,) for v in valores])
+    _migracion_014_fechas_con_hora(conn.cursor())
+    predicado, params = filtro_rango('fecha_consulta', rango)
+    return sorted(fila[0] for fila in conn.execute(
+        f'SELECT fecha_consulta FROM consultas WHERE {predicado}', params))
+
+
+@pytest.mark.parametrize('referencia, esperado', [
+    (date(2024, 2, 29), ('2024-02-01', '2024-03-01')),
+    (date(2024, 12, 31), ('2024-12-01', '2025-01-01')),
+    (datetime(2024, 1, 1, 0, 0), ('2024-01-01', '2024-02-01')),
+    # 23:30 en UTC-3 ya es el mes siguiente en UTC
+    (datetime(2024, 1, 31, 23, 30, tzinfo=timezone(timedelta(hours=-3))), ('2024-02-01', '2024-03-01')),
+])
+def test_rango_mes(referencia, esperado):
+    assert rango_mes(referencia) == esperado
+
+
+def test_rango_semana_va_de_lunes_a_lunes():
+    assert rango_semana(date(2024, 1, 7)) == ('2024-01-01', '2024-01-08')   # domingo
+    assert rango_semana(date(2024, 1, 8)) == ('2024-01-08', '2024-01-15')   # lunes
+
+
+def test_rango_periodo_valida_el_orden():
+    with pytest.raises(ValueError):
+        rango_periodo(datetime(2024, 1, 2), date(2024, 1, 2))
+    assert rango_periodo(date(2024, 1, 1), datetime(2024, 1, 1, 8)) == ('2024-01-01', '2024-01-01 08:00:00')
+
+
+def test_mes_incluye_valores_de_solo_fecha_y_con_hora():
+    valores = ['2024-01-31', '2024-01-31 23:59:59', '2024-02-01', '2024-02-01 00:00:00',
+               '2024-02-29 23:59:59', '2024-03-01', '2024-03-01 00:00:00']
+    assert _en_rango(valores, rango_mes(date(2024, 2, 10))) == [
+        '2024-02-01', '2024-02-01 00:00:00', '2024-02-29 23:59:59']
+
+
+def test_periodo_con_hora_y_formatos_mezclados():
+    valores = ['2024-01-01T10:29', '2024-01-01 10:30:00', '2024-01-01T11:00',
+               '2024-01-01 11:59', '2024-01-01 12:00:00', '2024-01-01T12:00:00']
+    rango = rango_periodo(datetime(2024, 1, 1, 10, 30), datetime(2024, 1, 1, 12, 0))
+    assert _en_rango(valores, rango) == ['2024-01-01 10:30:00', '2024-01-01 11:00:00', '2024-01-01 11:59:00']
+
+
+@pytest.mark.parametrize('zona', [
+    timezone.utc, timezone(timedelta(hours=-3)), timezone(timedelta(hours=5, minutes=30)),
+    timezone(timedelta(hours=14)), timezone(timedelta(hours=-12)),
+])
+@pytest.mark.parametrize('referencia', [
+    datetime(2024, 1, 31, 22, 0, tzinfo=timezone.utc),
+    datetime(2024, 2, 1, 2, 0, tzinfo=timezone.utc),
+    datetime(2023, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+])
+def test_rango_mes_cuenta_igual_que_strftime(zona, referencia):
+    # Valores a un segundo de cada cambio de mes, con y sin hora
+    valores = []
+    for anio, mes in ((2023, 12), (2024, 1), (2024, 2), (2024, 3)):
+        primero = date(anio, mes, 1)
+        ultimo_anterior = primero - timedelta(days=1)
+        valores += [f'{ultimo_anterior} 23:59:59', str(ultimo_anterior),
+                    f'{primero} 00:00:00', str(primero), f'{primero:%Y-%m}-15 12:00:00']
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE consultas (fecha_consulta TEXT)')
+    conn.executemany('INSERT INTO consultas VALUES (?)', [(v,) for v in valores])
+
+    predicado, params = filtro_rango('fecha_consulta', rango_mes(referencia, zona))
+    por_rango = conn.execute(f'SELECT COUNT(*) FROM consultas WHERE {predicado}', params).fetchone()[0]
+    por_strftime = conn.execute("SELECT COUNT(*) FROM consultas WHERE strftime('%Y-%m', fecha_consulta) = ?",
+                                (referencia.astimezone(zona).strftime('%Y-%m'),)).fetchone()[0]
+    assert por_rango == por_strftime == 5
@@ -0,0 +1,38 @@
+# tests/test_seguridad.py
+import threading
+import time
+
+import pytest
+
+from seguridad import VerificadorPasswords, VerificacionDemorada
+
+
+def test_timeout_libera_el_cupo_de_la_tarea_cancelada():
+    verificador = VerificadorPasswords(max_trabajadores=1, max_en_cola=1, timeout=0.05)
+    ocupado = threading.Thread(target=lambda: pytest.raises(VerificacionDemorada,
+                                                            verificador._enviar, time.sleep, 0.3))
+    ocupado.start()
+    time.sleep(0.01)
+
+    # La segunda espera en la cola, vence y se cancela antes de empezar
+    with pytest.raises(VerificacionDemorada):
+        verificador._enviar(time.sleep, 0)
+    ocupado.join()
+    time.sleep(0.3)
+
+    estadisticas = verificador.estadisticas()
+    assert estadisticas['pendientes'] == 0
+    assert estadisticas['demoradas'] == 2
+    assert verificador._enviar(lambda: 'ok') == 'ok'
+
+
+def test_login_demorado_responde_503(app, monkeypatch):
+    import calc_app
+
+    def demorada(password, stored_hash):
+        raise VerificacionDemorada()
+
+    monkeypatch.setattr(calc_app.verificador_passwords, 'verificar_con_rehash', demorada)
+    respuesta = app.test_client().post('/login', json={'email': 'cgomez@vetclinic.com', 'password': 'x'})
+    assert respuesta.status_code == 503
+    assert respuesta.headers['Retry-After'] == '1'
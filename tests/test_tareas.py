@@ -0,0 +1,68 @@
+# tests/test_tareas.py
+from tareas import ColaTareas, CONCESION_SEGUNDOS
+
+
+def _tarea_en_proceso(conn, worker_id, hace_segundos):
+    cursor = conn.execute('''
+        INSERT INTO tareas (tipo, estado, worker_id, actualizado_en)
+        VALUES ('prueba', 'en_proceso', ?, datetime('now', '-' || ? || ' seconds'))
+    ''', (worker_id, hace_segundos))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def test_reanudar_solo_retoma_concesiones_vencidas(app, conn, monkeypatch):
+    viva = _tarea_en_proceso(conn, 'otro-proceso', 5)
+    abandonada = _tarea_en_proceso(conn, 'proceso-caido', CONCESION_SEGUNDOS + 60)
+
+    cola = ColaTareas()
+    programadas = []
+    monkeypatch.setattr(cola, '_programar', lambda tarea_id, espera: programadas.append(tarea_id))
+    cola.reanudar()
+
+    estados = dict(conn.execute('SELECT id, estado FROM tareas WHERE id IN (?, ?)', (viva, abandonada)))
+    assert estados == {viva: 'en_proceso', abandonada: 'pendiente'}
+    assert abandonada in programadas and viva not in programadas
+
+
+def test_importar_la_aplicacion_no_reanuda_tareas(app, conn):
+    import importlib
+    import calc_app
+    tarea = _tarea_en_proceso(conn, 'otro-proceso', 5)
+    importlib.reload(calc_app)
+    assert conn.execute('SELECT estado FROM tareas WHERE id = ?', (tarea,)).fetchone()[0] == 'en_proceso'
+
+
+def _tarea_pendiente(conn, tipo):
+    cursor = conn.execute("INSERT INTO tareas (tipo) VALUES (?)", (tipo,))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def test_fallo_al_completar_libera_la_tarea(app, conn):
+    cola = ColaTareas()
+    # El resultado no se puede serializar: falla el UPDATE final, no la tarea
+    cola.registrar('sin_json', lambda c, p, progreso: {'valor': object()}, 'Prueba')
+    tarea = _tarea_pendiente(conn, 'sin_json')
+    cola._ejecutar(tarea)
+
+    fila = cola.estado(tarea)
+    assert fila['estado'] == 'error' and fila['worker_id'] is None
+
+
+def test_tarea_sin_estado_registrable_vuelve_a_pendiente(app, conn, monkeypatch):
+    cola = ColaTareas()
+    cola.registrar('rota', lambda c, p, progreso: {'ok': True}, 'Prueba')
+    programadas = []
+    monkeypatch.setattr(cola, '_programar', lambda tarea_id, espera: programadas.append(tarea_id))
+
+    def completar_falla(*args):
+        raise RuntimeError('disco lleno')
+    monkeypatch.setattr(cola, '_fallo', completar_falla)
+    monkeypatch.setattr('tareas.json.dumps', completar_falla)
+    tarea = _tarea_pendiente(conn, 'rota')
+    cola._ejecutar(tarea)
+
+    fila = cola.estado(tarea)
+    assert fila['estado'] == 'pendiente' and fila['worker_id'] is None
+    assert fila['proximo_intento'] is not None and programadas == [tarea]